@@ -0,0 +1,61 @@
+import os
+import threading
+
+# Shared API clients. Nothing is constructed at import time: each client is
+# created on first use (or by the startup pre-warm), so importing the app
+# needs neither network nor credentials, and every router shares one client
+# and one connection pool instead of building its own.
+
+
+class LazyClient:
+    """
+    Proxy that builds its client with `factory` on first attribute access.
+    Modules keep a reference to the proxy, so tests and benches can still
+    replace the module attribute with a fake.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        # The Supabase client is used from worker threads too, so creation is locked
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    @property
+    def created(self) -> bool:
+        return self._client is not None
+
+    def reset(self):
+        """Forget the client and return it (or None) so the caller can close it."""
+        with self._lock:
+            client, self._client = self._client, None
+        return client
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+
+def _create_supabase():
+    # The supabase package pulls in its auth, storage and realtime clients;
+    # importing it here keeps that off the import path of the app
+    from supabase import create_client
+
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        raise RuntimeError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY (or SUPABASE_KEY) must be set")
+    return create_client(url, key)
+
+
+supabase = LazyClient(_create_supabase)
+
+
+def prewarm_supabase():
+    """Open the PostgREST connection (DNS + TLS) ahead of the first request. Blocking; run it in a thread."""
+    supabase.resolve().postgrest.session.head("/")
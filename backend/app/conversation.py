@@ -0,0 +1,116 @@
+import os
+import json
+from typing import Optional
+from . import prompts
+from .llm import estimate_tokens, PROMPT_TOKEN_BUDGETS
+
+# Interview context compaction. The client re-sends the whole transcript on
+# every turn; instead of pasting it into the prompt verbatim, older turns are
+# folded into a structured summary (users, features, goals, constraints) and
+# only the last RAW_TURNS turns are kept word for word, serialized as compact
+# JSON. The result is shrunk further until the prompt fits the endpoint's
+# prompt-token budget, so late interview turns cost about the same as early ones.
+
+RAW_TURNS = int(os.getenv("INTERVIEW_RAW_TURNS", "3"))
+# Longest answer excerpt kept per summary entry
+SUMMARY_ENTRY_CHARS = int(os.getenv("INTERVIEW_SUMMARY_ENTRY_CHARS", "200"))
+
+# Topic keywords (English and Indonesian), matched against the question first
+TOPICS = {
+    "users": ("user", "pengguna", "customer", "pelanggan", "audience", "target", "who", "siapa"),
+    "features": ("feature", "fitur", "function", "fungsi", "capabilit", "kemampuan", "mvp"),
+    "goals": ("goal", "tujuan", "why", "mengapa", "kenapa", "problem", "masalah", "success", "sukses", "value"),
+    "constraints": (
+        "budget", "biaya", "deadline", "time", "waktu", "constraint", "batasan", "limit",
+        "tech", "teknologi", "platform", "stack", "integrat", "integrasi",
+    ),
+}
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def normalize_turn(item) -> dict:
+    """Conversation items are {question, answer}; anything else is kept as an answer."""
+    if isinstance(item, dict) and ("question" in item or "answer" in item):
+        return {"question": str(item.get("question") or ""), "answer": str(item.get("answer") or "")}
+    if isinstance(item, dict) and "content" in item:
+        return {"question": "", "answer": str(item["content"])}
+    return {"question": "", "answer": item if isinstance(item, str) else _dumps(item)}
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _topic(turn: dict) -> str:
+    for text in (turn["question"].lower(), turn["answer"].lower()):
+        for topic, keywords in TOPICS.items():
+            if any(keyword in text for keyword in keywords):
+                return topic
+    return "other"
+
+
+def summarize_turn(summary: dict, turn: dict) -> dict:
+    """Fold one turn into the rolling summary (topic -> answer excerpts, oldest first)."""
+    if turn["answer"].strip():
+        summary.setdefault(_topic(turn), []).append(_clip(turn["answer"], SUMMARY_ENTRY_CHARS))
+    return summary
+
+
+def _render(summary: dict, recent: list) -> str:
+    context = {}
+    if summary:
+        context["summary"] = summary
+    if recent:
+        context["recent"] = [[turn["question"], turn["answer"]] for turn in recent]
+    return _dumps(context) if context else "{}"
+
+
+def compact_conversation(conversation: list, budget: Optional[int] = None, raw_turns: int = RAW_TURNS) -> str:
+    """
+    Serialize the conversation as {"summary": {topic: [...]}, "recent": [[q, a], ...]}
+    within `budget` tokens (no limit when None).
+    """
+    turns = [normalize_turn(item) for item in conversation]
+    split = max(0, len(turns) - raw_turns)
+    summary = {}
+    for turn in turns[:split]:
+        summarize_turn(summary, turn)
+    recent = turns[split:]
+
+    rendered = _render(summary, recent)
+    if budget is None:
+        return rendered
+
+    while estimate_tokens(rendered) > budget:
+        if len(recent) > 1:
+            # Fold the oldest raw turn into the summary first
+            summarize_turn(summary, recent.pop(0))
+        elif any(summary.values()):
+            # Then drop the oldest excerpt of the largest topic
+            largest = max(summary, key=lambda topic: len(_dumps(summary[topic])))
+            summary[largest].pop(0)
+            if not summary[largest]:
+                del summary[largest]
+        elif recent and len(recent[0]["answer"]) > SUMMARY_ENTRY_CHARS:
+            recent[0] = {"question": recent[0]["question"], "answer": _clip(recent[0]["answer"], SUMMARY_ENTRY_CHARS)}
+        else:
+            break
+        rendered = _render(summary, recent)
+    return rendered
+
+
+def fit_prompt(name: str, conversation: list, **values) -> str:
+    """
+    Render prompt template `name` with the conversation as its `context`,
+    compacted so the whole prompt stays within the endpoint's token budget.
+    """
+    template = prompts.get(name)
+    budget = PROMPT_TOKEN_BUDGETS.get(name)
+    if budget is not None:
+        fixed = template.static_tokens + estimate_tokens(template.suffix(context="", **values))
+        budget = max(0, budget - fixed)
+    return template.render(context=compact_conversation(conversation, budget), **values)
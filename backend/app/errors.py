@@ -0,0 +1,18 @@
+import math
+from fastapi import HTTPException
+from .llm import LLMUnavailableError
+
+
+def http_error(error: Exception) -> HTTPException:
+    """
+    The HTTPException a router raises for a failed generation: 503 with
+    Retry-After when the LLM is rate limited or out of retries, so clients
+    back off instead of treating it as a server bug, 500 for anything else.
+    """
+    if isinstance(error, LLMUnavailableError):
+        return HTTPException(
+            status_code=503,
+            detail=str(error),
+            headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+        )
+    return HTTPException(status_code=500, detail=str(error))
@@ -0,0 +1,39 @@
+import json
+from fastapi.responses import Response
+
+# Fast JSON path for large payloads (guides, blueprints, job results).
+# orjson is used when installed and is optional: without it the same
+# functions fall back to the stdlib with compact separators.
+#
+# Routes opt in by returning FastJSONResponse(data) themselves. FastAPI
+# then sends the body as is instead of walking the already-shaped dicts
+# again with jsonable_encoder, so only return plain dicts/lists/str/numbers
+# (orjson also handles datetime and UUID) through it.
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def dumps(value) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes. Unknown types are stringified."""
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def loads(data):
+    """Parse JSON from str or bytes. Errors are json.JSONDecodeError (a ValueError) either way."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,477 @@
+"""
+Persistence for implementation guides (task_categories -> tasks -> task_content_blocks).
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+from . import metrics
+from .metrics import span
+from .server import WORKERS
+
+# The whole guide in one PostgREST request: tasks, blocks and progress are
+# embedded through their foreign keys instead of being fetched separately.
+GUIDE_SELECT = (
+    "id, name, icon, display_order, "
+    "tasks(id, title, description, estimated_time, display_order, "
+    "task_content_blocks(id, block_type, content, language, filename, display_order), "
+    "task_progress(is_completed, updated_at))"
+)
+
+# What incremental regeneration needs to diff against the stored guide
+EXISTING_SELECT = (
+    "id, name, display_order, source_sections, "
+    "tasks(id, title, description, estimated_time, display_order, task_content_blocks(id))"
+)
+
+# Cleared once the database turns out not to have migrations/001: categories
+# are then written without source_sections and incremental regeneration,
+# which needs them, stays off
+source_tracking = True
+
+
+def _missing_sources(error: Exception) -> bool:
+    """Whether `error` is PostgREST rejecting the guide_sources table or the source_sections column."""
+    return "guide_sources" in str(error) or "source_sections" in str(error)
+
+
+def _category_row(project_id: str, category: dict, display_order: int) -> dict:
+    row = {
+        "project_id": project_id,
+        "name": category["name"],
+        "icon": category.get("icon", "folder"),
+        "display_order": display_order
+    }
+    if "source_sections" in category and source_tracking:
+        row["source_sections"] = category["source_sections"]
+    return row
+
+
+def _task_row(project_id: str, task: dict, display_order: int) -> dict:
+    return {
+        "project_id": project_id,
+        "title": task["title"],
+        "description": task.get("description", ""),
+        "estimated_time": task.get("estimated_time"),
+        "display_order": display_order
+    }
+
+
+def _block_row(block: dict, display_order: int) -> dict:
+    return {
+        "block_type": block["type"],
+        "content": block["content"],
+        "language": block.get("language"),
+        "filename": block.get("filename"),
+        "display_order": display_order
+    }
+
+
+def _guide_rows(project_id: str, indexed_categories: list):
+    """Flatten (display_order, category) pairs into insert rows, validating before anything is written."""
+    category_rows, task_rows, block_rows = [], [], []
+
+    for cat_idx, category in indexed_categories:
+        category_rows.append(_category_row(project_id, category, cat_idx))
+        for task_idx, task in enumerate(category.get("tasks", [])):
+            task_rows.append((len(category_rows) - 1, _task_row(project_id, task, task_idx)))
+            for block_idx, block in enumerate(task.get("content_blocks", [])):
+                block_rows.append((len(task_rows) - 1, _block_row(block, block_idx)))
+
+    return category_rows, task_rows, block_rows
+
+
+def _title_key(title: str) -> str:
+    return " ".join(str(title).split()).lower()
+
+
+def _inserted_ids(result, expected: int, table: str) -> list:
+    # PostgREST returns bulk-inserted rows in payload order
+    ids = [row["id"] for row in (result.data or [])]
+    if len(ids) != expected:
+        raise RuntimeError(f"Bulk insert into {table} returned {len(ids)} rows, expected {expected}")
+    return ids
+
+
+class GuideWriter:
+    """
+    Writes a project's guide with one bulk insert per table for each batch of
+    categories, and remembers what it wrote so rollback() can remove it again
+    (tasks and blocks cascade from task_categories).
+    """
+
+    def __init__(self, db, project_id: str):
+        self.db = db
+        self.project_id = project_id
+        self.written_category_ids = []
+
+    def existing_category_ids(self) -> list:
+        with span("db.select_categories"):
+            existing = self.db.table("task_categories").select("id").eq("project_id", self.project_id).execute()
+        return [row["id"] for row in existing.data or []]
+
+    def delete_categories(self, category_ids: list):
+        if category_ids:
+            with span("db.delete_categories"):
+                self.db.table("task_categories").delete().in_("id", category_ids).execute()
+
+    def write_categories(self, indexed_categories: list) -> list:
+        """Insert (display_order, category) pairs; returns them in the GuideResponse shape."""
+        category_rows, task_rows, block_rows = _guide_rows(self.project_id, indexed_categories)
+        saved_categories = self._insert_categories(category_rows)
+        payload = [dict(row, category_id=saved_categories[cat_pos]["id"]) for cat_pos, row in task_rows]
+        saved_tasks = self._insert_tasks(payload, block_rows)
+        for (cat_pos, _), task in zip(task_rows, saved_tasks):
+            saved_categories[cat_pos]["tasks"].append(task)
+        return saved_categories
+
+    def write_category_shells(self, indexed_categories: list) -> list:
+        """Insert only the category rows, so tasks can be added with write_tasks() as they are generated."""
+        return self._insert_categories([
+            _category_row(self.project_id, category, display_order)
+            for display_order, category in indexed_categories
+        ])
+
+    def write_tasks(self, category_id: str, indexed_tasks: list) -> list:
+        """Insert (display_order, task) pairs with their blocks into one category; returns the saved tasks."""
+        task_rows, block_rows = [], []
+        for display_order, task in indexed_tasks:
+            task_rows.append(dict(_task_row(self.project_id, task, display_order), category_id=category_id))
+            for block_idx, block in enumerate(task.get("content_blocks", [])):
+                block_rows.append((len(task_rows) - 1, _block_row(block, block_idx)))
+        return self._insert_tasks(task_rows, block_rows)
+
+    def _insert_categories(self, category_rows: list) -> list:
+        if not category_rows:
+            return []
+        global source_tracking
+        try:
+            with span("db.insert_categories"):
+                result = self.db.table("task_categories").insert(category_rows).execute()
+        except Exception as e:
+            if not (source_tracking and _missing_sources(e)):
+                raise
+            print(f"source_sections unavailable, incremental guide regeneration disabled: {e}")
+            source_tracking = False
+            category_rows = [{k: v for k, v in row.items() if k != "source_sections"} for row in category_rows]
+            with span("db.insert_categories"):
+                result = self.db.table("task_categories").insert(category_rows).execute()
+        category_ids = _inserted_ids(result, len(category_rows), "task_categories")
+        self.written_category_ids.extend(category_ids)
+        return [
+            {
+                "id": category_id,
+                "name": row["name"],
+                "icon": row["icon"],
+                "display_order": row["display_order"],
+                "tasks": []
+            }
+            for category_id, row in zip(category_ids, category_rows)
+        ]
+
+    def _insert_tasks(self, task_rows: list, block_rows: list) -> list:
+        """Bulk insert task rows (category_id set) and (task position, block row) pairs."""
+        task_ids = []
+        if task_rows:
+            with span("db.insert_tasks"):
+                result = self.db.table("tasks").insert(task_rows).execute()
+            task_ids = _inserted_ids(result, len(task_rows), "tasks")
+
+        block_ids = []
+        if block_rows:
+            payload = [dict(row, task_id=task_ids[task_pos]) for task_pos, row in block_rows]
+            with span("db.insert_blocks"):
+                result = self.db.table("task_content_blocks").insert(payload).execute()
+            block_ids = _inserted_ids(result, len(block_rows), "task_content_blocks")
+
+        # Assemble the nested response from the rows we just wrote
+        saved_tasks = [
+            {
+                "id": task_id,
+                "title": row["title"],
+                "description": row["description"],
+                "estimated_time": row["estimated_time"],
+                "display_order": row["display_order"],
+                "content_blocks": [],
+                "is_completed": False
+            }
+            for task_id, row in zip(task_ids, task_rows)
+        ]
+        for block_id, (task_pos, row) in zip(block_ids, block_rows):
+            saved_tasks[task_pos]["content_blocks"].append({
+                "id": block_id,
+                "type": row["block_type"],
+                "content": row["content"],
+                "language": row["language"],
+                "filename": row["filename"],
+                "display_order": row["display_order"]
+            })
+        return saved_tasks
+
+    def existing_guide(self) -> list:
+        """Stored categories with their source sections, task titles and block ids."""
+        with span("db.select_categories"):
+            result = self.db.table("task_categories")\
+                .select(EXISTING_SELECT)\
+                .eq("project_id", self.project_id)\
+                .execute()
+        return _by_display_order(result.data)
+
+    def update_category(self, existing: dict, category: dict):
+        """
+        Rewrite one stored category in place from a regenerated `category`.
+
+        Tasks whose titles match keep their ids, so task_progress stays
+        attached; their fields and content blocks are replaced. New tasks are
+        inserted and tasks that disappeared are deleted. Six round trips at
+        most, independent of the number of tasks.
+        """
+        category_id = existing["id"]
+        old_tasks = {}
+        for task in existing.get("tasks") or []:
+            old_tasks.setdefault(_title_key(task["title"]), []).append(task)
+
+        kept_rows, new_rows, blocks_by_task = [], [], []
+        for task_idx, task in enumerate(category.get("tasks", [])):
+            row = dict(_task_row(self.project_id, task, task_idx), category_id=category_id)
+            matches = old_tasks.get(_title_key(task["title"]))
+            if matches:
+                row["id"] = matches.pop(0)["id"]
+                kept_rows.append(row)
+            else:
+                new_rows.append(row)
+            blocks_by_task.append((row, task.get("content_blocks", [])))
+        stale_task_ids = [task["id"] for tasks in old_tasks.values() for task in tasks]
+        old_block_ids = [
+            block["id"]
+            for task in existing.get("tasks") or []
+            for block in task.get("task_content_blocks") or []
+        ]
+
+        category_row = _category_row(self.project_id, category, existing["display_order"])
+        with span("db.update_category"):
+            self.db.table("task_categories").update(category_row).eq("id", category_id).execute()
+        if kept_rows:
+            with span("db.upsert_tasks"):
+                self.db.table("tasks").upsert(kept_rows, on_conflict="id").execute()
+        if new_rows:
+            with span("db.insert_tasks"):
+                result = self.db.table("tasks").insert(new_rows).execute()
+            for row, task_id in zip(new_rows, _inserted_ids(result, len(new_rows), "tasks")):
+                row["id"] = task_id
+
+        block_rows = [
+            dict(_block_row(block, block_idx), task_id=row["id"])
+            for row, blocks in blocks_by_task
+            for block_idx, block in enumerate(blocks)
+        ]
+        if block_rows:
+            with span("db.insert_blocks"):
+                self.db.table("task_content_blocks").insert(block_rows).execute()
+        # Old blocks and vanished tasks go last, once the new content is in place
+        if old_block_ids:
+            with span("db.delete_blocks"):
+                self.db.table("task_content_blocks").delete().in_("id", old_block_ids).execute()
+        if stale_task_ids:
+            with span("db.delete_tasks"):
+                self.db.table("tasks").delete().in_("id", stale_task_ids).execute()
+
+    def rollback(self):
+        try:
+            self.delete_categories(self.written_category_ids)
+            self.written_category_ids = []
+        except Exception as rollback_error:
+            print(f"Error rolling back guide for {self.project_id}: {rollback_error}")
+
+
+def load_section_hashes(db, project_id: str) -> dict:
+    """
+    Section hashes of the blueprint the project's guide was generated from.
+    Empty, so the guide is regenerated in full, if source tracking is missing.
+    """
+    if not source_tracking:
+        return {}
+    try:
+        with span("db.select_guide_sources"):
+            result = db.table("guide_sources").select("section_hashes").eq("project_id", project_id).execute()
+    except Exception as e:
+        if not _missing_sources(e):
+            raise
+        print(f"guide_sources unavailable: {e}")
+        return {}
+    return (result.data[0].get("section_hashes") or {}) if result.data else {}
+
+
+def save_section_hashes(db, project_id: str, section_hashes: dict):
+    """Skipped, leaving incremental regeneration off, if the guide_sources table is missing."""
+    if not source_tracking:
+        return
+    try:
+        with span("db.upsert_guide_sources"):
+            db.table("guide_sources").upsert({
+                "project_id": project_id,
+                "section_hashes": section_hashes,
+                "updated_at": "now()"
+            }, on_conflict="project_id").execute()
+    except Exception as e:
+        if not _missing_sources(e):
+            raise
+        print(f"guide_sources unavailable, section hashes not saved: {e}")
+
+
+# Cleared once guide_version() turns out to be missing (migrations/002 not
+# applied), so uncached reads stop paying a failing round trip for it
+guide_versioning = True
+
+
+def _missing_function(error: Exception) -> bool:
+    message = str(error)
+    return "PGRST202" in message or "Could not find the function" in message or "does not exist" in message
+
+
+def fetch_guide_version(db, project_id: str) -> Optional[str]:
+    """
+    Fingerprint of the stored guide and its progress (guide_version() in
+    migrations/002), without loading the guide. None if it is unavailable.
+    """
+    global guide_versioning
+    if not guide_versioning:
+        return None
+    try:
+        with span("db.guide_version"):
+            result = db.rpc("guide_version", {"p_id": project_id}).execute()
+        return result.data or None
+    except Exception as e:
+        if _missing_function(e):
+            print(f"guide_version unavailable, guide ETags disabled: {e}")
+            guide_versioning = False
+        else:
+            print(f"guide_version failed: {e}")
+        return None
+
+
+def _by_display_order(rows):
+    return sorted(rows or [], key=lambda row: row.get("display_order") or 0)
+
+
+def fetch_guide(db, project_id: str) -> dict:
+    """Load the nested guide with its progress in a single round trip."""
+    result = db.table("task_categories")\
+        .select(GUIDE_SELECT)\
+        .eq("project_id", project_id)\
+        .order("display_order")\
+        .execute()
+
+    categories = []
+    total_tasks = 0
+    completed_count = 0
+    last_updated = None
+
+    for cat in _by_display_order(result.data):
+        tasks = []
+        for task in _by_display_order(cat.get("tasks")):
+            progress = task.get("task_progress") or []
+            # task_progress is unique per task; PostgREST may embed it as an object
+            if isinstance(progress, dict):
+                progress = [progress]
+            is_completed = any(p.get("is_completed") for p in progress)
+            for p in progress:
+                if p.get("updated_at") and (last_updated is None or p["updated_at"] > last_updated):
+                    last_updated = p["updated_at"]
+            if is_completed:
+                completed_count += 1
+
+            tasks.append({
+                "id": task["id"],
+                "title": task["title"],
+                "description": task.get("description"),
+                "estimated_time": task.get("estimated_time"),
+                "display_order": task["display_order"],
+                "content_blocks": [
+                    {
+                        "id": block["id"],
+                        "type": block["block_type"],
+                        "content": block["content"],
+                        "language": block.get("language"),
+                        "filename": block.get("filename"),
+                        "display_order": block["display_order"]
+                    }
+                    for block in _by_display_order(task.get("task_content_blocks"))
+                ],
+                "is_completed": is_completed
+            })
+
+        total_tasks += len(tasks)
+        categories.append({
+            "id": cat["id"],
+            "name": cat["name"],
+            "icon": cat.get("icon"),
+            "display_order": cat["display_order"],
+            "tasks": tasks
+        })
+
+    return {
+        "categories": categories,
+        "total_tasks": total_tasks,
+        "completed_tasks": completed_count,
+        "last_updated": last_updated
+    }
+
+
+class GuideCache:
+    """
+    Per-project cache of assembled guide responses.
+
+    Entries are dropped by invalidate() whenever a guide is regenerated or its
+    progress changes in this process; the TTL bounds staleness across workers.
+    Each entry keeps the ETag the guide was served with.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, project_id: str):
+        """(guide, etag) or None."""
+        entry = self._entries.get(project_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, guide, etag = entry
+        if expires_at < time.monotonic():
+            del self._entries[project_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(project_id)
+        self.hits += 1
+        return guide, etag
+
+    def set(self, project_id: str, guide: dict, etag: Optional[str] = None):
+        if self.ttl <= 0:
+            return
+        self._entries[project_id] = (time.monotonic() + self.ttl, guide, etag)
+        self._entries.move_to_end(project_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, project_id: str):
+        self._entries.pop(project_id, None)
+
+
+# Writes only invalidate the cache of the worker that made them, so with
+# several workers the default TTL bounds how stale a sibling's copy can be
+guide_cache = GuideCache(
+    ttl=float(os.getenv("GUIDE_CACHE_TTL", "60" if WORKERS == 1 else "5")),
+    max_entries=int(os.getenv("GUIDE_CACHE_MAX_ENTRIES", "512")),
+)
+
+
+metrics.register_collector(lambda: [
+    ("guide_cache_requests_total", "counter", "Guide read cache lookups by result", [
+        ({"result": "hit"}, guide_cache.hits),
+        ({"result": "miss"}, guide_cache.misses),
+    ]),
+])
@@ -0,0 +1,53 @@
+import os
+import time
+from . import metrics, providers
+from .server import WORKERS
+
+# Liveness and readiness. GET /health only proves the worker's event loop
+# answers; GET /ready says whether this worker should be sent traffic: it has
+# finished starting, is not draining for shutdown, its job workers run and
+# its credentials are configured. Pre-warmed connections are reported, not
+# required, since a failed pre-warm only costs the first request a handshake.
+
+
+class ServerState:
+    def __init__(self):
+        self.started_at = time.time()
+        self.started = False
+        self.draining = False
+        # "groq"/"supabase" -> "pending", "ok" or the pre-warm error
+        self.connections = {}
+
+
+state = ServerState()
+
+
+def _configured(provider) -> bool:
+    supabase = os.getenv("SUPABASE_URL") and (os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY"))
+    # Mock providers (MOCK_AI_RESPONSES) never call Groq
+    groq = os.getenv("GROQ_API_KEY") or not isinstance(provider, providers.GroqProvider)
+    return bool(supabase and groq)
+
+
+def readiness(job_queue, provider) -> tuple:
+    """(ready, report) for this worker process."""
+    checks = {
+        "started": state.started,
+        "accepting": not state.draining,
+        "jobs": job_queue.started,
+        "configured": _configured(provider),
+    }
+    ready = all(checks.values())
+    return ready, {
+        "status": "ready" if ready else "not_ready",
+        "checks": checks,
+        "connections": state.connections,
+        "worker": {
+            "pid": os.getpid(),
+            "workers": WORKERS,
+            "uptime_seconds": round(time.time() - state.started_at, 1),
+            "requests_total": metrics.requests.total,
+            "requests_in_flight": metrics.requests.in_flight,
+        },
+        "jobs": {"running": job_queue.running, "queued": job_queue.queued},
+    }
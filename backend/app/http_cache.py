@@ -0,0 +1,40 @@
+import hashlib
+from typing import Optional
+from fastapi.responses import Response
+
+# Conditional GET: weak ETags built from a version string and If-None-Match
+# handling. Responses may be stored by the browser but are revalidated on
+# every view, which costs a 304 with no body while nothing has changed.
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def content_version(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def weak_etag(version: Optional[str]) -> Optional[str]:
+    # Weak because the compression middleware may re-encode the body
+    return f'W/"{version}"' if version else None
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Weak comparison of an If-None-Match header against the current ETag."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(_opaque(tag) == _opaque(etag) for tag in if_none_match.split(","))
+
+
+def cache_headers(etag: Optional[str]) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL} if etag else {}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+from typing import Optional
+from .server import RUN_ID
+
+# Background job mode for long-running generations. A POST enqueues a job and
+# returns its id immediately; a bounded pool of workers runs the generation and
+# GET /api/jobs/{id} reports status, progress and the result. Job state lives
+# in SQLite so it survives restarts and is shared by the worker processes: a
+# job is claimed atomically before it runs and records the worker running it.
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def no_progress(progress: dict):
+    """Progress callback for generations that run outside a job."""
+
+
+class JobStore:
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self.conn.row_factory = sqlite3.Row
+        # Readers in other worker processes don't block the writer
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        columns = [row["name"] for row in self.conn.execute("PRAGMA table_info(jobs)")]
+        if "owner" not in columns:
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self.conn.commit()
+
+    def create(self, kind: str, payload: dict) -> str:
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        self.conn.execute(
+            "INSERT INTO jobs (id, kind, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, kind, QUEUED, json.dumps(payload), now, now),
+        )
+        self.conn.commit()
+        return job_id
+
+    def update(self, job_id: str, **fields):
+        for key in ("progress", "result"):
+            if key in fields:
+                fields[key] = json.dumps(fields[key])
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        self.conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+        self.conn.commit()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        for key in ("progress", "result"):
+            job[key] = json.loads(job[key]) if job[key] else None
+        return job
+
+    def claim(self, job_id: str, owner: str) -> bool:
+        """Mark a queued job as running in `owner`; False if another worker got it first."""
+        cursor = self.conn.execute(
+            "UPDATE jobs SET status = ?, owner = ?, updated_at = ? WHERE id = ? AND status = ?",
+            (RUNNING, owner, time.time(), job_id, QUEUED),
+        )
+        self.conn.commit()
+        return cursor.rowcount == 1
+
+    def ids_with_status(self, status: str) -> list:
+        rows = self.conn.execute("SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (status,)).fetchall()
+        return [row["id"] for row in rows]
+
+    def running_owners(self) -> list:
+        rows = self.conn.execute("SELECT id, owner FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+        return [(row["id"], row["owner"]) for row in rows]
+
+    def prune(self, older_than: float):
+        self.conn.execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (SUCCEEDED, FAILED, older_than),
+        )
+        self.conn.commit()
+
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    """Whether the worker that claimed a job is still running: same launch, live process."""
+    run_id, _, pid = (owner or "").partition(":")
+    if run_id != RUN_ID or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobQueue:
+    """
+    Bounded worker pool over the job store. Handlers are registered per job
+    kind. The store at `path` is opened by start(), so importing the app
+    creates no database file.
+    """
+
+    def __init__(self, path: str, concurrency: int, retention: float):
+        self.path = path
+        self.store = None
+        self.concurrency = concurrency
+        self.retention = retention
+        self.handlers = {}
+        self.owner = f"{RUN_ID}:{os.getpid()}"
+        self._queue = None
+        self._workers = []
+        # worker task -> id of the job it is running
+        self._busy = {}
+        self._draining = False
+
+    def register(self, kind: str, handler):
+        """`handler(payload, report)` is a coroutine function; `report(dict)` records progress."""
+        self.handlers[kind] = handler
+
+    @property
+    def running(self) -> int:
+        return len(self._busy)
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def started(self) -> bool:
+        return bool(self._workers) and not self._draining
+
+    async def start(self):
+        if self.store is None:
+            self.store = JobStore(self.path)
+        self._queue = asyncio.Queue()
+        self._draining = False
+        self.store.prune(time.time() - self.retention)
+        # Jobs that were mid-run when their worker stopped cannot be resumed safely
+        for job_id, owner in self.store.running_owners():
+            if not _owner_alive(owner):
+                self.store.update(job_id, status=FAILED, error="Interrupted by a server restart")
+        # Queued jobs of a worker that stopped; live siblings' jobs are skipped by claim()
+        for job_id in self.store.ids_with_status(QUEUED):
+            self._queue.put_nowait(job_id)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self, drain: float = 0):
+        """
+        Stop the workers. Running jobs get up to `drain` seconds to finish and
+        are cancelled (failed) after that; jobs not started yet stay queued for
+        the next worker to start.
+        """
+        self._draining = True
+        if drain > 0 and self._busy:
+            busy = [worker for worker in self._workers if worker in self._busy]
+            idle = [worker for worker in self._workers if worker not in busy]
+            for worker in idle:
+                worker.cancel()
+            _, pending = await asyncio.wait(busy, timeout=drain)
+            if pending:
+                print(f"Cancelling {len(pending)} job(s) still running after {drain:g}s drain")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def _check_started(self):
+        if self._queue is None:
+            raise RuntimeError("Job queue is not started; call start() (the app lifespan does) first")
+
+    def submit(self, kind: str, payload: dict) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind {kind}")
+        self._check_started()
+        job_id = self.store.create(kind, payload)
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        self._check_started()
+        return self.store.get(job_id)
+
+    async def _worker(self):
+        task = asyncio.current_task()
+        while not self._draining:
+            job_id = await self._queue.get()
+            self._busy[task] = job_id
+            try:
+                await self._run(job_id)
+            finally:
+                del self._busy[task]
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = self.store.get(job_id)
+        if job is None or job["status"] != QUEUED or not self.store.claim(job_id, self.owner):
+            return
+
+        def report(progress: dict):
+            self.store.update(job_id, progress=progress)
+
+        try:
+            result = await self.handlers[job["kind"]](job["payload"], report)
+            self.store.update(job_id, status=SUCCEEDED, result=result)
+        except asyncio.CancelledError:
+            self.store.update(job_id, status=FAILED, error="Cancelled during shutdown")
+            raise
+        except Exception as e:
+            # HTTPException carries the useful message in .detail
+            error = getattr(e, "detail", None) or str(e)
+            print(f"Error in job {job_id} ({job['kind']}): {error}")
+            self.store.update(job_id, status=FAILED, error=str(error))
+
+
+job_queue = JobQueue(
+    os.getenv("JOBS_DB_PATH", "jobs.sqlite3"),
+    concurrency=int(os.getenv("JOB_CONCURRENCY", "2")),
+    retention=float(os.getenv("JOB_RETENTION_SECONDS", "86400")),
+)
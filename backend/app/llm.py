@@ -0,0 +1,334 @@
+import os
+import time
+import random
+import asyncio
+import httpx
+import groq
+from typing import Callable, Optional
+from groq import AsyncGroq
+from . import metrics, providers, routing
+from .cache import response_cache, cache_key
+from .clients import LazyClient
+from .server import WORKERS
+from .singleflight import inflight
+
+# LLM gateway. Every router awaits completions through this module: it owns
+# the shared async Groq client and applies per-model rate limiting, retries
+# with jittered backoff, the endpoint's model route (model, temperature, token
+# budget, fallback chain; see app/routing) and the response cache, so a slow
+# or throttled generation never blocks the event loop or fails a burst of
+# requests outright.
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))
+
+
+def _worker_share(limit: int) -> int:
+    return max(1, limit // WORKERS) if limit > 0 else 0
+
+
+# Rate limits of the Groq tier, applied per model (0 disables a limit). The
+# limits are per account, so each worker process enforces an equal share
+REQUESTS_PER_MINUTE = _worker_share(int(os.getenv("LLM_RPM", "30")))
+TOKENS_PER_MINUTE = _worker_share(int(os.getenv("LLM_TPM", "0")))
+# How long a request may queue for rate-limit capacity before failing
+MAX_QUEUE_WAIT = float(os.getenv("LLM_MAX_QUEUE_WAIT", "30"))
+
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+
+# Prompt-side token budgets; the interview transcript is compacted to fit
+PROMPT_TOKEN_BUDGETS = {
+    "interview.continue": 1600,
+    "idea.list": 1400,
+    "idea.blueprint": 2400,
+}
+
+
+def _create_client() -> AsyncGroq:
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        ),
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=10.0),
+    )
+    # Retries are handled here (with jitter and fallback), not inside the SDK
+    return AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), http_client=http_client, max_retries=0)
+
+
+# Created on first use, so importing the app needs no GROQ_API_KEY
+client = LazyClient(_create_client)
+
+# Live, recording, replay or synthetic completions (MOCK_AI_RESPONSES). The
+# live call resolves `client` on each request so it can be swapped out.
+provider = providers.from_env(lambda **kwargs: client.chat.completions.create(**kwargs))
+
+# TTL for endpoints whose output is a pure function of their input
+DETERMINISTIC_CACHE_TTL = response_cache.default_ttl
+
+
+class LLMUnavailableError(Exception):
+    """Raised when a completion could not be obtained within the retry and queue budget."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        # Seconds after which a new attempt has a fair chance
+        self.retry_after = retry_after
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English/Indonesian prose and JSON
+    return len(text) // 4 + 1
+
+
+def estimate_message_tokens(messages: list) -> int:
+    return sum(estimate_tokens(str(m.get("content", ""))) + 4 for m in messages)
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute up to one minute of capacity."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float, max_wait: float):
+        amount = min(amount, self.capacity)
+        deadline = time.monotonic() + max_wait
+        # The lock keeps waiters in FIFO order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+                if time.monotonic() + wait > deadline:
+                    raise LLMUnavailableError("Rate limit queue is full, try again shortly", retry_after=wait)
+                await asyncio.sleep(wait)
+
+    def refund(self, amount: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class ModelLimiter:
+    def __init__(self):
+        self.requests = TokenBucket(REQUESTS_PER_MINUTE) if REQUESTS_PER_MINUTE > 0 else None
+        self.tokens = TokenBucket(TOKENS_PER_MINUTE) if TOKENS_PER_MINUTE > 0 else None
+
+    async def acquire(self, estimated_tokens: int):
+        if self.requests:
+            await self.requests.acquire(1, MAX_QUEUE_WAIT)
+        if self.tokens:
+            await self.tokens.acquire(estimated_tokens, MAX_QUEUE_WAIT)
+
+    def settle(self, estimated_tokens: int, used_tokens: Optional[int]):
+        # Give back the part of the reservation the completion did not use
+        if self.tokens and used_tokens is not None and used_tokens < estimated_tokens:
+            self.tokens.refund(estimated_tokens - used_tokens)
+
+
+_limiters = {}
+retry_count = 0
+fallback_count = 0
+
+
+def _limiter(model: str) -> ModelLimiter:
+    if model not in _limiters:
+        _limiters[model] = ModelLimiter()
+    return _limiters[model]
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (groq.RateLimitError, groq.APIConnectionError, groq.APITimeoutError)):
+        return True
+    return isinstance(error, groq.APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            return float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+def _backoff(attempt: int, error: Exception) -> float:
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+    delay *= random.uniform(0.5, 1.5)
+    return max(delay, _retry_after(error) or 0.0)
+
+
+async def _create(messages: list, choice: routing.Choice, **kwargs):
+    """
+    Create a completion through the rate limiter, retrying 429/5xx/connection
+    errors with jittered backoff and then falling back to the next model of
+    the route. Returns (completion, model that served it).
+    """
+    global retry_count, fallback_count
+    endpoint = choice.endpoint
+    estimated = estimate_message_tokens(messages) + (kwargs.get("max_completion_tokens") or 1024)
+    last_error = None
+
+    for idx, model in enumerate(choice.models):
+        if idx:
+            fallback_count += 1
+            print(f"LLM falling back to {model} after: {last_error}")
+        limiter = _limiter(model)
+        for attempt in range(MAX_RETRIES + 1):
+            await limiter.acquire(estimated)
+            try:
+                with metrics.span("llm_request"):
+                    completion = await provider.create(endpoint, messages=messages, model=model, **kwargs)
+            except Exception as e:
+                limiter.settle(estimated, 0)
+                if not _is_retryable(e):
+                    routing.route_outcomes.inc(endpoint, choice.arm, model, "error")
+                    raise
+                last_error = e
+                if attempt < MAX_RETRIES:
+                    retry_count += 1
+                    await asyncio.sleep(_backoff(attempt, e))
+                continue
+            usage = getattr(completion, "usage", None)
+            limiter.settle(estimated, getattr(usage, "total_tokens", None))
+            metrics.record_usage(endpoint, model, usage)
+            return completion, model
+
+    routing.route_outcomes.inc(endpoint, choice.arm, choice.models[-1], "error")
+    raise LLMUnavailableError(
+        f"LLM request failed after retries: {last_error}",
+        retry_after=_retry_after(last_error) or BACKOFF_MAX
+    )
+
+
+async def chat_completion(
+    messages: list,
+    model: Optional[str] = None,
+    endpoint: str = "",
+    cache_ttl: Optional[float] = None,
+    bypass_cache: bool = False,
+    validate: Optional[Callable[[str], bool]] = None,
+    **kwargs,
+) -> str:
+    """
+    Run a chat completion and return the message content.
+
+    `endpoint` selects the model route; passing `model` pins the model but
+    keeps the route's parameters and fallbacks. With `cache_ttl` set,
+    identical requests (same endpoint, model, messages and generation
+    parameters) are answered from the response cache; `bypass_cache` skips
+    the lookup but still stores the fresh result. A result is only stored if
+    `validate(content)` (when given) returns true without raising, so output
+    the caller cannot use is not served again.
+    """
+    choice = routing.choose(endpoint, model)
+    routing.apply(choice, kwargs)
+
+    key = None
+    if cache_ttl is not None:
+        key = cache_key(endpoint, choice.models[0], messages, **kwargs)
+        if not bypass_cache:
+            cached = response_cache.get(key)
+            if cached is not None:
+                routing.served(choice, None)
+                return cached
+
+    start = time.perf_counter()
+    with metrics.span("llm_total"):
+        completion, served_by = await _create(messages, choice, **kwargs)
+    routing.route_duration.observe(time.perf_counter() - start, endpoint, choice.arm, served_by)
+    routing.served(choice, served_by)
+    content = completion.choices[0].message.content
+
+    if key is not None and _usable(validate, content):
+        response_cache.set(key, content, ttl=cache_ttl)
+    return content
+
+
+def _usable(validate: Optional[Callable[[str], bool]], content: str) -> bool:
+    if validate is None:
+        return True
+    try:
+        return bool(validate(content))
+    except Exception:
+        return False
+
+
+async def stream_chat_completion(messages: list, model: Optional[str] = None, endpoint: str = "", **kwargs):
+    """Run a streaming chat completion and yield content deltas as they arrive."""
+    choice = routing.choose(endpoint, model)
+    routing.apply(choice, kwargs)
+    start = time.perf_counter()
+    first_token = True
+    stream, served_by = await _create(messages, choice, stream=True, **kwargs)
+    routing.served(choice, served_by)
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token:
+                    ttfb = time.perf_counter() - start
+                    metrics.observe_stage("llm_ttfb", ttfb)
+                    routing.route_ttfb.observe(ttfb, endpoint, choice.arm, served_by)
+                    first_token = False
+                yield chunk.choices[0].delta.content
+            # Groq reports usage on the final chunk under x_groq
+            usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+            if usage is not None:
+                metrics.record_usage(endpoint, served_by, usage)
+    except Exception:
+        routing.route_outcomes.inc(endpoint, choice.arm, served_by, "error")
+        raise
+    metrics.observe_stage("llm_total", time.perf_counter() - start)
+    routing.route_duration.observe(time.perf_counter() - start, endpoint, choice.arm, served_by)
+
+
+def _collect():
+    cache = response_cache.stats()
+    return [
+        ("llm_cache_requests_total", "counter", "Response cache lookups by result", [
+            ({"result": "hit"}, cache["hits"]),
+            ({"result": "miss"}, cache["misses"]),
+        ]),
+        ("llm_cache_disk_hits_total", "counter", "Response cache hits served from the SQLite tier", [
+            ({}, cache["disk_hits"]),
+        ]),
+        ("llm_retries_total", "counter", "LLM requests retried after 429/5xx/connection errors", [({}, retry_count)]),
+        ("llm_fallbacks_total", "counter", "LLM requests moved to a fallback model", [({}, fallback_count)]),
+        ("singleflight_requests_total", "counter", "Generations started vs. coalesced onto an in-flight one", [
+            ({"result": "started"}, inflight.started),
+            ({"result": "coalesced"}, inflight.coalesced),
+        ]),
+    ]
+
+
+metrics.register_collector(_collect)
+
+
+async def prewarm():
+    """Open a connection to the Groq API (DNS + TLS) so the first completion doesn't pay for it."""
+    if isinstance(provider, providers.GroqProvider):
+        await client.models.list()
+
+
+async def aclose():
+    """Release pooled connections on shutdown."""
+    if isinstance(client, LazyClient):
+        created = client.reset()
+        if created is not None:
+            await created.close()
+    else:
+        await client.close()
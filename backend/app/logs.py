@@ -0,0 +1,30 @@
+import os
+import json
+import random
+import logging
+
+# Structured (one JSON object per line) logging. High-volume debug events are
+# sampled so they cannot flood the logs in production.
+
+logger = logging.getLogger("idea_generator")
+
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+
+
+def configure(level: str = "INFO"):
+    """
+    Print the app's events to stderr. Only this logger is configured: an INFO
+    root logger would also print httpx's line for every Groq and Supabase call.
+    """
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def log_event(event: str, level: int = logging.INFO, sample_rate: float = 1.0, **fields):
+    if sample_rate < 1.0 and random.random() >= sample_rate:
+        return
+    logger.log(level, json.dumps({"event": event, **fields}, default=str, ensure_ascii=False))
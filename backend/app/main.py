@@ -1,10 +1,41 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+
+# Module-level settings are read from the environment on import, so .env is
+# loaded once here, before the app modules; it is a local file read only
+load_dotenv()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import interview, idea, guide
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse, JSONResponse
+from .routers import interview, idea, guide, jobs
+from . import llm, metrics, clients, logs
+from .health import state, readiness
+from .jobs import job_queue
+
+try:
+    # Optional: pip install brotli-asgi
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+logs.configure(os.getenv("LOG_LEVEL", "INFO"))
+
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+
+# Server-sent event routes, which a compressor must not buffer
+STREAMING_ROUTES = [r"^/api/idea/generate-blueprint/stream$", r"^/api/idea/generate-artifacts$", r"^/api/interview/(start|continue)/stream$"]
 
-app = FastAPI()
+# Open the Groq and Supabase connections in the background after startup
+PREWARM_CONNECTIONS = os.getenv("PREWARM_CONNECTIONS", "true").lower() == "true"
 
-# Setup CORS
+# On shutdown, after uvicorn has drained in-flight requests, how long running
+# background generations get to finish before they are cancelled
+JOB_DRAIN_TIMEOUT = float(os.getenv("JOB_DRAIN_TIMEOUT", "60"))
 
 # Domains statis (localhost, domain Railway)
 origins = [
@@ -14,20 +45,96 @@ origins = [
 
 VERCEL_REGEX = r"https://.*\.vercel\.app$"
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,   
-    allow_origin_regex=VERCEL_REGEX,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include Routers
-app.include_router(interview.router, prefix="/api/interview", tags=["Interview"])
-app.include_router(idea.router, prefix="/api/idea", tags=["Idea"])
-app.include_router(guide.router, prefix="/api/guide", tags=["Guide"])
-
-@app.get("/")
-def read_root():
-    return {"status": "Backend Python is Running!", "version": "2.2"}
\ No newline at end of file
+
+async def prewarm():
+    """Create the shared clients and complete their TLS handshakes; failures only cost the first request."""
+    async def warm(name, call):
+        state.connections[name] = "pending"
+        try:
+            await call()
+            state.connections[name] = "ok"
+        except Exception as e:
+            print(f"Error pre-warming {name} connection: {e}")
+            state.connections[name] = str(e)
+
+    await asyncio.gather(
+        warm("groq", llm.prewarm),
+        warm("supabase", lambda: asyncio.to_thread(clients.prewarm_supabase)),
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await job_queue.start()
+    # Not awaited: the server accepts requests while the handshakes run
+    warmup = asyncio.ensure_future(prewarm()) if PREWARM_CONNECTIONS else None
+    state.started, state.draining = True, False
+    try:
+        yield
+    finally:
+        state.draining = True
+        if warmup is not None:
+            warmup.cancel()
+        await job_queue.stop(drain=JOB_DRAIN_TIMEOUT)
+        await guide.progress_writer.flush()
+        await llm.aclose()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(lifespan=lifespan)
+
+    # Setup CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_origin_regex=VERCEL_REGEX,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        # Retry-After comes with 503s from a rate-limited LLM
+        expose_headers=["ETag", "Retry-After"],
+    )
+
+    # Brotli when installed (falls back to gzip for clients without it), otherwise
+    # gzip; Starlette's GZipMiddleware already skips text/event-stream responses
+    if BrotliMiddleware is not None:
+        app.add_middleware(
+            BrotliMiddleware,
+            minimum_size=COMPRESS_MIN_SIZE,
+            gzip_fallback=True,
+            excluded_handlers=STREAMING_ROUTES,
+        )
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_SIZE)
+
+    # Added last so it wraps CORS and times the whole request
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    # Include Routers
+    app.include_router(interview.router, prefix="/api/interview", tags=["Interview"])
+    app.include_router(idea.router, prefix="/api/idea", tags=["Idea"])
+    app.include_router(guide.router, prefix="/api/guide", tags=["Guide"])
+    app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
+
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/")
+    def read_root():
+        return {"status": "Backend Python is Running!", "version": "2.2"}
+
+    @app.get("/health", include_in_schema=False)
+    async def read_health():
+        return {"status": "ok"}
+
+    @app.get("/ready", include_in_schema=False)
+    async def read_ready():
+        ready, report = readiness(job_queue, llm.provider)
+        return JSONResponse(report, status_code=200 if ready else 503)
+
+    return app
+
+
+# `uvicorn app.main:app`; `uvicorn --factory app.main:create_app` builds a fresh one
+app = create_app()
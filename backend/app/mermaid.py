@@ -0,0 +1,354 @@
+import re
+from typing import NamedTuple, Optional
+from . import metrics
+
+# Validator and repairer for the Mermaid flowchart subset the idea.flowchart
+# prompt asks for: a `graph TD` header, nodes with the listed shapes, `-->`
+# edges with `|labels|`, plus subgraph/end and styling lines passed through.
+# Every line is tokenized once, left to right, and rebuilt in canonical form;
+# whatever can be fixed locally (brackets, labels, ids, arrows) is, and each
+# fix or remaining problem is reported as a Diagnostic with its line number.
+
+mermaid_diagnostics = metrics.register(metrics.Counter(
+    "flowchart_diagnostics_total", "Mermaid repairer findings by code", ("code", "repaired")
+))
+flowchart_reprompts = metrics.register(metrics.Counter(
+    "flowchart_reprompts_total", "Flowchart outputs the repairer could not fix and sent back to the model"
+))
+
+
+class Diagnostic(NamedTuple):
+    line: int  # 1-based line of the model output
+    code: str
+    message: str
+    repaired: bool
+
+
+class MermaidResult(NamedTuple):
+    code: str
+    diagnostics: list
+    nodes: int
+    edges: int
+
+    @property
+    def errors(self) -> list:
+        return [d for d in self.diagnostics if not d.repaired]
+
+    @property
+    def ok(self) -> bool:
+        """True when the chart parses: nothing was dropped and there is at least one node."""
+        return not self.errors and self.nodes > 0
+
+
+HEADER = re.compile(r"\s*(graph|flowchart)\s+(TD|TB|BT|LR|RL)\b\s*;?\s*$", re.IGNORECASE)
+HEADER_ONLY = re.compile(r"\s*(graph|flowchart)\s*;?\s*$", re.IGNORECASE)
+PASSTHROUGH = re.compile(r"(?:classDef|class|style|linkStyle|click|direction)\b|%%")
+SUBGRAPH = re.compile(r"subgraph\b")
+END = re.compile(r"end\s*;?\s*$")
+NODE_ID = re.compile(r"\w+(?:[ \t]+\w+)*")
+CLASS_SUFFIX = re.compile(r":::[\w-]+")
+# Edge label written between dashes: A -- text --> B
+INLINE_LABEL = re.compile(r"--[ \t]+([^|>\-][^>]*?)[ \t]*-->")
+ARROW = re.compile(r"<?(?:-{2,}>+|={2,}>+|-\.+->+|-{3,}|={3,}|-\.+-|->+|--(?=[ \t]*\|))")
+ARROW_AHEAD = re.compile(r"[ \t]*(?:<?-{2,}|={2,}|-\.)")
+
+# Opener -> (canonical opener, closer), longest first. {( and ({ are a
+# common mix-up for the hexagon.
+SHAPES = [
+    ("((", "((", "))"), ("([", "([", "])"), ("[(", "[(", ")]"), ("[[", "[[", "]]"),
+    ("{{", "{{", "}}"), ("{(", "{{", "}}"), ("({", "{{", "}}"),
+    ("[", "[", "]"), ("(", "(", ")"), ("{", "{", "}"), (">", ">", "]"),
+]
+CLOSERS = ")]}"
+# Text with these characters must be quoted or Mermaid reads them as syntax
+UNSAFE_TEXT = set('()[]{}|";')
+RESERVED_IDS = {"end": "End"}
+
+
+def _canonical_arrow(arrow: str) -> str:
+    head = "<" if arrow.startswith("<") else ""
+    body = arrow[len(head):]
+    if body.startswith("="):
+        return head + ("==>" if body.endswith(">") else "===")
+    if "." in body:
+        return head + ("-.->" if body.endswith(">") else "-.-")
+    if body.endswith(">") or body == "--":
+        return head + "-->"
+    return head + "---"
+
+
+def _text(text: str) -> str:
+    text = " ".join(text.split())
+    if text.startswith('"') and text.endswith('"') and len(text) >= 2:
+        text = text[1:-1]
+    elif not UNSAFE_TEXT.intersection(text):
+        return text
+    return '"' + text.replace('"', "#quot;") + '"'
+
+
+class _Line:
+    """Scanner over one statement line."""
+
+    def __init__(self, text: str, number: int, diagnostics: list):
+        self.s = text
+        self.pos = 0
+        self.number = number
+        self.diagnostics = diagnostics
+        self.node_ids = set()
+        self.edges = 0
+
+    def note(self, code: str, message: str, repaired: bool = True):
+        self.diagnostics.append(Diagnostic(self.number, code, message, repaired))
+
+    def skip_space(self):
+        while self.pos < len(self.s) and self.s[self.pos] in " \t":
+            self.pos += 1
+
+    def node(self) -> Optional[str]:
+        match = NODE_ID.match(self.s, self.pos)
+        if match is None:
+            return None
+        words = match.group(0).split()
+        node_id = "_".join(words)
+        if len(words) > 1:
+            self.note("id_spaces", f"node id '{match.group(0)}' written as {node_id}")
+        if node_id in RESERVED_IDS:
+            self.note("reserved_id", f"node id '{node_id}' renamed to {RESERVED_IDS[node_id]}")
+            node_id = RESERVED_IDS[node_id]
+        self.pos = match.end()
+        self.node_ids.add(node_id)
+
+        for opener, canonical, closer in SHAPES:
+            if self.s.startswith(opener, self.pos):
+                break
+        else:
+            return node_id + self.class_suffix()
+
+        self.pos += len(opener)
+        if opener != canonical:
+            self.note("shape_mismatch", f"'{opener}' in node {node_id} read as '{canonical}'")
+        text = self.shape_text()
+
+        run = ""
+        while len(run) < len(closer) and self.pos < len(self.s) and self.s[self.pos] in CLOSERS:
+            run += self.s[self.pos]
+            self.pos += 1
+        if run != closer:
+            if run:
+                self.note("shape_mismatch", f"node {node_id} closed with '{run}', expected '{closer}'")
+            else:
+                self.note("unclosed_shape", f"node {node_id} was not closed, added '{closer}'")
+        if not text.strip():
+            self.note("empty_text", f"node {node_id} has no text, using its id")
+            text = node_id
+        return node_id + canonical + self.text(text) + closer + self.class_suffix()
+
+    def shape_text(self) -> str:
+        s = self.s
+        self.skip_space()
+        if self.pos < len(s) and s[self.pos] == '"':
+            end = s.find('"', self.pos + 1)
+            if end != -1:
+                text = s[self.pos:end + 1]
+                self.pos = end + 1
+                self.skip_space()
+                return text
+        start = self.pos
+        depth = 0
+        while self.pos < len(s):
+            ch = s[self.pos]
+            if ch in "([{":
+                depth += 1
+            elif ch in CLOSERS:
+                if depth == 0:
+                    break
+                depth -= 1
+            elif depth == 0 and ch in " \t-=" and ARROW_AHEAD.match(s, self.pos):
+                # An edge starts inside the text: the shape was never closed
+                break
+            self.pos += 1
+        return s[start:self.pos]
+
+    def text(self, raw: str) -> str:
+        text = _text(raw)
+        if text.startswith('"') and not raw.strip().startswith('"'):
+            self.note("quoted_text", f"quoted {text} so its brackets are read as text")
+        return text
+
+    def class_suffix(self) -> str:
+        match = CLASS_SUFFIX.match(self.s, self.pos)
+        if match is None:
+            return ""
+        self.pos = match.end()
+        return match.group(0)
+
+    def link(self) -> Optional[str]:
+        s = self.s
+        match = INLINE_LABEL.match(s, self.pos)
+        if match is not None:
+            self.pos = match.end()
+            self.note("inline_label", "edge label moved into |pipes|")
+            return "-->|" + self.text(match.group(1)) + "|"
+
+        match = ARROW.match(s, self.pos)
+        if match is None:
+            return None
+        arrow = _canonical_arrow(match.group(0))
+        if arrow != match.group(0):
+            self.note("arrow", f"arrow '{match.group(0)}' written as '{arrow}'")
+        self.pos = match.end()
+        self.skip_space()
+        if self.pos >= len(s) or s[self.pos] != "|":
+            return arrow
+
+        end = s.find("|", self.pos + 1)
+        if end == -1:
+            self.note("unclosed_label", "edge label has no closing '|'", repaired=False)
+            return None
+        raw = s[self.pos + 1:end]
+        self.pos = end + 1
+        if raw != raw.strip():
+            self.note("label_spaces", "spaces inside the edge label pipes removed")
+        if self.pos < len(s) and s[self.pos] == ">":
+            self.pos += 1
+            self.note("label_arrow", "'|>' after the edge label written as '|'")
+        label = self.text(raw)
+        if not label:
+            return arrow
+        return arrow + "|" + label + "|"
+
+    def statements(self) -> list:
+        """Parse `node (link node)*` statements separated by ';'; returns canonical lines."""
+        lines = []
+        parts = []
+        expect_node = True
+        while True:
+            self.skip_space()
+            if self.pos >= len(self.s):
+                break
+            ch = self.s[self.pos]
+            if expect_node:
+                node = self.node()
+                if node is None:
+                    self.note("expected_node", f"expected a node at column {self.pos + 1}", repaired=False)
+                    break
+                parts.append(node)
+                expect_node = False
+            elif ch == ";":
+                self.pos += 1
+                lines.append(" ".join(parts))
+                parts = []
+                expect_node = True
+            elif ch == "&":
+                self.pos += 1
+                parts.append("&")
+                expect_node = True
+            elif ch in CLOSERS:
+                self.pos += 1
+                self.note("stray_bracket", f"stray '{ch}' removed")
+            else:
+                link = self.link()
+                if link is None:
+                    if not self.diagnostics or self.diagnostics[-1].code != "unclosed_label":
+                        self.note("unexpected_text", f"cannot read '{self.s[self.pos:].strip()}'", repaired=False)
+                    break
+                parts.append(link)
+                self.edges += 1
+                expect_node = True
+
+        if parts and expect_node:
+            # Statement ends in an edge or '&' without a target
+            self.note("dangling_edge", "edge without a target dropped", repaired=False)
+            if parts[-1] != "&":
+                self.edges -= 1
+            parts.pop()
+        if parts:
+            lines.append(" ".join(parts))
+        return lines
+
+
+def _is_prose(line: str) -> bool:
+    """Several bare words with no shape and no edge: a sentence, not a statement."""
+    if any(ch in line for ch in "[](){}|;&") or ARROW.search(line) or INLINE_LABEL.search(line):
+        return False
+    return len(line.split()) > 2
+
+
+def repair(output: str) -> MermaidResult:
+    """Validate and repair a model's flowchart; returns canonical code plus diagnostics."""
+    diagnostics = []
+    node_ids = set()
+    edges = 0
+    lines = []
+    header = None
+    depth = 0
+
+    for number, raw in enumerate(output.splitlines(), start=1):
+        stripped = raw.strip()
+        if not stripped or stripped.startswith("```"):
+            continue
+
+        if header is None:
+            match = HEADER.match(stripped)
+            if match is not None:
+                header = f"{match.group(1).lower()} {match.group(2).upper()}"
+                continue
+            if HEADER_ONLY.match(stripped):
+                header = "graph TD"
+                diagnostics.append(Diagnostic(number, "header", "header without direction, using graph TD", True))
+                continue
+            if _is_prose(stripped):
+                diagnostics.append(Diagnostic(number, "leading_text", "text before the chart removed", True))
+                continue
+            header = "graph TD"
+            diagnostics.append(Diagnostic(number, "missing_header", "added 'graph TD'", True))
+
+        indent = "    " * (depth + 1)
+        if SUBGRAPH.match(stripped):
+            lines.append(indent + stripped.rstrip(";"))
+            depth += 1
+        elif END.match(stripped):
+            if depth == 0:
+                diagnostics.append(Diagnostic(number, "unmatched_end", "'end' without a subgraph removed", True))
+                continue
+            depth -= 1
+            lines.append("    " * (depth + 1) + "end")
+        elif PASSTHROUGH.match(stripped):
+            lines.append(indent + stripped)
+        elif HEADER.match(stripped):
+            diagnostics.append(Diagnostic(number, "duplicate_header", "second header removed", True))
+        elif _is_prose(stripped):
+            # Checked before tokenizing: NODE_ID would read the words as one spaced node id
+            diagnostics.append(Diagnostic(number, "trailing_text", "text that is not part of the chart removed", True))
+        else:
+            found = []
+            scanner = _Line(stripped, number, found)
+            statements = scanner.statements()
+            diagnostics.extend(found)
+            node_ids |= scanner.node_ids
+            edges += scanner.edges
+            lines.extend(indent + statement for statement in statements)
+
+    if depth:
+        diagnostics.append(Diagnostic(0, "unclosed_subgraph", f"closed {depth} open subgraph(s)", True))
+        lines.extend("    " * level + "end" for level in range(depth, 0, -1))
+
+    code = "\n".join([header or "graph TD"] + lines)
+    return MermaidResult(code, diagnostics, len(node_ids), edges)
+
+
+def record(result: MermaidResult):
+    for diagnostic in result.diagnostics:
+        mermaid_diagnostics.inc(diagnostic.code, "true" if diagnostic.repaired else "false")
+
+
+def problem_list(output: str, result: MermaidResult) -> str:
+    """The unrecoverable lines with their problems, for a targeted re-prompt."""
+    lines = output.splitlines()
+    problems = []
+    for diagnostic in result.errors:
+        source = lines[diagnostic.line - 1].strip() if 0 < diagnostic.line <= len(lines) else ""
+        problems.append(f"- line {diagnostic.line}: {source}\n  problem: {diagnostic.message}")
+    if result.nodes == 0:
+        problems.append("- the chart has no nodes")
+    return "\n".join(problems)
@@ -0,0 +1,190 @@
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# In-process metrics in the Prometheus text exposition format, served on
+# GET /metrics. Stage spans are labelled with the route template of the
+# request that produced them (set by MetricsMiddleware).
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_request_scope = ContextVar("request_scope", default=None)
+
+
+def current_route() -> str:
+    scope = _request_scope.get()
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    # Unmatched paths are not used as labels to keep cardinality bounded
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        for label_values, (counts, total, count) in sorted(self._series.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_format_labels(names, label_values + (bound,))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_format_labels(names, label_values + ('+Inf',))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {count}")
+        return lines
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("route", "method", "status")
+)
+stage_duration = Histogram(
+    "stage_duration_seconds",
+    "Latency of one processing stage (prompt build, LLM, parse, repair, DB) by route",
+    ("route", "stage"),
+)
+llm_tokens = Counter("llm_tokens_total", "Tokens reported by the LLM provider", ("endpoint", "model", "kind"))
+
+_metrics = [http_request_duration, stage_duration, llm_tokens]
+_collectors = []
+
+
+def register(metric):
+    """Expose a Counter/Histogram defined outside this module on /metrics."""
+    _metrics.append(metric)
+    return metric
+
+
+def register_collector(collect):
+    """`collect()` returns [(name, type, help, [(labels_dict, value), ...]), ...] at scrape time."""
+    _collectors.append(collect)
+
+
+def observe_stage(stage: str, seconds: float):
+    stage_duration.observe(seconds, current_route(), stage)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block of work as one stage of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def record_usage(endpoint: str, model: str, usage):
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, kind, None)
+        if value:
+            llm_tokens.inc(endpoint or "unknown", model, kind.replace("_tokens", ""), amount=value)
+
+
+def render() -> str:
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        for name, kind, help_text, samples in collect():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class RequestCounts:
+    def __init__(self):
+        self.in_flight = 0
+        self.total = 0
+
+
+# HTTP requests of this worker process, for /ready and the in-flight gauge
+requests = RequestCounts()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _request_scope.set(scope)
+        status = {"code": 500}
+        requests.in_flight += 1
+        requests.total += 1
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            requests.in_flight -= 1
+            http_request_duration.observe(
+                time.perf_counter() - start, current_route(), scope.get("method", ""), str(status["code"])
+            )
+            _request_scope.reset(token)
+
+
+register_collector(lambda: [
+    ("http_requests_in_flight", "gauge", "HTTP requests being handled by this worker", [({}, requests.in_flight)]),
+])
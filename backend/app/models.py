@@ -51,6 +51,15 @@ class BlueprintResponse(BaseModel):
 class GenerateDatabaseSchemaRequest(BaseModel):
     projectId: str
     projectContext: str
+    bypassCache: bool = False # Force a fresh generation instead of the cached one
+
+class GenerateArtifactsRequest(BaseModel):
+    projectId: str
+    projectContext: str # Schema and flowchart input
+    workbenchContent: Optional[str] = None # Guide input, defaults to projectContext
+    artifacts: List[str] = ["schema", "flowchart", "guide"]
+    bypassCache: bool = False
+    incremental: bool = False # Regenerate only the guide categories whose sections changed
 
 class EditorCompletionRequest(BaseModel):
     context: str
@@ -65,6 +74,13 @@ class TaskProgressRequest(BaseModel):
     projectId: str
     isCompleted: bool
 
+class TaskProgressUpdate(BaseModel):
+    taskId: str
+    isCompleted: bool
+
+class TaskProgressBatchRequest(BaseModel):
+    updates: List[TaskProgressUpdate]
+
 class TaskContentBlockResponse(BaseModel):
     id: str
     type: str  # 'text', 'code', 'terminal', 'tip'
@@ -0,0 +1,234 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from . import metrics
+from .metrics import span
+from .guide_store import guide_cache
+
+# Task progress writes. Checking off a checklist sends bursts of toggles, so
+# the task -> project -> owner lookups are cached and the upserts are
+# write-behind: toggles wait in a buffer for FLUSH_WINDOW seconds, repeated
+# toggles of the same task collapse into the last one, and everything pending
+# is written with one bulk upsert per project. Reads of a project's guide in
+# this process flush its pending toggles first, so users see their own writes.
+# That holds per process: with several workers, a sibling keeps serving its
+# cached copy of the guide for up to GUIDE_CACHE_TTL (5s by default) after
+# the toggle. The Supabase calls run in a thread, off the event loop.
+
+FLUSH_WINDOW = float(os.getenv("PROGRESS_FLUSH_WINDOW", "0.25"))
+# Flush attempts per toggle before it is dropped
+MAX_ATTEMPTS = int(os.getenv("PROGRESS_MAX_ATTEMPTS", "3"))
+
+
+def progress_row(task_id: str, project_id: str, user_id: str, is_completed: bool) -> dict:
+    current_time = datetime.utcnow().isoformat()
+    return {
+        "user_id": user_id,
+        "task_id": task_id,
+        "project_id": project_id,
+        "is_completed": is_completed,
+        "updated_at": current_time,
+        "completed_at": current_time if is_completed else None
+    }
+
+
+class _TTLMap:
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def drop(self, predicate):
+        for key in [key for key, (_, value) in self._entries.items() if predicate(key, value)]:
+            del self._entries[key]
+
+
+class TaskOwnerCache:
+    """
+    Cached task -> project and project -> owner lookups. Tasks never move
+    between projects, but a regenerated guide deletes them, so forget_project()
+    is called whenever a project's tasks are replaced.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.projects = _TTLMap(ttl, max_entries)
+        self.owners = _TTLMap(ttl, max_entries)
+        self.hits = 0
+        self.misses = 0
+
+    async def resolve(self, db, task_ids: list) -> dict:
+        """task id -> (project_id, user_id) for the tasks that exist; one query for all uncached tasks."""
+        resolved = {}
+        missing = []
+        for task_id in dict.fromkeys(task_ids):
+            project_id = self.projects.get(task_id)
+            if project_id is None:
+                missing.append(task_id)
+            else:
+                resolved[task_id] = project_id
+        self.hits += len(resolved)
+        self.misses += len(missing)
+
+        if missing:
+            with span("db.task_lookup"):
+                result = await asyncio.to_thread(db.table("tasks").select("id, project_id").in_("id", missing).execute)
+            for row in result.data or []:
+                self.projects.set(row["id"], row["project_id"])
+                resolved[row["id"]] = row["project_id"]
+
+        owners = {project_id: await self.owner(db, project_id) for project_id in set(resolved.values())}
+        return {task_id: (project_id, owners[project_id]) for task_id, project_id in resolved.items()}
+
+    async def owner(self, db, project_id: str) -> str:
+        user_id = self.owners.get(project_id)
+        if user_id is not None:
+            return user_id
+        try:
+            with span("db.project_owner"):
+                result = await asyncio.to_thread(db.rpc("get_project_owner", {"p_id": project_id}).execute)
+            # Fallback: use project_id as pseudo user_id (for testing only)
+            user_id = result.data or project_id
+        except Exception as e:
+            # If the RPC doesn't exist, use project_id as fallback
+            print(f"get_project_owner unavailable: {e}")
+            user_id = project_id
+        self.owners.set(project_id, user_id)
+        return user_id
+
+    def forget_project(self, project_id: str):
+        self.projects.drop(lambda task_id, owner_project: owner_project == project_id)
+
+
+class ProgressWriter:
+    """Write-behind buffer of task_progress rows, keyed by task (last toggle wins)."""
+
+    def __init__(self, db, window: float, max_attempts: int):
+        self._db = db
+        self.window = window
+        self.max_attempts = max_attempts
+        self._pending = {}
+        self._timer = None
+        # Projects whose rows are being written right now; flush() holds the lock meanwhile
+        self._writing = set()
+        self._lock = asyncio.Lock()
+        # Timer-started flushes, referenced until they finish
+        self._background = set()
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+
+    def submit(self, rows: list):
+        for row in rows:
+            self._pending[row["task_id"]] = (row, 0)
+        self.submitted += len(rows)
+        self._schedule()
+
+    def has_pending(self, project_id: str) -> bool:
+        """Whether the project has toggles not yet in the database, buffered or being written."""
+        return project_id in self._writing or any(row["project_id"] == project_id for row, _ in self._pending.values())
+
+    def _schedule(self):
+        if self._timer is None and self._pending:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.window, self._flush_later)
+
+    def _flush_later(self):
+        self._timer = None
+        task = asyncio.ensure_future(self.flush())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def flush(self):
+        """
+        Write everything pending. Waits for a flush already in progress first,
+        so on return every toggle submitted before the call is written (or
+        queued for retry). Failed rows are retried on the next window unless a
+        newer toggle replaced them.
+        """
+        async with self._lock:
+            await self._flush()
+
+    async def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+
+        by_project = {}
+        for task_id, (row, attempts) in batch.items():
+            by_project.setdefault(row["project_id"], []).append((row, attempts))
+        self._writing = set(by_project)
+
+        try:
+            # One upsert per project, so a task deleted by a regeneration only fails its own project
+            for project_id, entries in by_project.items():
+                rows = [row for row, _ in entries]
+                try:
+                    with span("db.upsert_progress"):
+                        await asyncio.to_thread(self._db().table("task_progress").upsert(rows, on_conflict="task_id").execute)
+                except Exception as e:
+                    self._writing.discard(project_id)
+                    print(f"Error writing task progress for project {project_id}: {e}")
+                    for row, attempts in entries:
+                        if row["task_id"] in self._pending:
+                            continue
+                        if attempts + 1 < self.max_attempts:
+                            self._pending[row["task_id"]] = (row, attempts + 1)
+                        else:
+                            self.dropped += 1
+                    continue
+                self._writing.discard(project_id)
+                self.written += len(rows)
+                guide_cache.invalidate(project_id)
+        finally:
+            self._writing = set()
+
+        self._schedule()
+
+
+task_owners = TaskOwnerCache(
+    ttl=float(os.getenv("TASK_OWNER_CACHE_TTL", "600")),
+    max_entries=int(os.getenv("TASK_OWNER_CACHE_MAX_ENTRIES", "10000")),
+)
+
+
+def _collect(writer: ProgressWriter):
+    return [
+        ("progress_toggles_total", "counter", "Task progress toggles by outcome", [
+            ({"result": "submitted"}, writer.submitted),
+            ({"result": "written"}, writer.written),
+            ({"result": "dropped"}, writer.dropped),
+        ]),
+        ("task_owner_cache_requests_total", "counter", "Task -> project lookups by result", [
+            ({"result": "hit"}, task_owners.hits),
+            ({"result": "miss"}, task_owners.misses),
+        ]),
+    ]
+
+
+def create_progress_writer(db, window: float = FLUSH_WINDOW, max_attempts: int = MAX_ATTEMPTS) -> ProgressWriter:
+    """Create the writer for `db` (a callable returning the Supabase client) and export its counters."""
+    writer = ProgressWriter(db, window, max_attempts)
+    metrics.register_collector(lambda: _collect(writer))
+    return writer
@@ -0,0 +1,221 @@
+import os
+import json
+import math
+import time
+import random
+import asyncio
+from types import SimpleNamespace
+from typing import Optional
+from . import synthetic
+from .cache import cache_key
+from .logs import log_event
+
+# Where completions come from. MOCK_AI_RESPONSES selects the provider:
+#   unset/false          live Groq API
+#   record               live Groq API, every completion saved as a fixture
+#   replay               fixtures only, keyed by prompt hash (no network)
+#   true/synthetic       canned schema-valid JSON per endpoint (no network)
+# Offline providers sleep according to MOCK_AI_LATENCY so load tests see
+# realistic timing:
+#   0 (default)          no delay
+#   recorded             the latency captured in the fixture (replay only)
+#   fixed:S              S seconds
+#   uniform:LO,HI        uniform between LO and HI seconds
+#   normal:MU,SIGMA      normal, clipped at 0
+#   lognormal:MEDIAN,SIGMA
+# Note the per-model rate limiter still applies; set LLM_RPM=0 for load tests.
+FIXTURES_DIR = os.getenv("LLM_FIXTURES_DIR", "fixtures/llm")
+LATENCY_SPEC = os.getenv("MOCK_AI_LATENCY", "0")
+# Share of the latency spent before the first streamed token
+TTFB_FRACTION = float(os.getenv("MOCK_AI_TTFB_FRACTION", "0.2"))
+# Replay misses answer synthetically instead of failing when enabled
+REPLAY_FALLBACK = os.getenv("MOCK_AI_REPLAY_FALLBACK", "false") == "true"
+
+STREAM_CHUNK_CHARS = 64
+
+
+class FixtureNotFoundError(Exception):
+    """Raised in replay mode when no fixture was recorded for a prompt."""
+
+
+class LatencyModel:
+    """Samples per-completion latency from a MOCK_AI_LATENCY spec."""
+
+    def __init__(self, spec: str):
+        self.spec = spec.strip() or "0"
+        kind, _, args = self.spec.partition(":")
+        self.kind = kind
+        self.args = [float(a) for a in args.split(",") if a]
+        if kind not in ("0", "recorded", "fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown MOCK_AI_LATENCY spec: {spec}")
+
+    def sample(self, recorded: Optional[float] = None) -> float:
+        if self.kind == "recorded":
+            return recorded or 0.0
+        if self.kind == "fixed":
+            return self.args[0]
+        if self.kind == "uniform":
+            return random.uniform(self.args[0], self.args[1])
+        if self.kind == "normal":
+            return max(0.0, random.gauss(self.args[0], self.args[1]))
+        if self.kind == "lognormal":
+            return random.lognormvariate(math.log(self.args[0]), self.args[1])
+        return 0.0
+
+
+def fixture_key(endpoint: str, model: str, messages: list) -> str:
+    # Generation parameters are left out so streamed and non-streamed calls
+    # of the same prompt share one fixture
+    return cache_key(endpoint, model, messages)
+
+
+def _completion(content: str, usage: Optional[dict]):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(**usage) if usage else None,
+    )
+
+
+async def _stream(content: str, usage: Optional[dict], latency: float, ttfb: Optional[float] = None):
+    """Yield Groq-shaped stream chunks spread over `latency` seconds."""
+    pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)] or [""]
+    ttfb = latency * TTFB_FRACTION if ttfb is None else min(ttfb, latency)
+    gap = (latency - ttfb) / len(pieces)
+    await asyncio.sleep(ttfb)
+    for idx, piece in enumerate(pieces):
+        if idx:
+            await asyncio.sleep(gap)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], x_groq=None)
+    x_groq = SimpleNamespace(usage=SimpleNamespace(**usage)) if usage else None
+    yield SimpleNamespace(choices=[], x_groq=x_groq)
+
+
+def _usage_dict(usage) -> Optional[dict]:
+    if usage is None:
+        return None
+    return {
+        key: getattr(usage, key, None)
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens")
+    }
+
+
+class GroqProvider:
+    """The live API. `create` is the Groq client's chat.completions.create."""
+
+    def __init__(self, create):
+        self._create = create
+
+    async def create(self, endpoint: str, messages: list, model: str, **kwargs):
+        return await self._create(messages=messages, model=model, **kwargs)
+
+
+class RecordingProvider(GroqProvider):
+    """Calls the live API and writes every successful completion to a fixture file."""
+
+    def __init__(self, create, fixtures_dir: str):
+        super().__init__(create)
+        self.fixtures_dir = fixtures_dir
+
+    def _save(self, endpoint: str, model: str, messages: list, content: str, usage, ttfb, latency: float):
+        directory = os.path.join(self.fixtures_dir, endpoint or "default")
+        os.makedirs(directory, exist_ok=True)
+        fixture = {
+            "endpoint": endpoint,
+            "model": model,
+            "messages": messages,
+            "content": content,
+            "usage": _usage_dict(usage),
+            "ttfb": ttfb,
+            "latency": latency,
+        }
+        path = os.path.join(directory, fixture_key(endpoint, model, messages) + ".json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(fixture, f, ensure_ascii=False, indent=2)
+
+    async def create(self, endpoint: str, messages: list, model: str, **kwargs):
+        start = time.perf_counter()
+        result = await self._create(messages=messages, model=model, **kwargs)
+        if not kwargs.get("stream"):
+            content = result.choices[0].message.content
+            self._save(endpoint, model, messages, content, result.usage, None, time.perf_counter() - start)
+            return result
+        return self._record_stream(endpoint, model, messages, result, start)
+
+    async def _record_stream(self, endpoint, model, messages, stream, start):
+        parts = []
+        ttfb = None
+        usage = None
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if ttfb is None:
+                    ttfb = time.perf_counter() - start
+                parts.append(chunk.choices[0].delta.content)
+            usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+            yield chunk
+        self._save(endpoint, model, messages, "".join(parts), usage, ttfb, time.perf_counter() - start)
+
+
+class SyntheticProvider:
+    """Answers every endpoint with canned schema-valid output."""
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+
+    async def create(self, endpoint: str, messages: list, model: str, **kwargs):
+        content = synthetic.completion_for(endpoint, messages)
+        delay = self.latency.sample()
+        if kwargs.get("stream"):
+            return _stream(content, None, delay)
+        await asyncio.sleep(delay)
+        return _completion(content, None)
+
+
+class ReplayProvider:
+    """Serves recorded fixtures by prompt hash; never touches the network."""
+
+    def __init__(self, fixtures_dir: str, latency: LatencyModel, fallback: Optional[SyntheticProvider] = None):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.fallback = fallback
+        self._fixtures = {}
+
+    def _load(self, endpoint: str, model: str, messages: list) -> Optional[dict]:
+        key = fixture_key(endpoint, model, messages)
+        if key not in self._fixtures:
+            path = os.path.join(self.fixtures_dir, endpoint or "default", key + ".json")
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._fixtures[key] = json.load(f)
+            except FileNotFoundError:
+                return None
+        return self._fixtures[key]
+
+    async def create(self, endpoint: str, messages: list, model: str, **kwargs):
+        fixture = self._load(endpoint, model, messages)
+        if fixture is None:
+            if self.fallback is None:
+                raise FixtureNotFoundError(f"No recorded completion for {endpoint} ({model})")
+            log_event("llm.replay_miss", endpoint=endpoint, model=model)
+            return await self.fallback.create(endpoint, messages, model, **kwargs)
+
+        delay = self.latency.sample(fixture.get("latency"))
+        if kwargs.get("stream"):
+            ttfb = fixture.get("ttfb") if self.latency.kind == "recorded" else None
+            return _stream(fixture["content"], fixture.get("usage"), delay, ttfb)
+        await asyncio.sleep(delay)
+        return _completion(fixture["content"], fixture.get("usage"))
+
+
+def from_env(create):
+    """Build the provider selected by MOCK_AI_RESPONSES around the live `create` callable."""
+    mode = os.getenv("MOCK_AI_RESPONSES", "false").lower()
+    if mode in ("", "false"):
+        return GroqProvider(create)
+    if mode == "record":
+        return RecordingProvider(create, FIXTURES_DIR)
+    latency = LatencyModel(LATENCY_SPEC)
+    if mode in ("true", "synthetic"):
+        return SyntheticProvider(latency)
+    if mode == "replay":
+        return ReplayProvider(FIXTURES_DIR, latency, SyntheticProvider(latency) if REPLAY_FALLBACK else None)
+    raise ValueError(f"Unknown MOCK_AI_RESPONSES mode: {mode}")
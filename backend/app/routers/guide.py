@@ -1,295 +1,400 @@
 import os
-import json
-from groq import Groq
-from fastapi import APIRouter, HTTPException
-from ..models import GenerateGuideRequest, TaskProgressRequest, GuideResponse
-from dotenv import load_dotenv
-from supabase import create_client, Client
+import asyncio
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import JSONResponse
+from .. import llm, prompts, fastjson, routing
+from ..errors import http_error
+from ..jobs import job_queue, no_progress
+from ..fastjson import FastJSONResponse
+from ..http_cache import weak_etag, etag_matches, cache_headers, not_modified
+from ..metrics import span
+from ..models import GenerateGuideRequest, TaskProgressRequest, TaskProgressBatchRequest, GuideResponse
+from ..singleflight import inflight, flight_key, KeyedLock
+from ..progress import create_progress_writer, progress_row, task_owners
+from ..guide_store import GuideWriter, fetch_guide, fetch_guide_version, guide_cache, load_section_hashes, save_section_hashes
+from ..sections import split_sections, section_hashes, resolve_sources, plan_update
+from ..streaming import JsonObjectStream
+from ..clients import supabase
 from typing import Optional
 
-load_dotenv()
-
 router = APIRouter()
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-model_llm = "llama-3.3-70b-versatile"
+CATEGORY_CONCURRENCY = int(os.getenv("GUIDE_CATEGORY_CONCURRENCY", "4"))
+
+guide_write_lock = KeyedLock()
 
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(supabase_url, supabase_key)
+progress_writer = create_progress_writer(lambda: supabase)
 
 
-@router.post("/generate/{project_id}")
-async def generate_guide(project_id: str, request: GenerateGuideRequest):
+@router.post("/generate/{project_id}", response_class=FastJSONResponse)
+async def generate_guide(
+    project_id: str,
+    request: GenerateGuideRequest,
+    background: bool = False,
+    incremental: bool = False
+):
     """
     Generate implementation guide from workbench content using AI.
     Parses Task Breakdown and generates step-by-step code snippets.
+    Concurrent duplicate requests share one generation.
+    With ?background=true the guide is generated as a job; poll /api/jobs/{jobId}.
+    With ?incremental=true only categories whose blueprint sections changed are regenerated.
     """
-    try:
-        # First, check if guide already exists
-        existing = supabase.table("task_categories").select("id").eq("project_id", project_id).execute()
-        if existing.data and len(existing.data) > 0:
-            # Delete existing guide data to regenerate
-            supabase.table("task_categories").delete().eq("project_id", project_id).execute()
-
-        prompt = f"""You are an expert coding mentor. Analyze this project blueprint and create a detailed implementation guide with code snippets.
-
-PROJECT BLUEPRINT:
-{request.workbenchContent}
-
-TASK:
-1. Extract or infer task categories (e.g., "Project Setup", "Frontend", "Backend", "Database", "Authentication", "Deployment")
-2. For each category, create 3-7 specific implementation tasks
-3. For each task, provide step-by-step guidance with actual code snippets
-
-OUTPUT FORMAT (JSON):
-{{
-  "categories": [
-    {{
-      "name": "Category Name",
-      "icon": "rocket",  // lucide icon name: rocket, code, database, shield, cloud, etc.
-      "tasks": [
-        {{
-          "title": "Task Title",
-          "description": "Brief description of what this task accomplishes",
-          "estimated_time": "10 min",
-          "content_blocks": [
-            {{
-              "type": "text",
-              "content": "Explanation of what to do"
-            }},
-            {{
-              "type": "terminal",
-              "content": "npm install package-name"
-            }},
-            {{
-              "type": "code",
-              "language": "typescript",
-              "filename": "src/example.ts",
-              "content": "// Code snippet here\\nconst example = 'code';"
-            }},
-            {{
-              "type": "tip",
-              "content": "💡 Pro tip or warning here"
-            }}
-          ]
-        }}
-      ]
-    }}
-  ]
-}}
-
-RULES:
-- Generate realistic, working code snippets based on the tech stack mentioned
-- Include terminal commands for installations
-- Add helpful tips and warnings
-- Each task should have 2-6 content blocks
-- Use proper escaping for code strings
-- Match the language/style of the original content (English or Indonesian)
-"""
-
-        chat_completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model=model_llm,
-            temperature=0.7,
-            max_completion_tokens=8000,
-            response_format={"type": "json_object"}
+    if background:
+        job_id = job_queue.submit("guide.generate", {
+            "project_id": project_id,
+            "workbenchContent": request.workbenchContent,
+            "incremental": incremental
+        })
+        return JSONResponse(status_code=202, content={"jobId": job_id, "status": "queued"})
+
+    return FastJSONResponse(await generate_or_update_guide(project_id, request, incremental))
+
+
+async def _run_guide_job(payload: dict, report):
+    request = GenerateGuideRequest(workbenchContent=payload["workbenchContent"])
+    return await generate_or_update_guide(payload["project_id"], request, payload.get("incremental", False), report)
+
+async def generate_or_update_guide(project_id: str, request: GenerateGuideRequest, incremental: bool, report=no_progress):
+    """Used by the endpoint, guide jobs and /api/idea/generate-artifacts; duplicate calls share one generation."""
+    if incremental:
+        key = flight_key("guide.update", project_id, request.workbenchContent)
+        return await inflight.do(key, lambda: _update_guide(project_id, request, report))
+    key = flight_key("guide.generate", project_id, request.workbenchContent)
+    return await inflight.do(key, lambda: _generate_guide(project_id, request, report))
+
+job_queue.register("guide.generate", _run_guide_job)
+
+
+def build_outline_prompt(workbench_content: str) -> str:
+    return prompts.render("guide.outline", workbench_content=workbench_content)
+
+
+def build_category_prompt(workbench_content: str, category: dict) -> str:
+    task_list = "\n".join(
+        f"{idx + 1}. {task['title']} - {task.get('description', '')}"
+        for idx, task in enumerate(category.get("tasks", []))
+    )
+    return prompts.render(
+        "guide.category",
+        workbench_content=workbench_content,
+        category_name=category["name"],
+        task_list=task_list
+    )
+
+
+def _merge_task(outline_task: dict, detailed) -> dict:
+    # Titles and order come from the outline; blocks are matched by position
+    blocks = detailed.get("content_blocks", []) if isinstance(detailed, dict) else []
+    return dict(outline_task, content_blocks=[
+        b for b in blocks if isinstance(b, dict) and b.get("type") and b.get("content")
+    ])
+
+
+async def _generate_category(workbench_content: str, category: dict, semaphore: asyncio.Semaphore, on_task=None) -> tuple:
+    """
+    Fill the outline's tasks for one category with content blocks.
+    The completion is streamed and every task is passed to on_task(index, task)
+    as soon as its JSON object closes. If the stream breaks off, the tasks that
+    already arrived are kept and the rest get no content blocks; only a stream
+    that delivered no task at all raises. Returns (category, complete).
+    """
+    outline_tasks = category.get("tasks", [])
+    scanner = JsonObjectStream()
+    tasks = []
+    async with semaphore:
+        # JSON mode is not available with streaming, the prompt already asks for bare JSON
+        deltas = llm.stream_chat_completion(
+            messages=[{"role": "user", "content": build_category_prompt(workbench_content, category)}],
+            endpoint="guide.category"
         )
+        try:
+            while True:
+                try:
+                    delta = await deltas.__anext__()
+                except StopAsyncIteration:
+                    break
+                except Exception as e:
+                    if not tasks:
+                        raise
+                    print(f"Guide category '{category['name']}' stream broke off after {len(tasks)} tasks: {e}")
+                    break
+                for kind, key, value in scanner.feed(delta):
+                    # Extra tasks the outline does not have are ignored
+                    if kind == "item" and key == "tasks" and len(tasks) < len(outline_tasks):
+                        tasks.append(_merge_task(outline_tasks[len(tasks)], value))
+                        if on_task is not None:
+                            on_task(len(tasks) - 1, tasks[-1])
+        finally:
+            await deltas.aclose()
 
-        response_text = chat_completion.choices[0].message.content
-        guide_data = json.loads(response_text)
+    if not tasks:
+        routing.record_outcome("guide.category", "invalid")
+        raise ValueError(f"AI response for '{category['name']}' contained no complete task")
+    complete = len(tasks) == len(outline_tasks)
+    routing.record_outcome("guide.category", "ok" if complete else "partial")
+    tasks += [dict(task, content_blocks=[]) for task in outline_tasks[len(tasks):]]
+    return dict(category, tasks=tasks), complete
 
-        # Save to database
-        saved_categories = []
-        
-        for cat_idx, category in enumerate(guide_data.get("categories", [])):
-            # Insert category
-            cat_result = supabase.table("task_categories").insert({
-                "project_id": project_id,
-                "name": category["name"],
-                "icon": category.get("icon", "folder"),
-                "display_order": cat_idx
-            }).execute()
-            
-            category_id = cat_result.data[0]["id"]
-            saved_tasks = []
-            
-            for task_idx, task in enumerate(category.get("tasks", [])):
-                # Insert task
-                task_result = supabase.table("tasks").insert({
-                    "category_id": category_id,
-                    "project_id": project_id,
-                    "title": task["title"],
-                    "description": task.get("description", ""),
-                    "estimated_time": task.get("estimated_time"),
-                    "display_order": task_idx
-                }).execute()
-                
-                task_id = task_result.data[0]["id"]
-                saved_blocks = []
-                
-                for block_idx, block in enumerate(task.get("content_blocks", [])):
-                    # Insert content block
-                    block_result = supabase.table("task_content_blocks").insert({
-                        "task_id": task_id,
-                        "block_type": block["type"],
-                        "content": block["content"],
-                        "language": block.get("language"),
-                        "filename": block.get("filename"),
-                        "display_order": block_idx
-                    }).execute()
-                    
-                    saved_blocks.append({
-                        "id": block_result.data[0]["id"],
-                        "type": block["type"],
-                        "content": block["content"],
-                        "language": block.get("language"),
-                        "filename": block.get("filename"),
-                        "display_order": block_idx
-                    })
-                
-                saved_tasks.append({
-                    "id": task_id,
-                    "title": task["title"],
-                    "description": task.get("description", ""),
-                    "estimated_time": task.get("estimated_time"),
-                    "display_order": task_idx,
-                    "content_blocks": saved_blocks,
-                    "is_completed": False
-                })
-            
-            saved_categories.append({
-                "id": category_id,
-                "name": category["name"],
-                "icon": category.get("icon", "folder"),
-                "display_order": cat_idx,
-                "tasks": saved_tasks
-            })
+
+async def _plan_outline(workbench_content: str, sections: dict) -> list:
+    """Outline call: categories with task titles and the blueprint sections they come from."""
+    response_text = await llm.chat_completion(
+        messages=[{"role": "user", "content": build_outline_prompt(workbench_content)}],
+        response_format={"type": "json_object"},
+        endpoint="guide.outline"
+    )
+    with span("parse"), routing.invalid_on_error("guide.outline"):
+        outline = [
+            cat for cat in fastjson.loads(response_text).get("categories", [])
+            if cat.get("name") and cat.get("tasks")
+        ]
+    routing.record_outcome("guide.outline", "ok" if outline else "invalid")
+    return [resolve_sources(cat, sections) for cat in outline]
+
+
+async def _generate_guide(project_id: str, request: GenerateGuideRequest, report=no_progress):
+    """
+    Two-stage generation: a short outline call for categories and task titles,
+    then one streamed call per category (bounded by GUIDE_CATEGORY_CONCURRENCY)
+    for the content blocks. The outline's categories are saved up front and
+    every task is saved as soon as its JSON object closes, while the other
+    calls keep generating. Tasks a call never delivered (failure or truncated
+    stream) keep their outline title without content blocks. The previous
+    guide is deleted only once the new one is completely written; on failure
+    the new rows are removed and the previous guide stays.
+    """
+    try:
+        report({"stage": "outline"})
+        sections = split_sections(request.workbenchContent)
+        outline = await _plan_outline(request.workbenchContent, sections)
+
+        # Each call queues (category index, task index, task) as its tasks close and
+        # (category index, None, future) when it ends; all writes happen below, in arrival order
+        semaphore = asyncio.Semaphore(CATEGORY_CONCURRENCY)
+        arrived = asyncio.Queue()
+        futures = []
+        for idx, cat in enumerate(outline):
+            future = asyncio.ensure_future(_generate_category(
+                request.workbenchContent, cat, semaphore,
+                on_task=lambda task_idx, task, idx=idx: arrived.put_nowait((idx, task_idx, task))
+            ))
+            future.add_done_callback(lambda f, idx=idx: arrived.put_nowait((idx, None, f)))
+            futures.append(future)
+        failed_categories = []
+        report({"stage": "categories", "completed": 0, "total": len(outline)})
+
+        # Serialize writers per project so two different guides never interleave
+        async with guide_write_lock(project_id):
+            writer = GuideWriter(supabase, project_id)
+            try:
+                # supabase-py is synchronous; its round trips run in a thread so
+                # the category streams and other requests keep going meanwhile
+                previous_category_ids = await asyncio.to_thread(writer.existing_category_ids)
+                saved_categories = await asyncio.to_thread(writer.write_category_shells, list(enumerate(outline)))
+
+                remaining = len(outline)
+                while remaining:
+                    idx, task_idx, item = await arrived.get()
+                    category = saved_categories[idx]
+                    if task_idx is not None:
+                        category["tasks"] += await asyncio.to_thread(writer.write_tasks, category["id"], [(task_idx, item)])
+                        continue
+
+                    remaining -= 1
+                    try:
+                        _, complete = item.result()
+                    except Exception as e:
+                        print(f"Error generating guide category '{outline[idx]['name']}': {e}")
+                        complete = False
+                    if not complete:
+                        failed_categories.append(outline[idx]["name"])
+                    missing = list(enumerate(outline[idx]["tasks"]))[len(category["tasks"]):]
+                    category["tasks"] += await asyncio.to_thread(writer.write_tasks, category["id"], missing)
+                    report({"stage": "categories", "completed": len(outline) - remaining, "total": len(outline)})
+
+                await asyncio.to_thread(save_section_hashes, supabase, project_id, section_hashes(sections))
+
+                # Everything is written, so the previous guide can go
+                await progress_writer.flush()
+                await asyncio.to_thread(writer.delete_categories, previous_category_ids)
+                task_owners.forget_project(project_id)
+                guide_cache.invalidate(project_id)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                await asyncio.to_thread(writer.rollback)
+                guide_cache.invalidate(project_id)
+                raise
 
         total_tasks = sum(len(cat["tasks"]) for cat in saved_categories)
         
         return {
             "categories": saved_categories,
             "total_tasks": total_tasks,
-            "completed_tasks": 0
+            "completed_tasks": 0,
+            "failed_categories": failed_categories
         }
 
     except Exception as e:
         print(f"Error in generate-guide: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
 
 
-@router.get("/{project_id}")
-async def get_guide(project_id: str, user_id: Optional[str] = None):
+def _name_key(name: str) -> str:
+    return " ".join(str(name).split()).lower()
+
+
+async def _update_guide(project_id: str, request: GenerateGuideRequest, report=no_progress):
+    """
+    Incremental regeneration. The workbench is split into `##` sections and
+    compared with the section hashes the guide was built from; only the
+    edited sections are re-planned and only the categories built from them
+    are regenerated, with the outline and category calls seeing just those
+    sections. Changed categories are rewritten in place, so tasks whose
+    titles survive keep their ids and completion state. Guides generated
+    before source tracking fall back to a full generation.
+    """
+    try:
+        sections = split_sections(request.workbenchContent)
+        async with guide_write_lock(project_id):
+            await progress_writer.flush()
+            writer = GuideWriter(supabase, project_id)
+            old_hashes = await asyncio.to_thread(load_section_hashes, supabase, project_id)
+            # Without hashes there is nothing to diff, and no source_sections column to select
+            existing = await asyncio.to_thread(writer.existing_guide) if old_hashes else None
+            plan = plan_update(existing, old_hashes, sections) if existing else None
+            if plan is not None:
+                return await _apply_update(writer, sections, plan, report)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in update-guide: {e}")
+        guide_cache.invalidate(project_id)
+        raise http_error(e)
+
+    return await _generate_guide(project_id, request, report)
+
+
+def _absorb_kept(category: dict, kept: dict, sections: dict):
+    """Extend a re-planned category with the sources and tasks of the stored category it collides with."""
+    sources = set(kept["source_sections"]) | set(category["source_sections"])
+    category["source_sections"] = [key for key in sections if key in sources]
+    titles = {_name_key(task["title"]) for task in category.get("tasks", [])}
+    kept_tasks = [
+        {"title": task["title"], "description": task.get("description") or "", "estimated_time": task.get("estimated_time")}
+        for task in sorted(kept.get("tasks") or [], key=lambda task: task.get("display_order") or 0)
+        if _name_key(task["title"]) not in titles
+    ]
+    category["tasks"] = kept_tasks + category.get("tasks", [])
+
+
+async def _apply_update(writer: GuideWriter, sections: dict, plan: tuple, report) -> dict:
+    unchanged, changed, replan = plan
+    project_id = writer.project_id
+    outline = []
+    if replan:
+        report({"stage": "outline", "sections": len(replan)})
+        replan_sections = {key: sections[key] for key in replan}
+        outline = await _plan_outline("".join(replan_sections.values()), replan_sections)
+        # Never duplicate a kept category: one the new outline names again is
+        # regenerated in place from its own and the re-planned sections
+        kept_by_name = {_name_key(cat["name"]): cat for cat in unchanged}
+        for cat in outline:
+            kept = kept_by_name.pop(_name_key(cat["name"]), None)
+            if kept is not None:
+                _absorb_kept(cat, kept, sections)
+                unchanged.remove(kept)
+                changed.append(kept)
+
+    semaphore = asyncio.Semaphore(CATEGORY_CONCURRENCY)
+    report({"stage": "categories", "completed": 0, "total": len(outline)})
+    results = await asyncio.gather(*(
+        _generate_category("".join(sections[key] for key in cat["source_sections"]), cat, semaphore)
+        for cat in outline
+    ), return_exceptions=True)
+
+    changed_by_name = {_name_key(cat["name"]): cat for cat in changed}
+    next_order = max((cat.get("display_order") or 0 for cat in unchanged + changed), default=-1) + 1
+    failed_categories = []
+    inserts, updates = [], []
+    for cat, result in zip(outline, results):
+        if isinstance(result, Exception):
+            print(f"Error generating guide category '{cat['name']}': {result}")
+            failed_categories.append(cat["name"])
+            result = cat
+        else:
+            result, complete = result
+            if not complete:
+                failed_categories.append(cat["name"])
+        previous = changed_by_name.pop(_name_key(cat["name"]), None)
+        if previous is not None:
+            updates.append((previous, result))
+        else:
+            inserts.append((next_order + len(inserts), result))
+
+    # New categories first, since rollback() can remove them; in-place rewrites
+    # cannot be undone, but the section hashes are saved last, so after a
+    # failure the stored hashes still mark every rewritten category as edited
+    # and a retry re-plans it
+    try:
+        if inserts:
+            await asyncio.to_thread(writer.write_categories, inserts)
+        for previous, result in updates:
+            await asyncio.to_thread(writer.update_category, previous, result)
+        # Changed categories the new outline no longer has
+        await asyncio.to_thread(writer.delete_categories, [cat["id"] for cat in changed_by_name.values()])
+        await asyncio.to_thread(save_section_hashes, supabase, project_id, section_hashes(sections))
+    except BaseException:
+        await asyncio.to_thread(writer.rollback)
+        raise
+    finally:
+        task_owners.forget_project(project_id)
+        guide_cache.invalidate(project_id)
+
+    etag = weak_etag(await asyncio.to_thread(fetch_guide_version, supabase, project_id))
+    guide = await asyncio.to_thread(_load_guide, project_id, etag)
+    return dict(
+        guide,
+        regenerated_categories=[cat["name"] for cat in outline],
+        failed_categories=failed_categories
+    )
+
+
+def _load_guide(project_id: str, etag: Optional[str]) -> dict:
+    """Load the guide into the cache. Read the version before calling, so a concurrent write can only make the ETag older than the body."""
+    with span("db.fetch_guide"):
+        guide = fetch_guide(supabase, project_id)
+    guide_cache.set(project_id, guide, etag)
+    return guide
+
+
+@router.get("/{project_id}", response_class=FastJSONResponse)
+async def get_guide(project_id: str, user_id: Optional[str] = None, if_none_match: Optional[str] = Header(None)):
     """
     Fetch complete guide data for a project with user's progress.
+    Served from the per-project cache when possible, otherwise one nested query.
+    Responses carry an ETag of the guide's version; a matching If-None-Match
+    gets 304, checked against the version alone when the guide is not cached.
     """
     try:
-        # Get categories
-        categories_result = supabase.table("task_categories")\
-            .select("*")\
-            .eq("project_id", project_id)\
-            .order("display_order")\
-            .execute()
-        
-        if not categories_result.data:
-            return {"categories": [], "total_tasks": 0, "completed_tasks": 0}
-        
-        # Get all tasks for this project
-        tasks_result = supabase.table("tasks")\
-            .select("*")\
-            .eq("project_id", project_id)\
-            .order("display_order")\
-            .execute()
-        
-        # Get all content blocks for tasks
-        task_ids = [t["id"] for t in tasks_result.data] if tasks_result.data else []
-        
-        blocks_result = None
-        if task_ids:
-            blocks_result = supabase.table("task_content_blocks")\
-                .select("*")\
-                .in_("task_id", task_ids)\
-                .order("display_order")\
-                .execute()
-        
-        # Get progress for this project (load all progress, not just for specific user)
-        progress_map = {}
-        progress_result = supabase.table("task_progress")\
-            .select("task_id, is_completed")\
-            .eq("project_id", project_id)\
-            .execute()
-        
-        if progress_result.data:
-            progress_map = {p["task_id"]: p["is_completed"] for p in progress_result.data}
-        
-        # Build nested structure
-        blocks_by_task = {}
-        if blocks_result and blocks_result.data:
-            for block in blocks_result.data:
-                task_id = block["task_id"]
-                if task_id not in blocks_by_task:
-                    blocks_by_task[task_id] = []
-                blocks_by_task[task_id].append({
-                    "id": block["id"],
-                    "type": block["block_type"],
-                    "content": block["content"],
-                    "language": block.get("language"),
-                    "filename": block.get("filename"),
-                    "display_order": block["display_order"]
-                })
-        
-        tasks_by_category = {}
-        completed_count = 0
-        for task in tasks_result.data or []:
-            cat_id = task["category_id"]
-            if cat_id not in tasks_by_category:
-                tasks_by_category[cat_id] = []
-            
-            is_completed = progress_map.get(task["id"], False)
-            if is_completed:
-                completed_count += 1
-                
-            tasks_by_category[cat_id].append({
-                "id": task["id"],
-                "title": task["title"],
-                "description": task.get("description"),
-                "estimated_time": task.get("estimated_time"),
-                "display_order": task["display_order"],
-                "content_blocks": blocks_by_task.get(task["id"], []),
-                "is_completed": is_completed
-            })
-        
-        categories = []
-        for cat in categories_result.data:
-            categories.append({
-                "id": cat["id"],
-                "name": cat["name"],
-                "icon": cat.get("icon"),
-                "display_order": cat["display_order"],
-                "tasks": tasks_by_category.get(cat["id"], [])
-            })
-        
-        total_tasks = len(tasks_result.data) if tasks_result.data else 0
-        
-        # Get last updated timestamp from task_progress
-        last_updated = None
-        last_updated_result = supabase.table("task_progress")\
-            .select("updated_at")\
-            .eq("project_id", project_id)\
-            .order("updated_at", desc=True)\
-            .limit(1)\
-            .execute()
-        
-        if last_updated_result.data and len(last_updated_result.data) > 0:
-            last_updated = last_updated_result.data[0].get("updated_at")
-        
-        return {
-            "categories": categories,
-            "total_tasks": total_tasks,
-            "completed_tasks": completed_count,
-            "last_updated": last_updated
-        }
+        # Read-your-writes: buffered toggles of this project are written first
+        if progress_writer.has_pending(project_id):
+            await progress_writer.flush()
+
+        cached = guide_cache.get(project_id)
+        if cached is not None:
+            guide, etag = cached
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+        else:
+            # Both are synchronous round trips, kept off the event loop
+            etag = weak_etag(await asyncio.to_thread(fetch_guide_version, supabase, project_id))
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            guide = await asyncio.to_thread(_load_guide, project_id, etag)
+
+        return FastJSONResponse(guide, headers=cache_headers(etag))
 
     except Exception as e:
         print(f"Error in get-guide: {e}")
@@ -300,48 +405,16 @@ async def get_guide(project_id: str, user_id: Optional[str] = None):
 async def update_task_progress(request: TaskProgressRequest):
     """
     Update task completion status for a user.
+    The write is buffered briefly and merged with other toggles (see app/progress.py).
     """
     try:
-        # Get user_id from the task's project via tasks table
-        task_result = supabase.table("tasks")\
-            .select("project_id")\
-            .eq("id", request.taskId)\
-            .execute()
-        
-        if not task_result.data or len(task_result.data) == 0:
+        owners = await task_owners.resolve(supabase, [request.taskId])
+        if request.taskId not in owners:
             raise HTTPException(status_code=404, detail="Task not found")
-        
-        # Now get user_id from projects table using RPC or direct query
-        # Use a raw query approach to bypass potential RLS
-        project_id = task_result.data[0]["project_id"]
-        
-        # Get user from projects - try with rpc if direct fails
-        try:
-            project_result = supabase.rpc("get_project_owner", {"p_id": project_id}).execute()
-            if project_result.data:
-                user_id = project_result.data
-            else:
-                # Fallback: use project_id as pseudo user_id (for testing only)
-                user_id = project_id
-        except:
-            # If RPC doesn't exist, use project_id as fallback
-            user_id = project_id
-        
-        from datetime import datetime
-        current_time = datetime.utcnow().isoformat()
-        
-        # Upsert progress record with updated_at timestamp
-        supabase.table("task_progress")\
-            .upsert({
-                "user_id": user_id,
-                "task_id": request.taskId,
-                "project_id": request.projectId,
-                "is_completed": request.isCompleted,
-                "updated_at": current_time,
-                "completed_at": current_time if request.isCompleted else None
-            }, on_conflict="task_id")\
-            .execute()
-        
+
+        project_id, user_id = owners[request.taskId]
+        progress_writer.submit([progress_row(request.taskId, project_id, user_id, request.isCompleted)])
+
         return {"success": True, "is_completed": request.isCompleted}
 
     except HTTPException:
@@ -349,3 +422,31 @@ async def update_task_progress(request: TaskProgressRequest):
     except Exception as e:
         print(f"Error in update-task-progress: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/progress/batch")
+async def update_task_progress_batch(request: TaskProgressBatchRequest):
+    """
+    Update the completion status of many tasks at once. Later updates of the
+    same task win. Unknown task ids are skipped and listed in `missing`.
+    """
+    try:
+        owners = await task_owners.resolve(supabase, [update.taskId for update in request.updates])
+        latest = {update.taskId: update.isCompleted for update in request.updates}
+
+        rows = []
+        for task_id, is_completed in latest.items():
+            if task_id in owners:
+                project_id, user_id = owners[task_id]
+                rows.append(progress_row(task_id, project_id, user_id, is_completed))
+        progress_writer.submit(rows)
+
+        return {
+            "success": True,
+            "updated": [{"taskId": row["task_id"], "is_completed": row["is_completed"]} for row in rows],
+            "missing": [task_id for task_id in latest if task_id not in owners]
+        }
+
+    except Exception as e:
+        print(f"Error in update-task-progress-batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,67 +1,46 @@
-import os
 import json
+import time
+import asyncio
 # import google.generativeai as genai
-from groq import Groq
-from fastapi import APIRouter, HTTPException
-from ..models import IdeaRequest, IdeaResponse, GenerateBlueprintRequest, BlueprintResponse, GenerateDatabaseSchemaRequest
-from dotenv import load_dotenv
-from supabase import create_client, Client
-
-load_dotenv()
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import StreamingResponse, JSONResponse
+from .. import llm, prompts, fastjson, mermaid, routing
+from ..jobs import job_queue, no_progress
+from ..logs import log_event, LOG_SAMPLE_RATE
+from ..fastjson import FastJSONResponse
+from ..http_cache import content_version, weak_etag, etag_matches, cache_headers, not_modified
+from ..metrics import span
+from ..conversation import fit_prompt
+from ..singleflight import inflight, flight_key
+from ..streaming import JsonObjectStream, MarkdownSectionSplitter, sse, SSE_HEADERS
+from ..errors import http_error
+from ..models import IdeaRequest, IdeaResponse, GenerateBlueprintRequest, BlueprintResponse, GenerateDatabaseSchemaRequest, GenerateArtifactsRequest, GenerateGuideRequest
+from ..clients import supabase
+from .guide import generate_or_update_guide
+from typing import Optional
 
 router = APIRouter()
 
-
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-model_llm = "llama-3.3-70b-versatile"  # Valid Groq model (same as ai.py)
-
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(supabase_url, supabase_key)
-
 def clean_json_string(text: str):
     return text.replace("```json", "").replace("```", "").strip()
 
 @router.post("/generate-list")
 async def generate_ideas_list(request: IdeaRequest):
     try:
-        # Prompt Engineering
-        prompt = f"""
-        You are an expert Creative Project Architect. Your task is to generate 3 distinct and creative project ideas based on the user's interest and our brief conversation.
-        
-        CONTEXT:
-        User Interest: {request.interest}
-        Conversation History: {json.dumps(request.conversation, default=str)}
-
-        INSTRUCTIONS:
-        1. Generate exactly 3 unique project ideas.
-        2. Each idea must be feasible for a mini-project but creative enough to stand out.
-        3. Provide a clear title, a short catchy description, and a technical complexity rating (Low/Medium/High).
-        
-        OUTPUT FORMAT (JSON ARRAY):
-        [
-          {{
-            "projectName": "Name of the project just 1 or 2 words",
-            "reasonProjectName": "One sentence on why this name fits",
-            "projectDescription": "A comprehensive and detailed explanation (minimum 5 sentences) describing the core value, problem solution, and user impact.",
-            "uniqueSellingProposition": "The key differentiator that makes this special.",
-            "mvpFeatures": ["Feature 1", "Feature 2", "Feature 3"]
-          }},
-          ...
-        ]
-        """
-
-        chat_completion = client.chat.completions.create(
+        with span("prompt_build"):
+            prompt = fit_prompt("idea.list", request.conversation, interest=request.interest)
+
+        response_text = await llm.chat_completion(
             messages=[
                 {"role": "user", "content": prompt}
             ],
-            model=model_llm,
-            temperature=0.8,
-            max_completion_tokens=4000,
-            response_format={"type": "json_object"}
+            response_format={"type": "json_object"},
+            endpoint="idea.list"
         )
-        response_text = chat_completion.choices[0].message.content
-        data = json.loads(response_text)
+        with span("parse"), routing.invalid_on_error("idea.list"):
+            data = fastjson.loads(response_text)
+        listed = isinstance(data, list) or isinstance(data, dict) and any(isinstance(v, list) for v in data.values())
+        routing.record_outcome("idea.list", "ok" if listed else "invalid")
         
         if isinstance(data, list):
              return {"ideas": data}
@@ -82,290 +61,339 @@ async def generate_ideas_list(request: IdeaRequest):
 
     except Exception as e:
         print(f"Error in generate-list: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
+
+def build_blueprint_prompt(request: GenerateBlueprintRequest) -> str:
+    return fit_prompt(
+        "idea.blueprint",
+        request.conversation,
+        interest=request.interest,
+        project_description=request.projectDescription,
+        project_name=request.projectName,
+        reason_project_name=request.reasonProjectName,
+        unique_selling_proposition=request.uniqueSellingProposition,
+        mvp_features=json.dumps(request.mvpFeatures, ensure_ascii=False)
+    )
+
+def repair_project_data(pd: dict) -> dict:
+    """Replace malformed target_audience / success_metrics arrays in place."""
+    # Fix target_audience if it's malformed
+    if "target_audience" in pd:
+        ta = pd["target_audience"]
+        if isinstance(ta, list) and len(ta) > 0:
+            # Check if first element is a dict with proper structure
+            if not isinstance(ta[0], dict) or "icon" not in ta[0]:
+                # Array is corrupted, provide default
+                pd["target_audience"] = [
+                    {"icon": "user", "text": "General users interested in this application"},
+                    {"icon": "professional", "text": "Professionals seeking productivity tools"},
+                    {"icon": "student", "text": "Students and learners"}
+                ]
+        else:
+            pd["target_audience"] = []
+
+    # Fix success_metrics if it's malformed
+    if "success_metrics" in pd:
+        sm = pd["success_metrics"]
+        if isinstance(sm, list) and len(sm) > 0:
+            if not isinstance(sm[0], dict) or "type" not in sm[0]:
+                pd["success_metrics"] = [
+                    {"type": "Kuantitatif", "text": "Achieve 1,000 monthly active users within 6 months"},
+                    {"type": "Kuantitatif", "text": "Maintain 40% user retention after 30 days"},
+                    {"type": "Kualitatif", "text": "Achieve NPS score above 50"}
+                ]
+        else:
+            pd["success_metrics"] = []
+
+    return pd
+
+@router.post("/generate-blueprint", response_class=FastJSONResponse)
+async def generate_blueprint(request: GenerateBlueprintRequest, background: bool = False):
+    """With ?background=true the blueprint is generated as a job; poll /api/jobs/{jobId}."""
+    if background:
+        job_id = job_queue.submit("idea.blueprint", request.dict())
+        return JSONResponse(status_code=202, content={"jobId": job_id, "status": "queued"})
 
-@router.post("/generate-blueprint")
-async def generate_blueprint(request: GenerateBlueprintRequest):
+    return FastJSONResponse(await _generate_blueprint(request))
+
+async def _run_blueprint_job(payload: dict, report):
+    return await _generate_blueprint(GenerateBlueprintRequest(**payload), report)
+
+job_queue.register("idea.blueprint", _run_blueprint_job)
+
+async def _generate_blueprint(request: GenerateBlueprintRequest, report=no_progress):
     try:
-        prompt = f"""You are Architech, a world-class CTO and Digital Product Architect.
-Your mission is to expand a chosen project idea into a complete, professional, and actionable project blueprint.
-
-CRITICAL: Be EXTREMELY VERBOSE. Do not summarize. Every section must be expanded with multiple paragraphs and deep technical details.
-
-USER CONTEXT:
-- Initial Interest: {request.interest}
-- Clarification Interview: {json.dumps(request.conversation, default=str)}
-- Project Description: {request.projectDescription}
-
-SELECTED PROJECT IDEA:
-- Project Name: {request.projectName}
-- Unique Selling Proposition: {request.uniqueSellingProposition}
-- Core MVP Features: {json.dumps(request.mvpFeatures, default=str)}
-
-OUTPUT REQUIREMENTS - Return a valid JSON object with exactly two keys:
-
-1. projectData (object with these exact fields):
-   - title: string, use exactly "{request.projectName}"
-   - title_reason: string, use exactly "{request.reasonProjectName}"
-   - problem_statement: string, a concise paragraph explaining the core problem
-   - target_audience: array of exactly 3 objects, each with "icon" (string) and "text" (string) properties
-   - success_metrics: array of exactly 3 objects, each with "type" (string: Kuantitatif or Kualitatif) and "text" (string) properties
-   - tech_stack: array of 5-7 technology strings
-
-2. workbenchContent (string containing markdown with these sections):
-   - Fitur Utama (Core Features) - detailed explanation of each MVP feature
-   - Roadmap - phased plan (MVP, Phase 2, Future)
-   - Task Breakdown - 10-15 tasks per category (Frontend, Backend, Database, DevOps)
-   - User Stories - 7-10 detailed user stories
-   - System Architecture - describe in PROSE ONLY, no diagrams
-   - API Endpoints - at least 5 key endpoints with methods and sample requests
-   - Strategi Monetisasi - 2-3 revenue strategies
-   Every section will be heading 2 [##] and must be expanded with multiple paragraphs and deep technical details.
-
-CRITICAL JSON FORMAT for arrays:
-target_audience must be exactly like this:
-[{{"icon": "student", "text": "Description here"}}, {{"icon": "professional", "text": "Description here"}}, {{"icon": "user", "text": "Description here"}}]
-
-success_metrics must be exactly like this:
-[{{"type": "Kuantitatif", "text": "Metric description"}}, {{"type": "Kuantitatif", "text": "Metric description"}}, {{"type": "Kualitatif", "text": "Metric description"}}]
-
-CRITICAL RULES:
-- Return ONLY valid JSON
-- All arrays must contain properly formatted objects
-- Match the language of the user input
-- DO NOT use ASCII diagrams or code blocks with special characters in workbenchContent
-- For System Architecture, describe in plain text paragraphs, NOT code blocks or diagrams
-- Escape all special characters properly in the markdown string
-"""
-
-        chat_completion = client.chat.completions.create(
+        report({"stage": "generating"})
+        with span("prompt_build"):
+            prompt = build_blueprint_prompt(request)
+
+        response_text = await llm.chat_completion(
             messages=[
                 {"role": "user", "content": prompt}
             ],
-            model=model_llm,
-            temperature=0.7,
-            max_completion_tokens=6000,
-            response_format={"type": "json_object"}
+            response_format={"type": "json_object"},
+            endpoint="idea.blueprint"
+        )
+        with span("parse"), routing.invalid_on_error("idea.blueprint"):
+            data = fastjson.loads(response_text)
+        routing.record_outcome("idea.blueprint", "ok" if "projectData" in data else "invalid")
+        log_event(
+            "blueprint.generated",
+            sample_rate=LOG_SAMPLE_RATE,
+            title=data.get("projectData", {}).get("title"),
+            workbench_chars=len(data.get("workbenchContent") or ""),
+            response_chars=len(response_text)
         )
-
-        response_text = chat_completion.choices[0].message.content
-        data = json.loads(response_text)
-        print("data blueprint: ", data)
         
-        # Validate and fix target_audience if malformed
+        # Validate and fix target_audience / success_metrics if malformed
         if "projectData" in data:
-            pd = data["projectData"]
-            
-            # Fix target_audience if it's malformed
-            if "target_audience" in pd:
-                ta = pd["target_audience"]
-                if isinstance(ta, list) and len(ta) > 0:
-                    # Check if first element is a dict with proper structure
-                    if not isinstance(ta[0], dict) or "icon" not in ta[0]:
-                        # Array is corrupted, provide default
-                        pd["target_audience"] = [
-                            {"icon": "user", "text": "General users interested in this application"},
-                            {"icon": "professional", "text": "Professionals seeking productivity tools"},
-                            {"icon": "student", "text": "Students and learners"}
-                        ]
-                else:
-                    pd["target_audience"] = []
-            
-            # Fix success_metrics if it's malformed
-            if "success_metrics" in pd:
-                sm = pd["success_metrics"]
-                if isinstance(sm, list) and len(sm) > 0:
-                    if not isinstance(sm[0], dict) or "type" not in sm[0]:
-                        pd["success_metrics"] = [
-                            {"type": "Kuantitatif", "text": "Achieve 1,000 monthly active users within 6 months"},
-                            {"type": "Kuantitatif", "text": "Maintain 40% user retention after 30 days"},
-                            {"type": "Kualitatif", "text": "Achieve NPS score above 50"}
-                        ]
-                else:
-                    pd["success_metrics"] = []
+            with span("repair"):
+                repair_project_data(data["projectData"])
 
         return data
 
     except Exception as e:
         print(f"Error in generate-blueprint: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
+
+@router.post("/generate-blueprint/stream")
+async def generate_blueprint_stream(request: GenerateBlueprintRequest):
+    """
+    Streaming variant of generate-blueprint (server-sent events).
+    Sends `projectData` as soon as it parses, then one `section` event per
+    `##` heading of workbenchContent, then `done`.
+    """
+    prompt = build_blueprint_prompt(request)
+
+    async def events():
+        scanner = JsonObjectStream()
+        splitter = MarkdownSectionSplitter()
+        section_count = 0
+        sent_project_data = False
+        try:
+            # JSON mode is not available with streaming, the prompt already asks for bare JSON
+            async for delta in llm.stream_chat_completion(
+                messages=[{"role": "user", "content": prompt}],
+                endpoint="idea.blueprint",
+            ):
+                for kind, key, value in scanner.feed(delta):
+                    if key == "projectData" and kind == "value":
+                        with span("repair"):
+                            repair_project_data(value)
+                        yield sse("projectData", value)
+                        sent_project_data = True
+                    elif key == "workbenchContent" and kind == "text":
+                        for section in splitter.feed(value):
+                            yield sse("section", {"index": section_count, "content": section})
+                            section_count += 1
+
+            for section in splitter.flush():
+                yield sse("section", {"index": section_count, "content": section})
+                section_count += 1
+
+            if not sent_project_data:
+                routing.record_outcome("idea.blueprint", "invalid")
+                raise ValueError("AI response did not contain projectData")
+            routing.record_outcome("idea.blueprint", "ok")
+
+            yield sse("done", {"sections": section_count})
+
+        except Exception as e:
+            print(f"Error in generate-blueprint/stream: {e}")
+            yield sse("error", {"detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+def _schema_ok(schema) -> bool:
+    """Whether the reply has the {"schema": [{"table_name", "columns": [...]}]} shape the frontend renders."""
+    tables = schema.get("schema") if isinstance(schema, dict) else None
+    return bool(tables) and isinstance(tables, list) and all(
+        isinstance(table, dict) and table.get("table_name") and isinstance(table.get("columns"), list)
+        for table in tables
+    )
 
 @router.post("/generate-database-schema")
 async def generate_database_schema(request: GenerateDatabaseSchemaRequest):
+    # Duplicate clicks / retries for the same project and context share one generation
+    key = flight_key("idea.schema", request.projectId, request.projectContext, request.bypassCache)
+    return await inflight.do(key, lambda: _generate_database_schema(request))
+
+async def _generate_database_schema(request: GenerateDatabaseSchemaRequest):
     try:
-        model = model_llm
-
-        prompt = f"""
-          You are "Schema-DB", a professional Database Architect. Your mission is to design a clear, normalized, and efficient relational database schema based on a project's description, user stories, and API endpoints.
-
-          ---
-          ## Full Project Context
-          {request.projectContext}
-          ---
-
-          🔹 **TASK**
-          1.  Analyze the provided context to identify the core entities (e.g., users, posts, comments, products).
-          2.  For each entity, define the necessary columns with appropriate data types (use standard SQL types like UUID, TEXT, VARCHAR, INTEGER, BOOLEAN, TIMESTAMPZ).
-          3.  Identify primary keys, foreign keys, and unique constraints to establish relationships between tables.
-          4.  The 'users' table is mandatory and should be the central point for user-related data.
-
-          🔹 **OUTPUT REQUIREMENTS**
-          - Your output MUST be a single, valid JSON object.
-          - The JSON object must have a single top-level key: "schema".
-          - The value of "schema" must be an array of table objects.
-          - Each table object must have:
-              - "table_name": (string) The name of the table (e.g., "users").
-              - "columns": (array of objects) A list of columns.
-          - Each column object must have:
-              - "name": (string) The column name (e.g., "id", "user_id").
-              - "type": (string) The SQL data type (e.g., "UUID", "TEXT").
-              - "is_primary_key": (boolean, optional) True if it's the primary key.
-              - "is_foreign_key": (boolean, optional) True if it's a foreign key.
-              - "references": (string, optional) The table and column it references (e.g., "users(id)").
-
-          Example of a perfect output structure:
-          {{
-            "schema": [
-              {{
-                "table_name": "users",
-                "columns": [
-                  {{ "name": "id", "type": "UUID", "is_primary_key": true }},
-                  {{ "name": "email", "type": "TEXT" }},
-                  {{ "name": "created_at", "type": "TIMESTAMPZ" }}
-                ]
-              }},
-              {{
-                "table_name": "posts",
-                "columns": [
-                  {{ "name": "id", "type": "UUID", "is_primary_key": true }},
-                  {{ "name": "content", "type": "TEXT" }},
-                  {{ "name": "user_id", "type": "UUID", "is_foreign_key": true, "references": "users(id)" }}
-                ]
-              }}
-            ]
-          }}
-        """
+        with span("prompt_build"):
+            prompt = prompts.render("idea.schema", project_context=request.projectContext)
 
-        chat_completion = client.chat.completions.create(
+        response_text = await llm.chat_completion(
             messages=[
                 {"role": "user", "content": prompt}
             ],
-            model=model_llm,
-            temperature=0.7, # Rendah untuk presisi teknis
-            response_format={"type": "json_object"}
+            response_format={"type": "json_object"},
+            endpoint="idea.schema",
+            cache_ttl=llm.DETERMINISTIC_CACHE_TTL,
+            bypass_cache=request.bypassCache,
+            validate=lambda text: _schema_ok(fastjson.loads(text))
         )
-
-        response_text = chat_completion.choices[0].message.content
-        generated_schema = json.loads(response_text)
+        with span("parse"), routing.invalid_on_error("idea.schema"):
+            generated_schema = fastjson.loads(response_text)
+        routing.record_outcome("idea.schema", "ok" if _schema_ok(generated_schema) else "invalid")
 
         # Save to Supabase
-        data, count = supabase.table("database_schemas").upsert(
-            {
-            "project_id": request.projectId,
-            "schema_data": generated_schema,
-            "updated_at": "now()"
-            },
-            on_conflict="project_id"
-        ).execute()
+        with span("db.upsert_schema"):
+            data, count = supabase.table("database_schemas").upsert(
+                {
+                "project_id": request.projectId,
+                "schema_data": generated_schema,
+                "updated_at": "now()"
+                },
+                on_conflict="project_id"
+            ).execute()
         
         return generated_schema
 
     except Exception as e:
         print(f"Error in generate-database-schema: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
+
 
+def _chart_ok(text: str) -> bool:
+    # Only charts the local repair can make valid are worth caching
+    return mermaid.repair(text).ok
 
 @router.post("/generate-flowchart")
 async def generate_flowchart(request: GenerateDatabaseSchemaRequest):
     """Generate a Mermaid.js flowchart from project context"""
+    key = flight_key("idea.flowchart", request.projectId, request.projectContext, request.bypassCache)
+    return await inflight.do(key, lambda: _generate_flowchart(request))
+
+async def _generate_flowchart(request: GenerateDatabaseSchemaRequest):
     try:
-        prompt = f"""You are "ArchiGraph", a System Architect expert in Mermaid.js.
-Create a System Architecture Flowchart for this project.
-
-CONTEXT:
-{request.projectContext}
-
-STRICT SYNTAX RULES:
-1. Start with exactly: graph TD
-2. Arrow with label: A -->|label text| B (NO space after the pipe)
-3. Arrow without label: A --> B
-4. Node shapes:
-   - Rectangle: [Text]
-   - Rounded: (Text)
-   - Circle: ((Text))
-   - Cylinder: [(Text)]
-   - Hexagon: {{{{Text}}}}
-
-INCLUDE THESE COMPONENTS:
-- User entry point
-- Frontend layer
-- Backend/API layer  
-- Database
-- External services if relevant
-
-RETURN ONLY the Mermaid code. No markdown, no explanation.
-
-EXAMPLE (copy this exact syntax style):
-graph TD
-    User((User)) -->|Request| FE[Frontend]
-    FE -->|API Call| BE[Backend]
-    BE -->|Query| DB[(Database)]
-    BE -->|Auth| Auth{{Auth Service}}
-"""
-
-        chat_completion = client.chat.completions.create(
+        with span("prompt_build"):
+            prompt = prompts.render("idea.flowchart", project_context=request.projectContext)
+
+        response_text = await llm.chat_completion(
             messages=[{"role": "user", "content": prompt}],
-            model=model_llm,
-            temperature=0.1,  # Very low for consistent syntax
-            max_completion_tokens=2000,
+            endpoint="idea.flowchart",
+            cache_ttl=llm.DETERMINISTIC_CACHE_TTL,
+            bypass_cache=request.bypassCache,
+            validate=_chart_ok,
         )
-
-        response_text = chat_completion.choices[0].message.content
-        
-        # Clean output - remove markdown code blocks
-        clean_code = response_text.replace("```mermaid", "").replace("```", "").strip()
-        
-        # Sanitize common syntax errors from AI
-        import re
-        
-        # Fix "|>" to "|" (invalid arrow ending)
-        clean_code = clean_code.replace("|>", "|")
-        
-        # Fix mixed brackets like {( or ({ - convert to simple brackets
-        clean_code = re.sub(r'\{\(', '{{', clean_code)  # {( -> {{
-        clean_code = re.sub(r'\)\}', '}}', clean_code)  # )} -> }}
-        clean_code = re.sub(r'\(\{', '{{', clean_code)  # ({ -> {{
-        clean_code = re.sub(r'\}\)', '}}', clean_code)  # }) -> }}
-        
-        # Fix spaces in arrow labels: -->| label| to -->|label|
-        clean_code = re.sub(r'-->\s*\|\s+', '-->|', clean_code)
-        clean_code = re.sub(r'\s+\|(\s)', '|', clean_code)
         
-        # Fix double spaces
-        clean_code = re.sub(r'  +', ' ', clean_code)
+        with span("repair"):
+            result = mermaid.repair(response_text)
+        mermaid.record(result)
+        routing.record_outcome("idea.flowchart", "reprompt" if not result.ok else "repaired" if result.diagnostics else "ok")
+
+        if not result.ok:
+            # Only output the local repair cannot fix goes back to the model,
+            # with just the lines that failed
+            mermaid.flowchart_reprompts.inc()
+            problems = mermaid.problem_list(response_text, result)
+            response_text = await llm.chat_completion(
+                messages=[{"role": "user", "content": prompts.render(
+                    "idea.flowchart_repair", chart=response_text, problems=problems
+                )}],
+                endpoint="idea.flowchart_repair",
+                cache_ttl=llm.DETERMINISTIC_CACHE_TTL,
+                bypass_cache=request.bypassCache,
+                validate=_chart_ok,
+            )
+            with span("repair"):
+                retried = mermaid.repair(response_text)
+            mermaid.record(retried)
+            routing.record_outcome("idea.flowchart_repair", "ok" if retried.ok else "invalid")
+            # Keep whichever parses better; unfixable lines are already dropped from both
+            if retried.ok or len(retried.errors) < len(result.errors):
+                result = retried
+
+        clean_code = result.code
         
         # Save to Supabase
-        supabase.table("flowcharts").upsert({
-            "project_id": request.projectId,
-            "chart_code": clean_code,
-            "updated_at": "now()"
-        }, on_conflict="project_id").execute()
+        with span("db.upsert_flowchart"):
+            supabase.table("flowcharts").upsert({
+                "project_id": request.projectId,
+                "chart_code": clean_code,
+                "updated_at": "now()"
+            }, on_conflict="project_id").execute()
         
-        return {"chart": clean_code}
+        return {"chart": clean_code, "diagnostics": [d._asdict() for d in result.diagnostics]}
 
     except Exception as e:
         print(f"Error in generate-flowchart: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
+
+
+ARTIFACTS = ("schema", "flowchart", "guide")
+
+
+@router.post("/generate-artifacts")
+async def generate_artifacts(request: GenerateArtifactsRequest):
+    """
+    Generate the database schema, flowchart and implementation guide of a
+    project from one upload of its context, concurrently (server-sent events).
+    Sends `started`, then `artifact` (or `artifact_error`) for each one as it
+    is generated and saved, then `done`; the total time is the slowest
+    artifact's. Generations are shared with the single-artifact endpoints and
+    still complete and save if the client disconnects.
+    """
+    unknown = [name for name in request.artifacts if name not in ARTIFACTS]
+    if unknown or not request.artifacts:
+        raise HTTPException(status_code=400, detail=f"artifacts must be a non-empty subset of {list(ARTIFACTS)}")
+    names = list(dict.fromkeys(request.artifacts))
+
+    context = GenerateDatabaseSchemaRequest(
+        projectId=request.projectId,
+        projectContext=request.projectContext,
+        bypassCache=request.bypassCache
+    )
+    guide_request = GenerateGuideRequest(workbenchContent=request.workbenchContent or request.projectContext)
+    generators = {
+        "schema": lambda: generate_database_schema(context),
+        "flowchart": lambda: generate_flowchart(context),
+        "guide": lambda: generate_or_update_guide(request.projectId, guide_request, request.incremental),
+    }
+    start = time.perf_counter()
+
+    async def run(name: str):
+        try:
+            with span(f"artifact.{name}"):
+                result = await generators[name]()
+            return name, result, None, time.perf_counter() - start
+        except Exception as e:
+            # The generators raise HTTPException with the message in .detail
+            return name, None, str(getattr(e, "detail", None) or e), time.perf_counter() - start
+
+    # Started here rather than in the event generator, so a disconnect doesn't cancel them
+    pending = [asyncio.ensure_future(run(name)) for name in names]
+
+    async def events():
+        yield sse("started", {"artifacts": names})
+        completed, failed = [], []
+        for next_done in asyncio.as_completed(pending):
+            name, result, error, elapsed = await next_done
+            if error is None:
+                completed.append(name)
+                yield sse("artifact", {"name": name, "data": result, "seconds": round(elapsed, 2)})
+            else:
+                print(f"Error in generate-artifacts ({name}): {error}")
+                failed.append(name)
+                yield sse("artifact_error", {"name": name, "detail": error, "seconds": round(elapsed, 2)})
+        yield sse("done", {"completed": completed, "failed": failed, "seconds": round(time.perf_counter() - start, 2)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 
 @router.get("/flowchart/{project_id}")
-async def get_flowchart(project_id: str):
-    """Get saved flowchart for a project"""
+async def get_flowchart(project_id: str, if_none_match: Optional[str] = Header(None)):
+    """Get saved flowchart for a project. The ETag is a hash of the chart code; a matching If-None-Match gets 304."""
     try:
-        result = supabase.table("flowcharts").select("chart_code").eq("project_id", project_id).single().execute()
+        with span("db.get_flowchart"):
+            result = supabase.table("flowcharts").select("chart_code").eq("project_id", project_id).single().execute()
         
         if result.data:
-            return {"chart": result.data["chart_code"]}
+            etag = weak_etag(content_version(result.data["chart_code"] or ""))
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            return JSONResponse(content={"chart": result.data["chart_code"]}, headers=cache_headers(etag))
         else:
             return {"chart": None}
     except Exception as e:
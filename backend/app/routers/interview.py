@@ -1,166 +1,165 @@
-import os
 import json
+import time
 # import google.generativeai as genai
-from groq import Groq
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from .. import llm, prompts, metrics, routing
+from ..errors import http_error
 from ..models import StartInterviewRequest, IdeaRequest
-from dotenv import load_dotenv
-
-load_dotenv()
+from ..conversation import fit_prompt
+from ..logs import log_event, LOG_SAMPLE_RATE
+from ..metrics import span
+from ..streaming import JsonObjectStream, sse, SSE_HEADERS
 
 router = APIRouter()
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-model_llm = "openai/gpt-oss-120b"
+def build_start_prompt(request: StartInterviewRequest) -> str:
+    return prompts.render("interview.start", interest=request.interest)
+
+def build_continue_prompt(request: IdeaRequest) -> str:
+    # Older turns are summarized so the prompt stays within its token budget
+    return fit_prompt(
+        "interview.continue",
+        request.conversation,
+        interest=request.interest,
+        question_count=len(request.conversation)
+    )
+
+def check_start_response(data: dict) -> dict:
+    if "question" not in data:
+        routing.record_outcome("interview.start", "invalid")
+        raise ValueError(f"Missing question in AI response. Got: {data.keys()}")
+    routing.record_outcome("interview.start", "ok")
+    return data
+
+def check_continue_response(data: dict, question_count: int) -> dict:
+    log_event(
+        "interview.continue",
+        sample_rate=LOG_SAMPLE_RATE,
+        question_count=question_count,
+        should_continue=data.get("shouldContinue"),
+        reason=data.get("reason"),
+        confidence=data.get("confidence")
+    )
+
+    # Validate response structure
+    required_keys = ["shouldContinue", "question", "reason", "confidence", "analysis"]
+    if not all(key in data for key in required_keys):
+        routing.record_outcome("interview.continue", "invalid")
+        raise ValueError(f"Missing required keys in AI response. Got: {data.keys()}")
+
+    # Ensure proper types
+    data["shouldContinue"] = bool(data["shouldContinue"])
+    data["confidence"] = float(data["confidence"])
+
+    routing.record_outcome("interview.continue", "ok")
+    return data
 
 @router.post("/start")
 async def start_interview(request: StartInterviewRequest):
-    if os.getenv("MOCK_AI_RESPONSES") == "true":
-         # Return mock data if needed (Implement mock logic if required)
-         pass
-
-    prompt = f"""
-      You are a friendly, highly experienced project consultant for software developer conducting a short but impactful interview.
-      The user's initial interest is: "{request.interest}".
-
-      Your mission is to unlock their vision by asking one single, most valuable follow-up question that helps clarify their core idea.
-
-      Instructions:
-
-      Language Match: Carefully analyze the language of the user's interest ("{request.interest}") and write your question in that exact same language.
-
-      Tone: Keep your tone professional yet approachable, encouraging the user to think deeper. Avoid rigid formalities such as "Bapak/Ibu" or "Sir/Madam".
-
-      Format: Your output MUST be a single, valid JSON object with only one key: "question". No extra commentary, no markdown, no additional fields.
-
-      Impact: The question should spark clarity, highlight priorities, and guide the user to define the essence of their idea.
-
-      Focus: Ask about the "Why" or the "Who" first.
-
-      Example 1 (User input in Indonesian):
-
-      User Interest: "Aplikasi kasir untuk warung kopi"
-
-      Output: {{ "question": "Ide yang menarik! Menurut Anda, fitur apa yang paling penting untuk ada di versi pertama aplikasi ini?" }}
-
-      Example 2 (User input in English):
-
-      User Interest: "A workout planner app"
-
-      Output: {{ "question": "Sounds exciting! Who do you see as the main target users for this workout planner?" }}
-    """
+    with span("prompt_build"):
+        prompt = build_start_prompt(request)
 
     try:
-        chat_completion = client.chat.completions.create(
+        text = await llm.chat_completion(
             messages=[
                 {
                     "role": "user", 
                     "content": prompt 
                 }
             ],
-            model=model_llm,
             response_format={"type": "json_object"}, 
+            endpoint="interview.start",
         )
         
-        text = chat_completion.choices[0].message.content
-        
         cleaned_text = text.replace("```json", "").replace("```", "").strip()
-        data = json.loads(cleaned_text)
+        with span("parse"), routing.invalid_on_error("interview.start"):
+            data = json.loads(cleaned_text)
         
-        return data
+        return check_start_response(data)
 
     except Exception as e:
         print(f"Error in start-interview API: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
+
+@router.post("/start/stream")
+async def start_interview_stream(request: StartInterviewRequest):
+    """Streaming variant of /start; see _stream_turn for the events."""
+    with span("prompt_build"):
+        prompt = build_start_prompt(request)
+    return _stream_turn(prompt, "interview.start", check_start_response)
 
 @router.post("/continue")
 async def continue_interview(request: IdeaRequest):
-    model = model_llm
     question_count = len(request.conversation)
-    
-    prompt = f"""You are an expert project consultant conducting an ADAPTIVE interview to gather information for creating a software project blueprint.
-
-CONTEXT:
-- User initial interest: {request.interest}
-- Conversation history: {json.dumps(request.conversation, default=str)}
-- Current question count: {question_count}
-
-YOUR MISSION:
-Analyze the quality of the conversation so far and decide whether to CONTINUE asking questions or CONCLUDE the interview.
-
-QUALITY ASSESSMENT CRITERIA:
-1. Completeness: Does the information cover key aspects (features, users, goals, constraints)?
-2. Clarity: Is the user vision clear and specific, or vague and ambiguous?
-3. Depth: Are answers detailed with insights, or surface-level and generic?
-4. Actionability: Can you create a concrete, comprehensive project blueprint from this information?
-
-DECISION RULES:
-- MINIMUM: At least 2 questions must be asked before concluding
-- MAXIMUM: Hard limit of 10 questions total
-- CONFIDENCE THRESHOLD: If overall score is 0.75 or higher AND question count is 2 or more, you MAY conclude
-- NEED MORE: If answers are vague, contradictory, or missing critical details, CONTINUE
-- CRITICAL GAPS: If essential information is missing (target users, core features, main problem), CONTINUE
-
-CALCULATE:
-- overall_score = average of completeness, clarity, depth, actionability (all values between 0.0 and 1.0)
-- confidence = overall_score
-
-DECISION LOGIC:
-- If question_count is 10 or more: set shouldContinue to false, reason is max_reached
-- Else if question_count is less than 2: set shouldContinue to true, reason is need_more_context
-- Else if overall_score is 0.75 or higher: set shouldContinue to false, reason is sufficient_info
-- Else: set shouldContinue to true, reason is need_clarification
-
-LANGUAGE MATCHING:
-- Detect the language from user interest and conversation
-- Use the SAME language for your question
-- Keep tone professional yet friendly
-
-OUTPUT FORMAT - You must return ONLY valid JSON with this exact structure:
-- shouldContinue: boolean (true or false)
-- question: string (your next question if shouldContinue is true, empty string if false)
-- reason: string (one of: sufficient_info, need_clarification, max_reached, need_more_context)
-- confidence: number (between 0.0 and 1.0)
-- analysis: object with four number properties (completeness, clarity, depth, actionability, each between 0.0 and 1.0)
-
-IMPORTANT:
-- If shouldContinue is true, provide a thoughtful unique question that fills the biggest gap
-- If shouldContinue is false, question must be empty string
-- Be honest in your assessment - do not artificially inflate scores
-- Consider the QUALITY of answers not just quantity
-- Return ONLY valid JSON, no markdown, no extra text
-"""
+    with span("prompt_build"):
+        prompt = build_continue_prompt(request)
 
     try:
-        chat_completion = client.chat.completions.create(
+        text = await llm.chat_completion(
             messages=[
                 {
                     "role": "user", 
                     "content": prompt
                 }
             ],
-            model=model_llm,
-            temperature=0.7,
             response_format={"type": "json_object"},
+            endpoint="interview.continue",
         )
-        
-        text = chat_completion.choices[0].message.content
         cleaned_text = text.replace("```json", "").replace("```", "").strip()
-        data = json.loads(cleaned_text)
-        print(data)
-        
-        # Validate response structure
-        required_keys = ["shouldContinue", "question", "reason", "confidence", "analysis"]
-        if not all(key in data for key in required_keys):
-            raise ValueError(f"Missing required keys in AI response. Got: {data.keys()}")
-        
-        # Ensure proper types
-        data["shouldContinue"] = bool(data["shouldContinue"])
-        data["confidence"] = float(data["confidence"])
-        
-        return data
+        with span("parse"), routing.invalid_on_error("interview.continue"):
+            data = json.loads(cleaned_text)
+        return check_continue_response(data, question_count)
 
     except Exception as e:
         print(f"Error in continue-interview API: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
 
+@router.post("/continue/stream")
+async def continue_interview_stream(request: IdeaRequest):
+    """Streaming variant of /continue; see _stream_turn for the events."""
+    question_count = len(request.conversation)
+    with span("prompt_build"):
+        prompt = build_continue_prompt(request)
+    return _stream_turn(
+        prompt, "interview.continue",
+        lambda data: check_continue_response(data, question_count)
+    )
+
+def _stream_turn(prompt: str, endpoint: str, check) -> StreamingResponse:
+    """
+    Server-sent events for one interview turn: `question` events carry pieces
+    of the question text as the model writes them (it is the first key of the
+    reply), then `result` carries the whole checked response, the same object
+    the non-streaming endpoint returns, or `error`.
+    """
+    async def events():
+        scanner = JsonObjectStream()
+        data = {}
+        start = time.perf_counter()
+        first_token = True
+        try:
+            # JSON mode is not available with streaming, the prompts already ask for bare JSON
+            async for delta in llm.stream_chat_completion(
+                messages=[{"role": "user", "content": prompt}],
+                endpoint=endpoint
+            ):
+                for kind, key, value in scanner.feed(delta):
+                    if kind == "text" and key == "question":
+                        if first_token:
+                            # What the user waits for before the reply starts appearing
+                            metrics.observe_stage("question_ttfb", time.perf_counter() - start)
+                            first_token = False
+                        yield sse("question", {"delta": value})
+                    elif kind == "value":
+                        data[key] = value
+
+            with span("parse"):
+                data = check(data)
+            yield sse("result", data)
+
+        except Exception as e:
+            print(f"Error in {endpoint} stream: {e}")
+            yield sse("error", {"detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
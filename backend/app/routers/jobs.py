@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException
+from ..fastjson import FastJSONResponse
+from ..jobs import job_queue
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_class=FastJSONResponse)
+async def get_job(job_id: str):
+    """Status, partial progress and (once finished) the result of a background job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    # Results can be whole guides
+    return FastJSONResponse({
+        "jobId": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "result": job["result"],
+        "error": job["error"],
+        "createdAt": job["created_at"],
+        "updatedAt": job["updated_at"]
+    })
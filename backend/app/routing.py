@@ -0,0 +1,136 @@
+import os
+import json
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import NamedTuple, Optional, Tuple
+from . import metrics
+
+# Model routing. Every LLM call names its endpoint, and ROUTES gives the
+# endpoint its model, temperature, completion token budget and fallback
+# chain: small fast models take the short classification-style steps, the
+# blueprint and the guide keep the large ones. LLM_ROUTES (JSON, endpoint ->
+# fields) overrides entries without a code change.
+#
+# A route can run an A/B experiment: `candidate` serves `share` of its calls
+# (falling back to the route's model). Latency, time to first token and
+# outcomes are recorded per endpoint, arm and serving model, so a candidate
+# can be compared with the current model before it is promoted.
+
+LARGE = "llama-3.3-70b-versatile"
+REASONING = "openai/gpt-oss-120b"
+SMALL = "llama-3.1-8b-instant"
+
+
+class RoutePolicy(NamedTuple):
+    model: str
+    temperature: Optional[float] = None
+    # max_completion_tokens; callers may ask for less, never more
+    max_tokens: Optional[int] = None
+    # Tried in order once the model keeps failing or is throttled
+    fallbacks: Tuple[str, ...] = ()
+    candidate: Optional[str] = None
+    share: float = 0.0
+
+
+ROUTES = {
+    "interview.start": RoutePolicy(REASONING, None, 2048, (LARGE,)),
+    # Four scores, a continue/stop decision and one short question
+    "interview.continue": RoutePolicy(SMALL, 0.7, 1024, (LARGE, REASONING)),
+    "idea.list": RoutePolicy(LARGE, 0.8, 4000, (REASONING,)),
+    "idea.blueprint": RoutePolicy(LARGE, 0.7, 6000, (REASONING,)),
+    "idea.schema": RoutePolicy(LARGE, 0.7, 4000, (REASONING,)),
+    # A ~20-line graph at low temperature for consistent syntax; app/mermaid
+    # repairs most slips locally and re-prompts the large model for the rest
+    "idea.flowchart": RoutePolicy(SMALL, 0.1, 2000, (LARGE,)),
+    "idea.flowchart_repair": RoutePolicy(LARGE, 0.1, 2000, (REASONING,)),
+    "guide.outline": RoutePolicy(LARGE, 0.7, 2000, (REASONING,)),
+    "guide.category": RoutePolicy(LARGE, 0.7, 4000, (REASONING,)),
+}
+
+
+def _apply_overrides(routes: dict, overrides: dict):
+    for endpoint, fields in overrides.items():
+        if "fallbacks" in fields:
+            fields = dict(fields, fallbacks=tuple(fields["fallbacks"]))
+        base = routes.get(endpoint) or RoutePolicy(fields.get("model", LARGE))
+        routes[endpoint] = base._replace(**fields)
+
+
+_apply_overrides(ROUTES, json.loads(os.getenv("LLM_ROUTES", "null")) or {})
+
+
+class Choice(NamedTuple):
+    endpoint: str
+    # "control", "candidate", or "pinned" when the caller named the model
+    arm: str
+    # The model to call first, then its fallbacks
+    models: Tuple[str, ...]
+    temperature: Optional[float]
+    max_tokens: Optional[int]
+
+
+def choose(endpoint: str, model: Optional[str] = None) -> Choice:
+    policy = ROUTES.get(endpoint)
+    if policy is None:
+        if model is None:
+            raise ValueError(f"No model route for endpoint {endpoint!r}")
+        return Choice(endpoint, "pinned", (model,), None, None)
+    if model is not None:
+        return Choice(endpoint, "pinned", (model,) + policy.fallbacks, policy.temperature, policy.max_tokens)
+
+    arm, first = "control", policy.model
+    if policy.candidate and random.random() < policy.share:
+        arm, first = "candidate", policy.candidate
+    chain = (first,) + tuple(m for m in (policy.model,) + policy.fallbacks if m != first)
+    return Choice(endpoint, arm, chain, policy.temperature, policy.max_tokens)
+
+
+def apply(choice: Choice, kwargs: dict):
+    """Fill in the route's generation parameters; the caller's own values win, up to the token budget."""
+    if choice.max_tokens is not None:
+        kwargs["max_completion_tokens"] = min(kwargs.get("max_completion_tokens") or choice.max_tokens, choice.max_tokens)
+    if choice.temperature is not None:
+        kwargs.setdefault("temperature", choice.temperature)
+
+
+route_duration = metrics.register(metrics.Histogram(
+    "llm_route_duration_seconds",
+    "LLM call latency (retries and fallbacks included) by endpoint, A/B arm and serving model",
+    ("endpoint", "arm", "model"),
+))
+route_ttfb = metrics.register(metrics.Histogram(
+    "llm_route_ttfb_seconds",
+    "Time to the first streamed token by endpoint, A/B arm and serving model",
+    ("endpoint", "arm", "model"),
+))
+route_outcomes = metrics.register(metrics.Counter(
+    "llm_route_outcomes_total",
+    "Results of LLM calls by endpoint, A/B arm, serving model and outcome (ok, invalid, error, ...)",
+    ("endpoint", "arm", "model", "outcome"),
+))
+
+# endpoint -> (arm, model) of the last call of this request, for record_outcome()
+_served = ContextVar("llm_route_served", default=None)
+
+
+def served(choice: Choice, model: Optional[str]):
+    """Remember who answered `choice` in this context; None for a cache hit, which is not scored again."""
+    _served.set({**(_served.get() or {}), choice.endpoint: (choice.arm, model) if model else None})
+
+
+def record_outcome(endpoint: str, outcome: str):
+    """Score the last completion of `endpoint` in this request, e.g. "ok" or "invalid" once it has been parsed."""
+    entry = (_served.get() or {}).get(endpoint)
+    if entry is not None:
+        route_outcomes.inc(endpoint, entry[0], entry[1], outcome)
+
+
+@contextmanager
+def invalid_on_error(endpoint: str):
+    """Score the completion "invalid" if the block (parsing it) raises."""
+    try:
+        yield
+    except Exception:
+        record_outcome(endpoint, "invalid")
+        raise
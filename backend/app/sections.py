@@ -0,0 +1,82 @@
+import re
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+from .streaming import MarkdownSectionSplitter
+
+# Blueprint sections for incremental guide regeneration. The workbench
+# markdown is split on `##` headings and every section is hashed. A guide
+# stores the section hashes it was built from (guide_sources) and each
+# category the headings it was generated from, so an edit only regenerates
+# the categories whose sections changed.
+
+_HEADING = re.compile(r"^##\s+(.*)")
+
+
+def normalize_heading(heading: str) -> str:
+    return " ".join(re.sub(r"[*_`#]", "", heading).split()).lower()
+
+
+def split_sections(markdown: str) -> "OrderedDict[str, str]":
+    """Map normalized `##` heading -> section text (heading line included). Text before the first heading is keyed ""."""
+    splitter = MarkdownSectionSplitter()
+    chunks = splitter.feed(markdown) + splitter.flush()
+    sections = OrderedDict()
+    for chunk in chunks:
+        match = _HEADING.match(chunk)
+        key = normalize_heading(match.group(1)) if match else ""
+        # Repeated headings are treated as one section
+        sections[key] = sections[key] + chunk if key in sections else chunk
+    return sections
+
+
+def section_hash(text: str) -> str:
+    # Whitespace-only edits do not count as changes
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()[:16]
+
+
+def section_hashes(sections: dict) -> dict:
+    return {key: section_hash(text) for key, text in sections.items() if key}
+
+
+def resolve_sources(category: dict, sections: dict) -> dict:
+    """
+    Turn the outline's `sources` (heading titles as the model wrote them) into
+    known section keys stored on the category. A category without
+    recognisable sources depends on every section.
+    """
+    headings = []
+    for source in category.pop("sources", None) or []:
+        key = normalize_heading(str(source))
+        if key in sections and key not in headings:
+            headings.append(key)
+    category["source_sections"] = headings or [key for key in sections if key]
+    return category
+
+
+def plan_update(existing_categories: list, old_hashes: dict, sections: dict) -> Optional[tuple]:
+    """
+    Compare the blueprint the guide was built from (`old_hashes`) with the new
+    sections and return (unchanged, changed, replan): the stored categories
+    whose source sections are all untouched, the ones that must be
+    regenerated, and the section keys to re-plan (sources of changed
+    categories plus edited or new sections no unchanged category covers).
+    Returns None when the guide predates source tracking.
+    """
+    if not old_hashes or any(not category.get("source_sections") for category in existing_categories):
+        return None
+
+    new_hashes = section_hashes(sections)
+    edited = {key for key in set(new_hashes) | set(old_hashes) if new_hashes.get(key) != old_hashes.get(key)}
+
+    unchanged, changed = [], []
+    for category in existing_categories:
+        if edited.intersection(category["source_sections"]):
+            changed.append(category)
+        else:
+            unchanged.append(category)
+
+    covered = {key for category in unchanged for key in category["source_sections"]}
+    wanted = edited | {key for category in changed for key in category["source_sections"]}
+    replan = [key for key in sections if key in wanted and key not in covered]
+    return unchanged, changed, replan
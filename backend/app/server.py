@@ -0,0 +1,72 @@
+import os
+import uuid
+
+# Process model. Development runs a single process (auto-reload only with
+# RELOAD=true). Production runs WEB_CONCURRENCY uvicorn worker processes, one
+# per core by default, each with its own event loop; requests are spread
+# across them by the kernel on the shared listening socket. This module is
+# imported by the launcher before the app, so it must stay free of app imports.
+
+# Worker processes serving this app; the launcher exports it to the workers
+WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+# Identifies one launch of the server, shared by all its workers, so a worker
+# can tell a sibling's jobs from jobs orphaned by a previous run
+RUN_ID = os.environ.setdefault("APP_RUN_ID", uuid.uuid4().hex)
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def production_settings() -> dict:
+    """uvicorn.run() keyword arguments for production."""
+    workers = _env_int("WEB_CONCURRENCY", os.cpu_count() or 1)
+    settings = {
+        "workers": workers,
+        # Longer than the idle timeout of the proxy in front, so the proxy
+        # closes idle connections first and never reuses one we just closed
+        "timeout_keep_alive": _env_int("KEEP_ALIVE", 65),
+        # Pending connections the kernel queues while all workers are busy
+        "backlog": _env_int("BACKLOG", 2048),
+        # On SIGTERM: stop accepting, then give in-flight requests (SSE
+        # generations included) this long before closing them
+        "timeout_graceful_shutdown": _env_int("GRACEFUL_TIMEOUT", 120),
+        "proxy_headers": True,
+        "access_log": os.getenv("ACCESS_LOG", "false").lower() == "true",
+    }
+    # Answer 503 instead of queueing once a worker has this many open connections
+    limit_concurrency = _env_int("LIMIT_CONCURRENCY", 0)
+    if limit_concurrency:
+        settings["limit_concurrency"] = limit_concurrency
+    # Recycle a worker after this many requests to bound memory growth. Only
+    # with several workers: the supervisor replaces the recycled one while the
+    # others keep serving, whereas a lone worker would take the server down
+    max_requests = _env_int("MAX_REQUESTS", 10000)
+    if max_requests and workers > 1:
+        settings["limit_max_requests"] = max_requests
+    return settings
+
+
+def development_settings() -> dict:
+    return {
+        "workers": 1,
+        "reload": os.getenv("RELOAD", "false").lower() == "true",
+    }
+
+
+def run(production: bool):
+    import uvicorn
+
+    settings = production_settings() if production else development_settings()
+    # Workers read their share of per-process limits (e.g. LLM rate limits) from it
+    os.environ["WEB_CONCURRENCY"] = str(settings["workers"])
+    print(f"Starting {'production' if production else 'development'} server: {settings}")
+    uvicorn.run(
+        "app.main:create_app",
+        factory=True,
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=_env_int("PORT", 8000),
+        **settings,
+    )
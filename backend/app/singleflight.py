@@ -0,0 +1,54 @@
+import json
+import asyncio
+import hashlib
+import weakref
+
+# Request coalescing: concurrent duplicates of the same generation await one
+# shared in-flight task instead of each paying for its own LLM call and write.
+
+
+def flight_key(endpoint: str, project_id: str, *inputs) -> str:
+    digest = hashlib.sha256(
+        json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    ).hexdigest()
+    return f"{endpoint}:{project_id}:{digest}"
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn):
+        """
+        Run `fn()` once per key at a time. Callers arriving while it runs get the
+        same result (or exception). The shared task is shielded, so one caller
+        disconnecting does not cancel it for the others.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+
+class KeyedLock:
+    """One asyncio.Lock per key, dropped once nobody holds or waits on it."""
+
+    def __init__(self):
+        self._locks = weakref.WeakValueDictionary()
+
+    def __call__(self, key: str) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
+
+
+inflight = SingleFlight()
@@ -0,0 +1,199 @@
+import re
+import json
+from .fastjson import loads, dumps
+
+# Helpers for streaming endpoints: server-sent event framing and incremental
+# scanners over a completion that arrives token by token.
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse(event: str, data) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {dumps(data).decode('utf-8')}\n\n"
+
+
+class JsonObjectStream:
+    """
+    Incrementally scan a streamed top-level JSON object.
+
+    feed() returns a list of events:
+      ("text", key, fragment)  decoded pieces of a string value as they arrive
+      ("item", key, element)   each element of an array value as soon as it closes
+      ("value", key, value)    a completed value (strings included, once closed)
+    Anything before the opening brace (e.g. a ```json fence) is ignored. If the
+    stream is cut off, every "item" already emitted is complete and valid.
+    """
+
+    def __init__(self):
+        self.state = "before"
+        self.key = None
+        self.done = False
+        self._raw = []
+        self._text = []
+        self._escape = None
+        self._high_surrogate = None
+        self._depth = 0
+        self._in_string = False
+        self._raw_escape = False
+        self._item_start = None
+
+    def feed(self, chunk: str) -> list:
+        events = []
+        for ch in chunk:
+            if self.done:
+                break
+            self._step(ch, events)
+        return events
+
+    def _step(self, ch, events):
+        state = self.state
+        if state == "before":
+            if ch == "{":
+                self.state = "key_or_end"
+        elif state == "key_or_end":
+            if ch == '"':
+                self._raw = []
+                self._escape = None
+                self.state = "key"
+            elif ch == "}":
+                self.done = True
+        elif state == "key":
+            if self._escape is not None:
+                self._raw.append(ch)
+                self._escape = None
+            elif ch == "\\":
+                self._raw.append(ch)
+                self._escape = ""
+            elif ch == '"':
+                self.key = json.loads('"' + "".join(self._raw) + '"')
+                self.state = "colon"
+            else:
+                self._raw.append(ch)
+        elif state == "colon":
+            if ch == ":":
+                self.state = "value_start"
+        elif state == "value_start":
+            if ch.isspace():
+                return
+            if ch == '"':
+                self._text = []
+                self._escape = None
+                self._high_surrogate = None
+                self.state = "string"
+            else:
+                self._raw = []
+                self._depth = 0
+                self._in_string = False
+                self._raw_escape = False
+                self._item_start = None
+                self.state = "raw"
+                self._step_raw(ch, events)
+        elif state == "string":
+            self._step_string(ch, events)
+        elif state == "raw":
+            self._step_raw(ch, events)
+
+    def _emit_text(self, ch, events):
+        if self._high_surrogate is not None:
+            # Join a \uXXXX surrogate pair into one character
+            ch = (self._high_surrogate + ch).encode("utf-16", "surrogatepass").decode("utf-16", "surrogatepass")
+            self._high_surrogate = None
+        elif "\ud800" <= ch <= "\udbff":
+            self._high_surrogate = ch
+            return
+        self._text.append(ch)
+        if events and events[-1][0] == "text" and events[-1][1] == self.key:
+            events[-1] = ("text", self.key, events[-1][2] + ch)
+        else:
+            events.append(("text", self.key, ch))
+
+    def _step_string(self, ch, events):
+        if self._escape is not None:
+            self._escape += ch
+            if self._escape[0] == "u" and len(self._escape) < 5:
+                return
+            self._emit_text(json.loads('"\\' + self._escape + '"'), events)
+            self._escape = None
+        elif ch == "\\":
+            self._escape = ""
+        elif ch == '"':
+            events.append(("value", self.key, "".join(self._text)))
+            self.state = "key_or_end"
+        else:
+            self._emit_text(ch, events)
+
+    def _step_raw(self, ch, events):
+        if self._in_string:
+            self._raw.append(ch)
+            if self._raw_escape:
+                self._raw_escape = False
+            elif ch == "\\":
+                self._raw_escape = True
+            elif ch == '"':
+                self._in_string = False
+            return
+
+        if self._depth == 0 and ch in ",}":
+            # End of a scalar value
+            events.append(("value", self.key, loads("".join(self._raw))))
+            self.state = "key_or_end"
+            if ch == "}":
+                self.done = True
+            return
+
+        self._raw.append(ch)
+        in_array = self._depth == 1 and self._raw[0] == "["
+        if in_array:
+            if ch in ",]":
+                # End of a scalar element
+                if self._item_start is not None:
+                    self._emit_item(len(self._raw) - 1, events)
+            elif self._item_start is None and not ch.isspace():
+                self._item_start = len(self._raw) - 1
+
+        if ch == '"':
+            self._in_string = True
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+            if self._depth == 1 and self._raw[0] == "[" and self._item_start is not None:
+                self._emit_item(len(self._raw), events)
+            elif self._depth == 0:
+                events.append(("value", self.key, loads("".join(self._raw))))
+                self.state = "key_or_end"
+
+    def _emit_item(self, end, events):
+        events.append(("item", self.key, loads("".join(self._raw[self._item_start:end]))))
+        self._item_start = None
+
+
+_SECTION_HEADING = re.compile(r"^## ", re.MULTILINE)
+
+
+class MarkdownSectionSplitter:
+    """Cut streamed markdown into complete `##` sections as soon as the next heading starts."""
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> list:
+        # Only the tail can hold a heading that was not complete before
+        scan_from = max(1, len(self._buffer) - 3)
+        self._buffer += text
+        sections = []
+        start = 0
+        for match in _SECTION_HEADING.finditer(self._buffer, scan_from):
+            if match.start() > start:
+                sections.append(self._buffer[start:match.start()])
+                start = match.start()
+        self._buffer = self._buffer[start:]
+        return [s for s in sections if s.strip()]
+
+    def flush(self) -> list:
+        rest, self._buffer = self._buffer, ""
+        return [rest] if rest.strip() else []
@@ -0,0 +1,184 @@
+import re
+import json
+from .models import IdeaResponse, BlueprintResponse
+
+# Canned, schema-valid completions for every endpoint, used by the synthetic
+# LLM provider (MOCK_AI_RESPONSES=true). The few values that the handlers
+# echo back (project title, question count, chapter task list) are read from
+# the prompt so multi-step flows behave like the real model.
+
+
+def _prompt(messages: list) -> str:
+    return "\n".join(str(m.get("content", "")) for m in messages)
+
+
+def _match(pattern: str, text: str, default: str) -> str:
+    found = re.search(pattern, text)
+    return found.group(1) if found else default
+
+
+def interview_start(prompt: str) -> dict:
+    return {"question": "Who do you see as the main users of this idea, and what problem do they have today?"}
+
+
+def interview_continue(prompt: str) -> dict:
+    count = int(_match(r"Current question count: (\d+)", prompt, "0"))
+    # Ask three questions, then conclude like a confident model would
+    should_continue = count < 3
+    score = 0.6 if should_continue else 0.85
+    return {
+        "question": "Which feature must be in the very first version, and why?" if should_continue else "",
+        "shouldContinue": should_continue,
+        "reason": ("need_more_context" if count < 2 else "need_clarification") if should_continue else "sufficient_info",
+        "confidence": score,
+        "analysis": {"completeness": score, "clarity": score, "depth": score, "actionability": score},
+    }
+
+
+def idea_list(prompt: str) -> dict:
+    ideas = []
+    for name, focus in (("TaskFlow", "team task tracking"), ("StudyMate", "study planning"), ("ShopLite", "small shop inventory")):
+        ideas.append({
+            "projectName": name,
+            "reasonProjectName": f"The name describes {focus} in one word.",
+            "projectDescription": (
+                f"{name} is a lightweight web app for {focus}. It solves the problem of scattered notes and spreadsheets. "
+                "Users get one place to plan, track and review their work. The MVP focuses on a fast, simple workflow. "
+                "It is small enough to build as a mini-project but useful from day one."
+            ),
+            "uniqueSellingProposition": f"The simplest possible tool for {focus}, usable in under a minute.",
+            "mvpFeatures": ["Account sign-up", "Dashboard overview", "Create and edit items"],
+        })
+    for idea in ideas:
+        IdeaResponse(**idea)
+    return {"ideas": ideas}
+
+
+WORKBENCH_SECTIONS = [
+    ("Fitur Utama (Core Features)", "Users can sign up, create items, organize them into lists and track their progress from a dashboard."),
+    ("Roadmap", "MVP: accounts, items and dashboard. Phase 2: sharing and notifications. Future: mobile app and integrations."),
+    ("Task Breakdown", (
+        "### Frontend\n- Set up the Next.js project\n- Build the dashboard page\n- Build the item editor\n\n"
+        "### Backend\n- Create the FastAPI project\n- Implement item endpoints\n- Add authentication\n\n"
+        "### Database\n- Design the tables\n- Add migrations\n\n"
+        "### DevOps\n- Configure CI\n- Deploy to production"
+    )),
+    ("User Stories", "- As a user, I want to create an item so that I can track my work.\n- As a user, I want to see my progress on a dashboard."),
+    ("System Architecture", "A Next.js frontend talks to a FastAPI backend over JSON. The backend stores data in PostgreSQL through Supabase."),
+    ("API Endpoints", "- POST /api/items creates an item\n- GET /api/items lists items\n- PATCH /api/items/{id} updates an item\n- DELETE /api/items/{id} removes an item\n- GET /api/stats returns dashboard numbers"),
+    ("Strategi Monetisasi", "A free tier for individuals, a paid team plan and an optional one-time export add-on."),
+]
+
+
+def idea_blueprint(prompt: str) -> dict:
+    title = _match(r"- Project Name: (.*)", prompt, "Project")
+    title_reason = _match(r"- Reason for Name: (.*)", prompt, "A short, memorable name.")
+    data = {
+        "projectData": {
+            "title": title,
+            "title_reason": title_reason,
+            "problem_statement": f"People who need {title} today juggle several tools and lose track of their work.",
+            "target_audience": [
+                {"icon": "student", "text": "Students organizing their projects"},
+                {"icon": "professional", "text": "Professionals managing daily work"},
+                {"icon": "user", "text": "Anyone who wants a simple tracker"},
+            ],
+            "success_metrics": [
+                {"type": "Kuantitatif", "text": "1,000 monthly active users within 6 months"},
+                {"type": "Kuantitatif", "text": "40% retention after 30 days"},
+                {"type": "Kualitatif", "text": "Users describe the app as simple to use"},
+            ],
+            "tech_stack": ["Next.js", "TypeScript", "FastAPI", "PostgreSQL", "Supabase"],
+        },
+        "workbenchContent": "\n\n".join(f"## {heading}\n\n{body}" for heading, body in WORKBENCH_SECTIONS),
+    }
+    BlueprintResponse(**data)
+    return data
+
+
+def idea_schema(prompt: str) -> dict:
+    return {
+        "schema": [
+            {
+                "table_name": "users",
+                "columns": [
+                    {"name": "id", "type": "UUID", "is_primary_key": True},
+                    {"name": "email", "type": "TEXT"},
+                    {"name": "created_at", "type": "TIMESTAMPZ"},
+                ],
+            },
+            {
+                "table_name": "items",
+                "columns": [
+                    {"name": "id", "type": "UUID", "is_primary_key": True},
+                    {"name": "title", "type": "TEXT"},
+                    {"name": "is_done", "type": "BOOLEAN"},
+                    {"name": "user_id", "type": "UUID", "is_foreign_key": True, "references": "users(id)"},
+                ],
+            },
+        ]
+    }
+
+
+FLOWCHART = """graph TD
+    User((User)) -->|Request| FE[Frontend]
+    FE -->|API Call| BE[Backend]
+    BE -->|Query| DB[(Database)]
+    BE -->|Auth| Auth{{Auth Service}}"""
+
+
+def guide_outline(prompt: str) -> dict:
+    # Headings of the blueprint itself, after the template's static part
+    headings = re.findall(r"^## (.+)$", prompt.split("PROJECT BLUEPRINT:", 1)[-1], re.MULTILINE)
+    categories = []
+    for name, icon in (("Project Setup", "rocket"), ("Backend", "code"), ("Database", "database")):
+        categories.append({
+            "name": name,
+            "icon": icon,
+            "sources": headings[:2],
+            "tasks": [
+                {"title": f"{name} step {idx}", "description": f"Complete step {idx} of {name.lower()}", "estimated_time": "10 min"}
+                for idx in range(1, 4)
+            ],
+        })
+    return {"categories": categories}
+
+
+def guide_category(prompt: str) -> dict:
+    chapter = prompt.split("TASKS (", 1)[-1].split("\n\n", 1)[0]
+    titles = re.findall(r"^\d+\. (.*?) - ", chapter, re.MULTILINE) or ["Task"]
+    return {
+        "tasks": [
+            {
+                "title": title,
+                "content_blocks": [
+                    {"type": "text", "content": f"Work through {title}."},
+                    {"type": "terminal", "content": "npm install"},
+                    {"type": "code", "language": "typescript", "filename": "src/index.ts", "content": "export const ready = true;"},
+                    {"type": "tip", "content": "💡 Commit after each task."},
+                ],
+            }
+            for title in titles
+        ]
+    }
+
+
+GENERATORS = {
+    "interview.start": interview_start,
+    "interview.continue": interview_continue,
+    "idea.list": idea_list,
+    "idea.blueprint": idea_blueprint,
+    "idea.schema": idea_schema,
+    "guide.outline": guide_outline,
+    "guide.category": guide_category,
+}
+
+
+def completion_for(endpoint: str, messages: list) -> str:
+    """Return the synthetic completion text for one endpoint."""
+    if endpoint in ("idea.flowchart", "idea.flowchart_repair"):
+        return FLOWCHART
+    generate = GENERATORS.get(endpoint)
+    if generate is None:
+        return "{}"
+    return json.dumps(generate(_prompt(messages)), ensure_ascii=False)
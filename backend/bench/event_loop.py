@@ -0,0 +1,102 @@
+"""
+Load test: guide reads must keep flowing while LLM generations are in flight.
+
+Fires concurrent blueprint generations against a fake Groq client that takes
+`--llm-latency` seconds per completion, and meanwhile polls
+GET /api/guide/{project_id}. With the async client the guide reads stay in the
+millisecond range; `--blocking` simulates the old synchronous client (the
+completion sleeps on the event loop) for comparison.
+
+    python -m bench.event_loop --generations 8 --llm-latency 2
+"""
+import time
+import json
+import asyncio
+import argparse
+import statistics
+
+from .fakes import FakeGroq, FakeSupabase, use_placeholder_env
+from .stats import percentile
+
+use_placeholder_env()
+
+import httpx  # noqa: E402
+from app.main import app  # noqa: E402
+from app import llm  # noqa: E402
+from app.routers import guide, idea  # noqa: E402
+
+BLUEPRINT = json.dumps({
+    "projectData": {
+        "title": "Bench",
+        "title_reason": "Benchmark",
+        "problem_statement": "None",
+        "target_audience": [{"icon": "user", "text": "Developers"}],
+        "success_metrics": [{"type": "Kuantitatif", "text": "Fast"}],
+        "tech_stack": ["FastAPI"],
+    },
+    "workbenchContent": "## Fitur Utama\nBench",
+})
+
+BLUEPRINT_REQUEST = {
+    "interest": "bench",
+    "conversation": [],
+    "projectName": "Bench",
+    "projectDescription": "Bench",
+    "mvpFeatures": ["one"],
+    "uniqueSellingProposition": "fast",
+    "reasonProjectName": "bench",
+}
+
+
+async def run(generations: int, llm_latency: float, blocking: bool):
+    llm.client = FakeGroq(lambda *_: BLUEPRINT, latency=llm_latency, blocking=blocking)
+    db = FakeSupabase()
+    guide.supabase = db
+    idea.supabase = db
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        read_latencies = []
+        done = asyncio.Event()
+
+        async def reader():
+            while not done.is_set():
+                start = time.perf_counter()
+                response = await http.get("/api/guide/bench-project")
+                response.raise_for_status()
+                read_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.05)
+
+        async def generator():
+            response = await http.post("/api/idea/generate-blueprint", json=BLUEPRINT_REQUEST)
+            response.raise_for_status()
+
+        start = time.perf_counter()
+        reader_task = asyncio.create_task(reader())
+        await asyncio.gather(*(generator() for _ in range(generations)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await reader_task
+
+    mode = "blocking" if blocking else "async"
+    print(f"mode={mode} generations={generations} llm_latency={llm_latency}s")
+    print(f"  generation wall time: {elapsed:.2f}s")
+    print(f"  guide reads served:   {len(read_latencies)}")
+    if read_latencies:
+        print(f"  guide read p50/p95/max: "
+              f"{statistics.median(read_latencies) * 1000:.1f} / "
+              f"{percentile(read_latencies, 95) * 1000:.1f} / "
+              f"{max(read_latencies) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--generations", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=2.0)
+    parser.add_argument("--blocking", action="store_true", help="simulate the old synchronous Groq client")
+    args = parser.parse_args()
+    asyncio.run(run(args.generations, args.llm_latency, args.blocking))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Local stand-ins for Groq and Supabase used by the benchmark scripts.
+
+Nothing here talks to the network: the fake Supabase client keeps rows in
+memory and counts every `.execute()` as one round trip, and the fake LLM
+client sleeps for a configurable time before returning a canned completion.
+"""
+import os
+import time
+import uuid
+import hashlib
+import asyncio
+from types import SimpleNamespace
+from contextvars import ContextVar
+
+# Per-request round-trip tally; the load test sets a fresh list before each request
+round_trip_tally = ContextVar("round_trip_tally", default=None)
+
+
+def use_placeholder_env():
+    """Set dummy credentials so the routers can be imported offline."""
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+    os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench.bench.bench")
+
+
+def parse_select(columns: str) -> list:
+    """Parse a PostgREST select string into [(name, children-or-None), ...]."""
+    fields, stack, name = [], [], ""
+    current = fields
+    for ch in columns + ",":
+        if ch == "(":
+            children = []
+            current.append((name.strip(), children))
+            stack.append(current)
+            current, name = children, ""
+        elif ch == ")":
+            if name.strip():
+                current.append((name.strip(), None))
+            current, name = stack.pop(), ""
+        elif ch == ",":
+            if name.strip():
+                current.append((name.strip(), None))
+            name = ""
+        else:
+            name += ch
+    return fields
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+    def __iter__(self):
+        # supabase-py results unpack as (data, count)
+        return iter((("data", self.data), ("count", None)))
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.action = "select"
+        self.payload = None
+        self.on_conflict = None
+        self.filters = []
+        self.orders = []
+        self.limit_count = None
+        self.single_row = False
+        self.columns = None
+
+    # Query builders
+    def select(self, *columns, **kwargs):
+        self.action = "select"
+        self.columns = parse_select(",".join(columns)) if columns else None
+        return self
+
+    def insert(self, payload, **kwargs):
+        self.action = "insert"
+        self.payload = payload
+        return self
+
+    def upsert(self, payload, on_conflict=None, **kwargs):
+        self.action = "upsert"
+        self.payload = payload
+        self.on_conflict = on_conflict
+        return self
+
+    def update(self, payload, **kwargs):
+        self.action = "update"
+        self.payload = payload
+        return self
+
+    def delete(self, **kwargs):
+        self.action = "delete"
+        return self
+
+    # Filters
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, desc=False, **kwargs):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count, **kwargs):
+        self.limit_count = count
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    def _matches(self, row):
+        return all(f(row) for f in self.filters)
+
+    def execute(self):
+        self.db.round_trip()
+        if self.db.fail_on and self.db.fail_on(self):
+            raise RuntimeError(f"simulated failure on {self.action} {self.table}")
+
+        rows = self.db.tables.setdefault(self.table, [])
+
+        if self.action in ("insert", "upsert"):
+            payload = self.payload if isinstance(self.payload, list) else [self.payload]
+            saved = []
+            for item in payload:
+                row = dict(item)
+                existing = None
+                if self.action == "upsert" and self.on_conflict:
+                    existing = next((r for r in rows if r.get(self.on_conflict) == row.get(self.on_conflict)), None)
+                if existing is not None:
+                    existing.update(row)
+                    saved.append(dict(existing))
+                else:
+                    row.setdefault("id", str(uuid.uuid4()))
+                    rows.append(row)
+                    saved.append(dict(row))
+            return FakeResult(saved)
+
+        matched = [r for r in rows if self._matches(r)]
+
+        if self.action == "update":
+            for row in matched:
+                row.update(self.payload)
+            return FakeResult([dict(r) for r in matched])
+
+        if self.action == "delete":
+            self.db.delete_rows(self.table, matched)
+            return FakeResult([dict(r) for r in matched])
+
+        for column, desc in reversed(self.orders):
+            matched.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+        if self.limit_count is not None:
+            matched = matched[:self.limit_count]
+        data = [self.db.shape(self.table, r, self.columns) for r in matched]
+        if self.single_row:
+            if not data:
+                raise RuntimeError("JSON object requested, multiple (or no) rows returned")
+            return FakeResult(data[0])
+        return FakeResult(data)
+
+
+class FakeSupabase:
+    """In-memory PostgREST stand-in with round-trip counting and latency."""
+
+    # child table -> (foreign key column, parent table); deletes cascade
+    CASCADES = {
+        "tasks": ("category_id", "task_categories"),
+        "task_content_blocks": ("task_id", "tasks"),
+        "task_progress": ("task_id", "tasks"),
+    }
+
+    def __init__(self, latency: float = 0.0):
+        self.tables = {}
+        self.latency = latency
+        self.round_trips = 0
+        self.fail_on = None
+        self.rpc_handlers = {}
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def round_trip(self):
+        self.round_trips += 1
+        tally = round_trip_tally.get()
+        if tally is not None:
+            tally[0] += 1
+        # supabase-py is synchronous, so the wait blocks the event loop like the real client
+        if self.latency:
+            time.sleep(self.latency)
+
+    def guide_version(self, params):
+        """Stand-in for the guide_version() SQL function (migrations/002)."""
+        project_id = params["p_id"]
+        rows = lambda table: sorted(
+            (r for r in self.tables.get(table, []) if r.get("project_id") == project_id), key=lambda r: str(r.get("id"))
+        )
+        task_ids = {r["id"] for r in rows("tasks")}
+        blocks = sorted(str(r["id"]) for r in self.tables.get("task_content_blocks", []) if r.get("task_id") in task_ids)
+        fingerprint = repr((rows("task_categories"), rows("tasks"), blocks, rows("task_progress")))
+        return hashlib.md5(fingerprint.encode("utf-8")).hexdigest()
+
+    def rpc(self, name, params=None):
+        db = self
+
+        class _Rpc:
+            def execute(self):
+                db.round_trip()
+                handler = db.rpc_handlers.get(name)
+                if handler is None:
+                    raise RuntimeError(f"function {name} does not exist")
+                return FakeResult(handler(params or {}))
+
+        return _Rpc()
+
+    def shape(self, table, row, fields):
+        """Project selected columns and resolve embedded child tables."""
+        if not fields:
+            return dict(row)
+        shaped = {}
+        for name, children in fields:
+            if children is None:
+                if name == "*":
+                    shaped.update(row)
+                else:
+                    shaped[name] = row.get(name)
+                continue
+            fk, parent = self.CASCADES[name]
+            assert parent == table, f"{name} does not reference {table}"
+            shaped[name] = [
+                self.shape(name, child, children)
+                for child in self.tables.get(name, [])
+                if child.get(fk) == row.get("id")
+            ]
+        return shaped
+
+    def delete_rows(self, table, doomed):
+        ids = {r.get("id") for r in doomed}
+        self.tables[table] = [r for r in self.tables.get(table, []) if r.get("id") not in ids]
+        for child, (fk, parent) in self.CASCADES.items():
+            if parent == table:
+                children = [r for r in self.tables.get(child, []) if r.get(fk) in ids]
+                if children:
+                    self.delete_rows(child, children)
+
+
+class FakeCompletions:
+    def __init__(self, responder, latency, blocking):
+        self.responder = responder
+        self.latency = latency
+        self.blocking = blocking
+        self.calls = 0
+
+    async def create(self, messages, model, **kwargs):
+        self.calls += 1
+        if self.blocking:
+            time.sleep(self.latency)
+        else:
+            await asyncio.sleep(self.latency)
+        content = self.responder(messages, model, kwargs)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=0, completion_tokens=0, total_tokens=0),
+        )
+
+
+class FakeGroq:
+    """
+    Async Groq stand-in: sleeps `latency` seconds, then answers via `responder`.
+    With `blocking=True` the sleep holds the event loop, like a synchronous client.
+    """
+
+    def __init__(self, responder, latency: float = 1.0, blocking: bool = False):
+        self.chat = SimpleNamespace(completions=FakeCompletions(responder, latency, blocking))
+
+    async def close(self):
+        pass
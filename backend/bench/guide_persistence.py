@@ -0,0 +1,133 @@
+"""
+Benchmark: guide persistence round trips, row-by-row inserts vs the
+GuideWriter path generate-guide uses (category shells in one insert, then each
+task with its blocks as it streams in, the previous guide deleted last).
+
+Runs against the in-memory Supabase stand-in with a per-call latency, so the
+wall time reflects what the round trips would cost over the network.
+
+    python -m bench.guide_persistence --categories 6 --tasks 5 --blocks 4 --latency 0.02
+"""
+import time
+import argparse
+
+from .fakes import FakeSupabase
+from app.guide_store import GuideWriter
+
+
+def sample_guide(categories: int, tasks: int, blocks: int) -> list:
+    return [
+        {
+            "name": f"Category {c}",
+            "icon": "code",
+            "tasks": [
+                {
+                    "title": f"Task {c}.{t}",
+                    "description": "Bench task",
+                    "estimated_time": "10 min",
+                    "content_blocks": [
+                        {"type": "code", "language": "python", "filename": "main.py", "content": "print('hi')\n" * 20}
+                        for _ in range(blocks)
+                    ]
+                }
+                for t in range(tasks)
+            ]
+        }
+        for c in range(categories)
+    ]
+
+
+def persist_guide_row_by_row(db, project_id: str, categories: list):
+    """The previous persistence loop: one round trip per category, task and block."""
+    existing = db.table("task_categories").select("id").eq("project_id", project_id).execute()
+    if existing.data and len(existing.data) > 0:
+        db.table("task_categories").delete().eq("project_id", project_id).execute()
+
+    for cat_idx, category in enumerate(categories):
+        cat_result = db.table("task_categories").insert({
+            "project_id": project_id,
+            "name": category["name"],
+            "icon": category.get("icon", "folder"),
+            "display_order": cat_idx
+        }).execute()
+        category_id = cat_result.data[0]["id"]
+        for task_idx, task in enumerate(category.get("tasks", [])):
+            task_result = db.table("tasks").insert({
+                "category_id": category_id,
+                "project_id": project_id,
+                "title": task["title"],
+                "description": task.get("description", ""),
+                "estimated_time": task.get("estimated_time"),
+                "display_order": task_idx
+            }).execute()
+            task_id = task_result.data[0]["id"]
+            for block_idx, block in enumerate(task.get("content_blocks", [])):
+                db.table("task_content_blocks").insert({
+                    "task_id": task_id,
+                    "block_type": block["type"],
+                    "content": block["content"],
+                    "language": block.get("language"),
+                    "filename": block.get("filename"),
+                    "display_order": block_idx
+                }).execute()
+
+
+def persist_streamed(db, project_id: str, categories: list):
+    """What _generate_guide does, with every task arriving on its own."""
+    writer = GuideWriter(db, project_id)
+    try:
+        previous_category_ids = writer.existing_category_ids()
+        saved_categories = writer.write_category_shells(list(enumerate(categories)))
+        for category, saved in zip(categories, saved_categories):
+            for task_idx, task in enumerate(category.get("tasks", [])):
+                saved["tasks"] += writer.write_tasks(saved["id"], [(task_idx, task)])
+        writer.delete_categories(previous_category_ids)
+    except Exception:
+        writer.rollback()
+        raise
+    return saved_categories
+
+
+def measure(name: str, persist, guide: list, latency: float):
+    db = FakeSupabase(latency=latency)
+    # Regeneration case: a guide already exists
+    persist(db, "bench-project", guide)
+    db.round_trips = 0
+    start = time.perf_counter()
+    persist(db, "bench-project", guide)
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<12} {db.round_trips:>5} round trips  {elapsed * 1000:>8.1f} ms")
+    return db
+
+
+def check_rollback(guide: list):
+    db = FakeSupabase()
+    persist_streamed(db, "bench-project", guide)
+    before = {table: len(rows) for table, rows in db.tables.items()}
+    db.fail_on = lambda query: query.table == "task_content_blocks" and query.action == "insert"
+    try:
+        persist_streamed(db, "bench-project", guide)
+    except RuntimeError:
+        pass
+    after = {table: len(rows) for table, rows in db.tables.items()}
+    status = "ok" if before == after else f"FAILED {before} != {after}"
+    print(f"  rollback on failed block insert leaves previous guide intact: {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--categories", type=int, default=6)
+    parser.add_argument("--tasks", type=int, default=5)
+    parser.add_argument("--blocks", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per round trip")
+    args = parser.parse_args()
+
+    guide = sample_guide(args.categories, args.tasks, args.blocks)
+    print(f"guide {args.categories}x{args.tasks}x{args.blocks}, {args.latency * 1000:.0f} ms per round trip")
+    measure("row-by-row", persist_guide_row_by_row, guide, args.latency)
+    measure("streamed", persist_streamed, guide, args.latency)
+    check_rollback(guide)
+
+
+if __name__ == "__main__":
+    main()
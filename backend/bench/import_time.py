@@ -0,0 +1,112 @@
+"""
+Import-time budget: imports app.main in fresh interpreters without any
+credentials and fails (exit 1) when the median import takes longer than the
+budget, when the import needs GROQ_API_KEY / SUPABASE_*, or when a client SDK
+that is meant to load lazily is imported eagerly. Run it in CI next to the
+deploy, since cold start is what a scaled-to-zero instance pays.
+
+    python -m bench.import_time
+    python -m bench.import_time --budget 1.2 --runs 9 --top 15
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Median seconds for `import app.main`; override with IMPORT_TIME_BUDGET
+DEFAULT_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "1.5"))
+
+# Packages that must only be imported when their client is first used
+DEFERRED = ["supabase", "gotrue", "postgrest", "storage3", "realtime"]
+
+CHILD = """
+import sys, time, json
+start = time.perf_counter()
+import app.main
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (DEFERRED,)
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    # Empty values shadow .env too: load_dotenv() does not override set variables
+    for name in ("GROQ_API_KEY", "SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY", "SUPABASE_KEY"):
+        env[name] = ""
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def measure() -> dict:
+    proc = subprocess.run([sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"import app.main failed without credentials:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def slowest_modules(top: int) -> list:
+    """
+    (cumulative seconds, self seconds, module, imported by) from -X importtime
+    for the app's own modules and the packages they import directly, slowest
+    first, so a slow cold start points at the app module responsible.
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                          cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            # Nested imports are indented and listed before the module that triggered them
+            rows.append((len(name) - len(name.lstrip()), int(cumulative) / 1e6, int(own) / 1e6, name.strip()))
+
+    entries, parents = [], []
+    for depth, cumulative, own, name in reversed(rows):
+        while parents and parents[-1][0] >= depth:
+            parents.pop()
+        parent = parents[-1][1] if parents else ""
+        parents.append((depth, name))
+        if name == "app" or name.startswith("app.") or parent.startswith("app"):
+            entries.append((cumulative, own, name, parent))
+    return sorted(entries, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="median seconds allowed")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest app modules and their imports to list")
+    args = parser.parse_args()
+
+    # The first run also warms the bytecode and filesystem caches
+    measure()
+    runs = [measure() for _ in range(args.runs)]
+    seconds = [run["seconds"] for run in runs]
+    median = statistics.median(seconds)
+    loaded = sorted({m for run in runs for m in run["loaded"]})
+
+    print(f"import app.main: median {median * 1000:.0f} ms, min {min(seconds) * 1000:.0f} ms, "
+          f"max {max(seconds) * 1000:.0f} ms over {args.runs} runs (budget {args.budget * 1000:.0f} ms)")
+    print(f"\n{'cumulative ms':>13}  {'self ms':>8}  module (imported by)")
+    for cumulative, own, name, parent in slowest_modules(args.top):
+        print(f"{cumulative * 1000:>13.1f}  {own * 1000:>8.1f}  {name}" + (f" ({parent})" if parent else ""))
+
+    failures = []
+    if median > args.budget:
+        failures.append(f"median import time {median:.3f}s is over the {args.budget:.3f}s budget")
+    if loaded:
+        failures.append(f"imported eagerly: {', '.join(loaded)} (should load on first use)")
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
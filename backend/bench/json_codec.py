@@ -0,0 +1,122 @@
+"""
+Benchmark: JSON encode/decode time and peak memory on a large guide payload.
+
+Compares what a route returning a dict costs by default (jsonable_encoder
+followed by the stdlib encoder JSONResponse uses) with the stdlib encoder
+alone and with app.fastjson (orjson when installed), and json.loads with
+fastjson.loads for parsing the same payload back.
+
+    python -m bench.json_codec
+    python -m bench.json_codec --categories 8 --tasks 10 --blocks 6 --block-chars 1200 --repeat 20
+"""
+import json
+import time
+import argparse
+import tracemalloc
+
+from app import fastjson
+
+try:
+    from fastapi.encoders import jsonable_encoder
+except ImportError:
+    jsonable_encoder = None
+
+CODE_LINE = "    const result = await client.from('items').select('*').eq('user_id', userId); // ambil data 📦\n"
+
+
+def sample_guide(categories: int, tasks: int, blocks: int, block_chars: int) -> dict:
+    """A guide in the GET /api/guide response shape."""
+    content = (CODE_LINE * (block_chars // len(CODE_LINE) + 1))[:block_chars]
+    guide = {
+        "categories": [
+            {
+                "id": f"00000000-0000-0000-0000-{c:012d}",
+                "name": f"Category {c}",
+                "icon": "code",
+                "display_order": c,
+                "tasks": [
+                    {
+                        "id": f"00000000-0000-0000-{c:04d}-{t:012d}",
+                        "title": f"Task {c}.{t}",
+                        "description": "Set up the data access layer and wire it to the dashboard.",
+                        "estimated_time": "15 min",
+                        "display_order": t,
+                        "is_completed": t % 3 == 0,
+                        "content_blocks": [
+                            {
+                                "id": f"00000000-{c:04d}-{t:04d}-{b:04d}-000000000000",
+                                "type": "code",
+                                "content": content,
+                                "language": "typescript",
+                                "filename": f"src/task_{t}.ts",
+                                "display_order": b
+                            }
+                            for b in range(blocks)
+                        ]
+                    }
+                    for t in range(tasks)
+                ]
+            }
+            for c in range(categories)
+        ]
+    }
+    guide["total_tasks"] = categories * tasks
+    guide["completed_tasks"] = sum(task["is_completed"] for cat in guide["categories"] for task in cat["tasks"])
+    return guide
+
+
+def stdlib_dumps(value) -> bytes:
+    # What fastapi.responses.JSONResponse.render does
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def measure(fn, arg, repeat: int) -> tuple:
+    """(mean seconds, peak traced bytes of one call)."""
+    fn(arg)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--categories", type=int, default=6)
+    parser.add_argument("--tasks", type=int, default=8)
+    parser.add_argument("--blocks", type=int, default=5)
+    parser.add_argument("--block-chars", type=int, default=800, help="characters per content block")
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    guide = sample_guide(args.categories, args.tasks, args.blocks, args.block_chars)
+    body = stdlib_dumps(guide)
+    print(f"payload: {len(body) / 1024:.0f} KiB, {args.categories * args.tasks} tasks, fastjson backend: {fastjson.BACKEND}")
+
+    encoders = [("json.dumps", stdlib_dumps)]
+    if jsonable_encoder is not None:
+        encoders.insert(0, ("jsonable_encoder + json.dumps", lambda value: stdlib_dumps(jsonable_encoder(value))))
+    encoders.append(("fastjson.dumps", fastjson.dumps))
+    decoders = [
+        ("json.loads", json.loads),
+        ("fastjson.loads", fastjson.loads),
+    ]
+
+    header = f"{'':<7} {'path':<30} {'mean ms':>9} {'peak KiB':>9}"
+    print(header)
+    print("-" * len(header))
+    for stage, paths in (("encode", [(name, fn, guide) for name, fn in encoders]),
+                         ("decode", [(name, fn, body) for name, fn in decoders])):
+        for name, fn, arg in paths:
+            elapsed, peak = measure(fn, arg, args.repeat)
+            print(f"{stage:<7} {name:<30} {elapsed * 1000:>9.2f} {peak / 1024:>9.0f}")
+            stage = ""
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+End-to-end load test: boots app.main:app in-process against the fake Supabase
+(per-call latency, blocking like supabase-py) and the synthetic LLM provider
+(latency drawn from a MOCK_AI_LATENCY-style spec), then drives a weighted mix
+of interview turns, blueprint generations, guide reads and progress toggles
+from `--users` concurrent clients.
+
+Reports throughput, p50/p95/p99 per route and Supabase round trips per
+request. `--save` writes the results as JSON; `--baseline` compares against a
+saved run and exits non-zero when a route's p95 regresses by more than
+`--max-regression` percent.
+
+    python -m bench.load --users 20 --duration 30 --llm-latency lognormal:1.5,0.4 --db-latency 0.01
+    python -m bench.load --save baseline.json
+    python -m bench.load --baseline baseline.json --max-regression 15
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+from .fakes import FakeSupabase, round_trip_tally, use_placeholder_env
+from .stats import percentile
+
+use_placeholder_env()
+
+import httpx  # noqa: E402
+from app.main import app  # noqa: E402
+from app import llm, providers  # noqa: E402
+from app.routers import guide, idea  # noqa: E402
+
+DEFAULT_MIX = "interview=3,blueprint=1,guide_read=8,progress=4"
+
+INTERESTS = ["A workout planner app", "Aplikasi kasir untuk warung kopi", "A recipe sharing site"]
+
+
+class Workload:
+    """The operations a simulated user performs, keyed by the names used in --mix."""
+
+    def __init__(self, http: httpx.AsyncClient, db: FakeSupabase, projects: list):
+        self.http = http
+        self.db = db
+        self.projects = projects
+        # Last ETag per project, revalidated like a browser would
+        self.etags = {}
+
+    async def interview(self):
+        turns = random.randint(0, 4)
+        conversation = [
+            {"question": f"Question {idx}?", "answer": f"Answer {idx} with some detail about the idea."}
+            for idx in range(turns)
+        ]
+        return "POST /api/interview/continue", await self.http.post(
+            "/api/interview/continue",
+            json={"interest": random.choice(INTERESTS), "conversation": conversation},
+        )
+
+    async def blueprint(self):
+        return "POST /api/idea/generate-blueprint", await self.http.post("/api/idea/generate-blueprint", json={
+            "interest": random.choice(INTERESTS),
+            "conversation": [],
+            "projectName": "Bench",
+            "projectDescription": "A project generated by the load test",
+            "mvpFeatures": ["Sign up", "Dashboard"],
+            "uniqueSellingProposition": "Fast",
+            "reasonProjectName": "Short and clear",
+        })
+
+    async def guide_read(self):
+        project_id = random.choice(self.projects)
+        etag = self.etags.get(project_id)
+        response = await self.http.get(f"/api/guide/{project_id}", headers={"If-None-Match": etag} if etag else None)
+        if response.headers.get("etag"):
+            self.etags[project_id] = response.headers["etag"]
+        return "GET /api/guide/{project_id}", response
+
+    async def progress(self):
+        task = random.choice(self.db.tables.get("tasks") or [{}])
+        return "POST /api/guide/progress", await self.http.post("/api/guide/progress", json={
+            "taskId": task.get("id", "missing"),
+            "projectId": task.get("project_id", "missing"),
+            "isCompleted": random.random() < 0.5,
+        })
+
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+async def run(args) -> dict:
+    # The load test measures the service, not the Groq tier's rate limit
+    llm.REQUESTS_PER_MINUTE = 0
+    llm.TOKENS_PER_MINUTE = 0
+    llm._limiters.clear()
+    llm.provider = providers.SyntheticProvider(providers.LatencyModel(args.llm_latency))
+
+    db = FakeSupabase(latency=args.db_latency)
+    db.rpc_handlers["get_project_owner"] = lambda params: f"owner-{params['p_id']}"
+    db.rpc_handlers["guide_version"] = db.guide_version
+    guide.supabase = db
+    idea.supabase = db
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        projects = [f"project-{idx}" for idx in range(args.projects)]
+        for project_id in projects:
+            response = await http.post(f"/api/guide/generate/{project_id}", json={"workbenchContent": "## Task Breakdown\nBench"})
+            response.raise_for_status()
+
+        workload = Workload(http, db, projects)
+        mix = parse_mix(args.mix)
+        operations = [getattr(workload, name) for name in mix]
+        weights = list(mix.values())
+        deadline = time.perf_counter() + args.duration
+
+        async def user():
+            while time.perf_counter() < deadline:
+                operation = random.choices(operations, weights)[0]
+                tally = [0]
+                token = round_trip_tally.set(tally)
+                start = time.perf_counter()
+                try:
+                    route, response = await operation()
+                    ok = response.status_code < 400
+                except Exception:
+                    route, ok = operation.__name__, False
+                finally:
+                    round_trip_tally.reset(token)
+                stats = results.setdefault(route, {"latencies": [], "errors": 0, "round_trips": 0})
+                stats["latencies"].append(time.perf_counter() - start)
+                stats["round_trips"] += tally[0]
+                stats["errors"] += 0 if ok else 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(args.users)))
+        elapsed = time.perf_counter() - start
+
+    return summarize(results, elapsed)
+
+
+def summarize(results: dict, elapsed: float) -> dict:
+    routes = {}
+    for route, stats in sorted(results.items()):
+        latencies = stats["latencies"]
+        routes[route] = {
+            "requests": len(latencies),
+            "errors": stats["errors"],
+            "rps": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "db_round_trips": stats["round_trips"] / len(latencies),
+        }
+    total = sum(route["requests"] for route in routes.values())
+    return {"elapsed_s": elapsed, "requests": total, "rps": total / elapsed, "routes": routes}
+
+
+def print_report(summary: dict, baseline: dict = None):
+    print(f"{summary['requests']} requests in {summary['elapsed_s']:.1f}s ({summary['rps']:.1f} req/s)")
+    header = f"{'route':<36} {'reqs':>6} {'err':>4} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'db/req':>7}"
+    print(header)
+    print("-" * len(header))
+    for route, stats in summary["routes"].items():
+        print(
+            f"{route:<36} {stats['requests']:>6} {stats['errors']:>4} {stats['rps']:>7.1f} "
+            f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['db_round_trips']:>7.1f}"
+        )
+        before = (baseline or {}).get("routes", {}).get(route)
+        if before:
+            print(
+                f"{'  vs baseline':<36} {'':>6} {'':>4} {_delta(before['rps'], stats['rps']):>7} "
+                f"{_delta(before['p50_ms'], stats['p50_ms']):>9} {_delta(before['p95_ms'], stats['p95_ms']):>9} "
+                f"{_delta(before['p99_ms'], stats['p99_ms']):>9} {_delta(before['db_round_trips'], stats['db_round_trips']):>7}"
+            )
+
+
+def _delta(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.0f}%"
+
+
+def regressions(summary: dict, baseline: dict, max_regression: float) -> list:
+    failed = []
+    for route, stats in summary["routes"].items():
+        before = baseline.get("routes", {}).get(route)
+        if before and before["p95_ms"] and (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 > max_regression:
+            failed.append(route)
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="concurrent simulated clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds to run")
+    parser.add_argument("--projects", type=int, default=5, help="projects seeded with a generated guide")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="weighted operations, e.g. " + DEFAULT_MIX)
+    parser.add_argument("--llm-latency", default="lognormal:1.0,0.4", help="MOCK_AI_LATENCY-style spec per completion")
+    parser.add_argument("--db-latency", type=float, default=0.01, help="seconds per Supabase round trip")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results saved with --save")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed p95 increase in percent")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    summary = asyncio.run(run(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(summary, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(summary, f, indent=2)
+    if baseline:
+        failed = regressions(summary, baseline, args.max_regression)
+        if failed:
+            print(f"p95 regressed more than {args.max_regression:.0f}% on: {', '.join(failed)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
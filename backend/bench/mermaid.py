@@ -0,0 +1,60 @@
+"""
+Mermaid repair: how many typical model outputs parse after the local repair
+and how many would still need a re-prompt, plus the repair time per chart.
+
+    python -m bench.mermaid
+    python -m bench.mermaid --repeat 2000 --verbose
+"""
+import time
+import argparse
+
+from app import mermaid
+from app.synthetic import FLOWCHART
+
+# Failure modes seen in idea.flowchart outputs, one chart each
+CORPUS = {
+    "clean": FLOWCHART,
+    "fenced with prose": "```mermaid\nHere is the architecture:\n" + FLOWCHART + "\n```",
+    "label spaces and |>": "graph TD\n    User((User)) -->| Request |> FE[Frontend]\n    FE -->|API Call |BE[Backend]",
+    "mixed hexagon brackets": "graph TD\n    BE -->|Auth| Auth{(Auth Service)}\n    BE --> Cache({Redis})",
+    "unclosed shapes": "graph TD\n    FE[Frontend --> BE[Backend\n    BE --> DB[(Database)",
+    "brackets inside text": "graph TD\n    FE[Frontend (Next.js)] -->|REST (JSON)| BE[Backend [FastAPI]]",
+    "spaced ids and end": "graph TD\n    Api Gateway[Gateway] --> Order Service[Orders]\n    Order Service --> end",
+    "short arrows": "graph TD\n    A -> B\n    B -- sends --> C\n    C -->> D",
+    "no header": "User --> FE[Frontend]\nFE --> BE[Backend]",
+    "open subgraph": "graph TD\n    subgraph Backend\n    BE --> DB[(Database)]",
+    "unclosed label": "graph TD\n    FE -->|API Call BE[Backend]\n    BE --> DB[(Database)]",
+    "dangling edge": "graph TD\n    FE --> BE[Backend]\n    BE -->",
+    "prose after header": "graph TD\n    This diagram shows the main flow\n" + FLOWCHART.split("\n", 1)[1],
+    "trailing prose": FLOWCHART + "\nThis flowchart illustrates the architecture.\nNote: the API talks to the database.",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=500, help="repairs per chart for the timing")
+    parser.add_argument("--verbose", action="store_true", help="print repaired code and diagnostics")
+    args = parser.parse_args()
+
+    header = f"{'case':<24} {'result':<9} {'repairs':>7} {'errors':>6} {'us/chart':>9}"
+    print(header)
+    print("-" * len(header))
+    reprompts = 0
+    for name, output in CORPUS.items():
+        result = mermaid.repair(output)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            mermaid.repair(output)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        repairs = len(result.diagnostics) - len(result.errors)
+        reprompts += not result.ok
+        print(f"{name:<24} {'ok' if result.ok else 're-prompt':<9} {repairs:>7} {len(result.errors):>6} {elapsed * 1e6:>9.1f}")
+        if args.verbose:
+            print(result.code)
+            for diagnostic in result.diagnostics:
+                print(f"    line {diagnostic.line}: {diagnostic.code} - {diagnostic.message}")
+    print(f"\nre-prompts: {reprompts}/{len(CORPUS)} (every broken chart was a user-triggered regeneration before)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Prompt template sizes: static (cacheable) prefix vs variable suffix per template.
+
+Renders every registered template with representative inputs and prints its
+version, hash, estimated static and dynamic tokens and the share of the
+prompt a provider-side prefix cache can reuse. Run it before and after a
+prompt change to compare.
+
+    python -m bench.prompts
+    python -m bench.prompts --turns 10 --answer-chars 400
+"""
+import json
+import argparse
+
+from .fakes import use_placeholder_env
+
+use_placeholder_env()
+
+from app import prompts  # noqa: E402
+from app.conversation import fit_prompt  # noqa: E402
+from app.llm import estimate_tokens  # noqa: E402
+from app.synthetic import idea_blueprint, FLOWCHART  # noqa: E402
+
+
+def sample_values(turns: int, answer_chars: int) -> dict:
+    conversation = [
+        {"question": f"Question {idx} about the users and features?", "answer": ("detail " * answer_chars)[:answer_chars]}
+        for idx in range(turns)
+    ]
+    workbench = idea_blueprint("")["workbenchContent"]
+    return {
+        "interview.start": {"interest": "A workout planner app"},
+        "interview.continue": {"conversation": conversation, "interest": "A workout planner app", "question_count": turns},
+        "idea.list": {"conversation": conversation, "interest": "A workout planner app"},
+        "idea.blueprint": {
+            "conversation": conversation,
+            "interest": "A workout planner app",
+            "project_description": "Plan weekly workouts and track progress.",
+            "project_name": "FitPlan",
+            "reason_project_name": "Short and descriptive",
+            "unique_selling_proposition": "Plans adapt to missed sessions",
+            "mvp_features": json.dumps(["Workout plans", "Progress log", "Reminders"]),
+        },
+        "idea.schema": {"project_context": workbench},
+        "idea.flowchart": {"project_context": workbench},
+        "idea.flowchart_repair": {"problems": "- line 3: BE -->|Query DB[(Database)]\n  problem: edge label has no closing '|'", "chart": FLOWCHART},
+        "guide.outline": {"workbench_content": workbench},
+        "guide.category": {
+            "workbench_content": workbench,
+            "category_name": "Backend",
+            "task_list": "1. Create the API - FastAPI project\n2. Add auth - JWT login",
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=6, help="interview turns in the sample conversation")
+    parser.add_argument("--answer-chars", type=int, default=300, help="length of each sample answer")
+    args = parser.parse_args()
+
+    values = sample_values(args.turns, args.answer_chars)
+    header = f"{'template':<20} {'ver':>3} {'hash':<16} {'static':>7} {'dynamic':>8} {'cacheable':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, template in prompts.TEMPLATES.items():
+        params = dict(values[name])
+        conversation = params.pop("conversation", None)
+        if conversation is not None:
+            prompt = fit_prompt(name, conversation, **params)
+        else:
+            prompt = template.render(**params)
+        total = estimate_tokens(prompt)
+        dynamic = total - template.static_tokens
+        print(
+            f"{name:<20} {template.version:>3} {template.hash:<16} {template.static_tokens:>7} "
+            f"{dynamic:>8} {template.static_tokens / total:>9.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
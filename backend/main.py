@@ -1,5 +1,16 @@
-import uvicorn
-from app.main import app
+import os
+import argparse
+from dotenv import load_dotenv
+
+# app.server reads WEB_CONCURRENCY and friends on import, so .env comes first
+load_dotenv()
+
+from app import server
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # python main.py               development (RELOAD=true for auto-reload)
+    # python main.py --production  worker processes, see app/server.py
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--production", action="store_true", default=os.getenv("APP_ENV") == "production")
+    args = parser.parse_args()
+    server.run(production=args.production)
@@ -0,0 +1,11 @@
+-- Incremental guide regeneration: remember which blueprint sections a guide
+-- and each of its categories were generated from.
+
+ALTER TABLE task_categories
+    ADD COLUMN IF NOT EXISTS source_sections text[] NOT NULL DEFAULT '{}';
+
+CREATE TABLE IF NOT EXISTS guide_sources (
+    project_id uuid PRIMARY KEY REFERENCES projects(id) ON DELETE CASCADE,
+    section_hashes jsonb NOT NULL DEFAULT '{}'::jsonb,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
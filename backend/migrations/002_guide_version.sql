@@ -0,0 +1,20 @@
+-- Conditional GET for guides: a fingerprint of everything GET /api/guide
+-- returns, so an unchanged guide can be answered with 304 without loading
+-- the nested categories, tasks and blocks. Content blocks are only ever
+-- inserted or deleted, so their ids are enough.
+
+CREATE OR REPLACE FUNCTION guide_version(p_id uuid)
+RETURNS text
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT md5(concat_ws('|',
+        (SELECT string_agg(c::text, ',' ORDER BY c.id) FROM task_categories c WHERE c.project_id = p_id),
+        (SELECT string_agg(t::text, ',' ORDER BY t.id) FROM tasks t WHERE t.project_id = p_id),
+        (SELECT string_agg(b.id::text, ',' ORDER BY b.id)
+            FROM task_content_blocks b JOIN tasks t ON t.id = b.task_id
+            WHERE t.project_id = p_id),
+        (SELECT string_agg(p.task_id::text || ':' || p.is_completed::text || ':' || coalesce(p.updated_at::text, ''), ',' ORDER BY p.task_id)
+            FROM task_progress p WHERE p.project_id = p_id)
+    ));
+$$;
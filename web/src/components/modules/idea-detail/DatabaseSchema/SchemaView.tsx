@@ -216,6 +216,8 @@ export default function SchemaView({
       const data: SchemaResponse = await api.generateDatabaseSchema({
         projectId: project.id,
         projectContext: fullContext,
+        // A re-generate must not get the cached schema back
+        bypassCache: hasSchema,
       });
 
       transformDataToFlow(data);
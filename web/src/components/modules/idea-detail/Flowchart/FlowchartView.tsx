@@ -32,6 +32,16 @@ interface FlowchartViewProps {
   blueprintContext: string;
 }
 
+// The backend quotes node/edge text that contains brackets: A["Text (x)"]
+function unquoteLabel(text: string): string {
+  const trimmed = text.trim();
+  const inner =
+    trimmed.length >= 2 && trimmed.startsWith('"') && trimmed.endsWith('"')
+      ? trimmed.slice(1, -1)
+      : trimmed;
+  return inner.replace(/#quot;/g, '"');
+}
+
 // Parse Mermaid graph TD to ReactFlow nodes/edges
 function parseMermaidToReactFlow(mermaidCode: string): {
   nodes: Node[];
@@ -63,7 +73,7 @@ function parseMermaidToReactFlow(mermaidCode: string): {
       pattern.lastIndex = 0;
       while ((match = pattern.exec(testLine)) !== null) {
         const id = match[1];
-        const label = match[2];
+        const label = unquoteLabel(match[2]);
         if (!nodeMap.has(id)) {
           nodeMap.set(id, { label, shape: "default" });
         }
@@ -78,7 +88,7 @@ function parseMermaidToReactFlow(mermaidCode: string): {
     let match;
     while ((match = edgePattern.exec(line)) !== null) {
       const source = match[1];
-      const label = match[2]?.trim() || "";
+      const label = unquoteLabel(match[2] || "");
       // Extract target (might have shape definition after it)
       const targetPart = match[3];
       const target = targetPart.replace(/[\[\(\{].*$/, "");
@@ -199,7 +209,12 @@ export const FlowchartView = ({
     toast.info("AI is generating your system architecture...");
 
     try {
-      const data = await api.generateFlowchart(projectId, blueprintContext);
+      // A re-generate must not get the cached chart back
+      const data = await api.generateFlowchart(
+        projectId,
+        blueprintContext,
+        hasFlowchart
+      );
       setChartCode(data.chart);
       const { nodes: parsedNodes, edges: parsedEdges } =
         parseMermaidToReactFlow(data.chart);
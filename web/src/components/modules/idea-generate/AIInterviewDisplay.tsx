@@ -16,6 +16,7 @@ function AIInterviewDisplayContent() {
     sessionState,
     isLoading,
     isSaving,
+    isStreaming,
     currentAnswer,
     setCurrentAnswer,
     handleStartInterview,
@@ -56,6 +57,7 @@ function AIInterviewDisplayContent() {
           setCurrentAnswer={setCurrentAnswer}
           handleContinue={handleContinueInterview}
           isLoading={isLoading}
+          isStreaming={isStreaming}
         />
       );
     case "showOptions":
@@ -11,6 +11,7 @@ interface InterviewingStepProps {
   setCurrentAnswer: (value: string) => void;
   handleContinue: () => void;
   isLoading: boolean;
+  isStreaming?: boolean;
 }
 
 export const InterviewingStep = ({
@@ -19,6 +20,7 @@ export const InterviewingStep = ({
   setCurrentAnswer,
   handleContinue,
   isLoading,
+  isStreaming = false,
 }: InterviewingStepProps) => {
   const step = sessionState.conversationHistory.length + 1;
 
@@ -52,8 +54,8 @@ export const InterviewingStep = ({
           />
         ))}
 
-        {/* Thinking indicator */}
-        {isLoading && (
+        {/* Thinking indicator, until the reply starts streaming in */}
+        {isLoading && !isStreaming && (
           <ChatMessage
             role="assistant"
             content=""
@@ -1,6 +1,6 @@
 "use client";
 
-import { useState, useTransition, useEffect } from "react";
+import { useState, useTransition, useEffect, useRef } from "react";
 import { useRouter, usePathname, useSearchParams } from "next/navigation";
 import { addIdea } from "@/lib/actions/idea-actions";
 import { toast } from "sonner";
@@ -32,6 +32,9 @@ export const useInterviewMachine = () => {
 
   const [currentAnswer, setCurrentAnswer] = useState("");
   const [isLoading, setIsLoading] = useState(false);
+  // True once the AI's question has started streaming in
+  const [isStreaming, setIsStreaming] = useState(false);
+  const isStreamingRef = useRef(false);
   const [isSaving, startSavingTransition] = useTransition();
 
   const currentStep = (searchParams.get("step") || "initial") as InterviewStep;
@@ -63,6 +66,20 @@ export const useInterviewMachine = () => {
     }
   };
 
+  // Streamed tokens only update what is shown; the final state is saved with updateState
+  const showStreamedMessage = (messages: ChatMessage[]) => {
+    setSessionState((prev) => ({ ...prev, messages }));
+  };
+
+  // Save state without changing the step
+  const saveState = (newState: Partial<InterviewSessionState>) => {
+    setSessionState((prev) => {
+      const updatedState = { ...prev, ...newState };
+      sessionStorage.setItem(sessionStorageKey, JSON.stringify(updatedState));
+      return updatedState;
+    });
+  };
+
   const clearInterviewState = () => {
     sessionStorage.removeItem(sessionStorageKey);
     setSessionState({
@@ -82,35 +99,63 @@ export const useInterviewMachine = () => {
     setIsLoading(true);
     updateState("generating", { interest: interestValue });
 
-    try {
-      const data = await api.startInterview(interestValue);
+    // Add user's initial interest as first message
+    const userInterestMessage: ChatMessage = {
+      id: `msg-${Date.now()}-interest`,
+      role: "user",
+      content: interestValue,
+      timestamp: new Date(),
+    };
+    const aiMessageId = `msg-${Date.now()}-ai`;
 
-      // Add user's initial interest as first message
-      const userInterestMessage: ChatMessage = {
-        id: `msg-${Date.now()}-interest`,
-        role: "user",
-        content: interestValue,
-        timestamp: new Date(),
-      };
+    try {
+      // Switch to the chat on the first streamed token and show the question as it is written
+      const data = await api.startInterviewStream(interestValue, (question) => {
+        const partial: ChatMessage = {
+          id: aiMessageId,
+          role: "assistant",
+          content: question,
+          timestamp: new Date(),
+        };
+        if (!isStreamingRef.current) {
+          isStreamingRef.current = true;
+          setIsStreaming(true);
+          updateState("interviewing", {
+            interest: interestValue,
+            conversationHistory: [],
+            messages: [userInterestMessage, partial],
+          });
+        } else {
+          showStreamedMessage([userInterestMessage, partial]);
+        }
+      });
 
       // Add AI's first question as second message
       const aiQuestionMessage: ChatMessage = {
-        id: `msg-${Date.now()}-ai`,
+        id: aiMessageId,
         role: "assistant",
         content: data.question,
         timestamp: new Date(),
       };
 
-      updateState("interviewing", {
+      const interviewState = {
         interest: interestValue,
         currentQuestion: data.question,
         conversationHistory: [],
         messages: [userInterestMessage, aiQuestionMessage],
-      });
+      };
+      // Already on the interviewing step if the question was streamed
+      if (isStreamingRef.current) {
+        saveState(interviewState);
+      } else {
+        updateState("interviewing", interviewState);
+      }
     } catch (err: any) {
       toast.error("Error", { description: err.message });
       updateState("initial", {});
     } finally {
+      isStreamingRef.current = false;
+      setIsStreaming(false);
       setIsLoading(false);
     }
   };
@@ -145,11 +190,26 @@ export const useInterviewMachine = () => {
     // Then start loading
     setIsLoading(true);
 
-    // Always call continueInterview - AI will decide whether to continue or conclude
+    const aiMessageId = `msg-${Date.now()}-ai`;
+
+    // Always call continueInterview - AI will decide whether to continue or conclude.
+    // The question streams in first; the decision arrives with the final result
     try {
-      const data = await api.continueInterview(
+      const data = await api.continueInterviewStream(
         sessionState.interest,
-        newHistory
+        newHistory,
+        (question) => {
+          setIsStreaming(true);
+          showStreamedMessage([
+            ...updatedMessages,
+            {
+              id: aiMessageId,
+              role: "assistant",
+              content: question,
+              timestamp: new Date(),
+            },
+          ]);
+        }
       );
 
       // AI-driven decision: check if interview should continue
@@ -195,7 +255,7 @@ export const useInterviewMachine = () => {
       } else {
         // Continue interview - Add AI's next question to messages
         const aiMessage: ChatMessage = {
-          id: `msg-${Date.now()}-ai`,
+          id: aiMessageId,
           role: "assistant",
           content: data.question,
           timestamp: new Date(),
@@ -209,8 +269,11 @@ export const useInterviewMachine = () => {
       }
     } catch (err: any) {
       toast.error("Error", { description: err.message });
+      // Drop a partially streamed question
+      showStreamedMessage(updatedMessages);
     }
 
+    setIsStreaming(false);
     setIsLoading(false);
   };
 
@@ -251,6 +314,7 @@ export const useInterviewMachine = () => {
     sessionState,
     isLoading,
     isSaving,
+    isStreaming,
     currentAnswer,
     setCurrentAnswer,
     handleStartInterview,
@@ -1,5 +1,16 @@
 const BACKEND_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
+// A 503 means the AI provider is rate limited; wait as long as Retry-After
+// says (up to this many seconds) and try once more
+const MAX_RETRY_AFTER_SECONDS = 20;
+
+const retryDelayMs = (response: Response) => {
+  if (response.status !== 503) return null;
+  const seconds = Number(response.headers.get("Retry-After"));
+  if (!Number.isFinite(seconds) || seconds > MAX_RETRY_AFTER_SECONDS) return null;
+  return Math.max(seconds, 1) * 1000;
+};
+
 export async function fetchFromBackend(
   endpoint: string,
   method: string,
@@ -13,11 +24,19 @@ export async function fetchFromBackend(
   const fullUrl = `${BACKEND_URL}${endpoint}`;
   console.log(`[API Call] Fetching: ${fullUrl} (${method})`);
 
-  const response = await fetch(`${BACKEND_URL}${endpoint}`, {
-    method,
-    headers,
-    body: body ? JSON.stringify(body) : undefined,
-  });
+  const send = () =>
+    fetch(`${BACKEND_URL}${endpoint}`, {
+      method,
+      headers,
+      body: body ? JSON.stringify(body) : undefined,
+    });
+
+  let response = await send();
+  const delay = retryDelayMs(response);
+  if (delay !== null) {
+    await new Promise((resolve) => setTimeout(resolve, delay));
+    response = await send();
+  }
 
   if (!response.ok) {
     const errorData = await response.json().catch(() => ({}));
@@ -29,6 +48,62 @@ export async function fetchFromBackend(
   return response.json();
 }
 
+// POST to a server-sent events endpoint, calling onEvent for every event.
+// Resolves with the data of the `result` event; an `error` event rejects.
+export async function streamFromBackend(
+  endpoint: string,
+  body: any,
+  onEvent: (event: string, data: any) => void
+) {
+  const response = await fetch(`${BACKEND_URL}${endpoint}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(body),
+  });
+
+  if (!response.ok || !response.body) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(errorData.detail || "Failed to fetch from backend");
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  let result: any = undefined;
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const event = block.match(/^event: (.*)$/m)?.[1] ?? "message";
+      const data = JSON.parse(block.match(/^data: (.*)$/m)?.[1] ?? "null");
+      if (event === "error") throw new Error(data?.detail || "Stream failed");
+      if (event === "result") result = data;
+      onEvent(event, data);
+    }
+  }
+
+  if (result === undefined) throw new Error("Stream ended without a result");
+  return result;
+}
+
+// Interview turns with the question streamed: onQuestion gets the text so far
+const streamInterviewTurn = (
+  endpoint: string,
+  body: any,
+  onQuestion: (question: string) => void
+) => {
+  let question = "";
+  return streamFromBackend(endpoint, body, (event, data) => {
+    if (event === "question") {
+      question += data.delta;
+      onQuestion(question);
+    }
+  });
+};
+
 export const api = {
   startInterview: (interest: string) =>
     fetchFromBackend("/api/interview/start", "POST", { interest }),
@@ -39,6 +114,23 @@ export const api = {
       conversation,
     }),
 
+  startInterviewStream: (
+    interest: string,
+    onQuestion: (question: string) => void
+  ) =>
+    streamInterviewTurn("/api/interview/start/stream", { interest }, onQuestion),
+
+  continueInterviewStream: (
+    interest: string,
+    conversation: any[],
+    onQuestion: (question: string) => void
+  ) =>
+    streamInterviewTurn(
+      "/api/interview/continue/stream",
+      { interest, conversation },
+      onQuestion
+    ),
+
   generateIdeas: (data: any) =>
     fetchFromBackend("/api/idea/generate-list", "POST", data),
 
@@ -64,10 +156,16 @@ export const api = {
     return response.json();
   },
 
-  generateFlowchart: (projectId: string, projectContext: string) =>
+  // bypassCache skips the backend's response cache, for "Re-generate"
+  generateFlowchart: (
+    projectId: string,
+    projectContext: string,
+    bypassCache = false
+  ) =>
     fetchFromBackend("/api/idea/generate-flowchart", "POST", {
       projectId,
       projectContext,
+      bypassCache,
     }),
 
   getFlowchart: (projectId: string) =>
@@ -95,4 +193,9 @@ export const api = {
       projectId,
       isCompleted,
     }),
+
+  updateTaskProgressBatch: (
+    updates: { taskId: string; isCompleted: boolean }[]
+  ) =>
+    fetchFromBackend("/api/guide/progress/batch", "POST", { updates }),
 };